@@ -0,0 +1,4 @@
+"""
+性能基准测试
+运行: python -m benchmarks --output results.json [--baseline baseline.json]
+"""
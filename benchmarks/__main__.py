@@ -0,0 +1,58 @@
+"""
+基准测试命令行入口
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import click
+
+from . import bench_cleanup, bench_images, bench_markdown, bench_posts, bench_related, bench_search, bench_sync  # noqa: F401 注册基准测试
+from .harness import BENCHMARKS, BenchmarkReport, compare, run_all
+
+
+@click.command()
+@click.option("--only", "patterns", multiple=True, help="只运行名称以此开头的基准测试，可多次指定")
+@click.option("--scale", type=click.FloatRange(min=0, min_open=True), default=1.0, help="数据规模系数")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None, help="结果 JSON 文件")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False, path_type=Path), default=None, help="用于比较的基线结果")
+@click.option("--threshold", type=click.FloatRange(min=0, max=1), default=0.2, help="允许的吞吐量下降比例")
+@click.option("--list", "list_only", is_flag=True, help="列出所有基准测试")
+@click.option("--verbose", is_flag=True, help="显示被测代码的输出")
+def main(patterns, scale, output, baseline, threshold, list_only, verbose):
+    """运行性能基准测试"""
+    names = [
+        name for name in BENCHMARKS
+        if not patterns or any(name.startswith(pattern) for pattern in patterns)
+    ]
+    if list_only:
+        for name in names:
+            print(f"{name} ({BENCHMARKS[name].unit}/s)")
+        return
+    if not names:
+        print("[ERROR] 没有匹配的基准测试")
+        sys.exit(2)
+
+    report = asyncio.run(run_all(names, scale, verbose))
+    if output:
+        report.save(output)
+        print(f"[OK] 结果已保存到: {output}")
+
+    if baseline:
+        baseline_report = BenchmarkReport.load(baseline)
+        if baseline_report.scale != report.scale:
+            print(f"[WARNING] 基线的规模系数为 {baseline_report.scale}，与本次运行不同")
+        regressions = compare(report, baseline_report, threshold)
+        for regression in regressions:
+            print(
+                f"[ERROR] {regression.name} 吞吐量下降 {-regression.change:.0%}: "
+                f"{regression.baseline:,.1f} -> {regression.current:,.1f}"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"[OK] 与基线相比没有超过 {threshold:.0%} 的性能下降")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+旧文章清理基准测试
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List
+
+from notion_sync.fake_notion import FakeWorkspace
+from notion_sync.hugo_generator import HugoGenerator
+from notion_sync.image_config import ImageConfig
+from notion_sync.notion_client import NotionPost
+
+from .harness import Timing, benchmark, hugo_config, measure
+
+
+# 每次清理时删除的文章比例
+REMOVED_RATIO = 0.1
+
+
+def synced_posts(count: int) -> List[NotionPost]:
+    workspace = FakeWorkspace.synthesize(pages=count, blocks_per_page=0)
+    return [NotionPost(page) for page in workspace.pages]
+
+
+def write_posts(generator: HugoGenerator, posts: List[NotionPost], record: bool):
+    """写入文章文件，record 为 True 时同时记录到同步清单"""
+    content_dir = generator.config.content_dir
+    content_dir.mkdir(parents=True, exist_ok=True)
+    for post in posts:
+        path = content_dir / f"{post.slug}.md"
+        text = f'---\ntitle: "{post.title}"\nslug: "{post.slug}"\n---\n\n正文\n'
+        path.write_text(text, encoding="utf-8")
+        if record:
+            generator.manifest.record(post, path, text, [])
+
+
+def bench_cleanup(scale: float, record: bool) -> Timing:
+    count = max(1, int(5000 * scale))
+    posts = synced_posts(count)
+    current = posts[int(count * REMOVED_RATIO):]
+    root = Path(tempfile.mkdtemp())
+    generators: List[HugoGenerator] = []
+
+    def setup():
+        shutil.rmtree(root, ignore_errors=True)
+        generator = HugoGenerator(hugo_config(root), image_config=ImageConfig(optimize_images=False))
+        write_posts(generator, posts, record)
+        generators.append(generator)
+
+    try:
+        return measure(
+            lambda: generators[-1].clean_old_posts(current),
+            items=count,
+            setup=setup,
+            posts=count,
+            removed_ratio=REMOVED_RATIO,
+        )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@benchmark("cleanup.clean_old_posts", unit="posts")
+def bench_clean_old_posts(scale: float) -> Timing:
+    """根据同步清单清理旧文章"""
+    return bench_cleanup(scale, record=True)
+
+
+@benchmark("cleanup.clean_untracked_posts", unit="posts")
+def bench_clean_untracked_posts(scale: float) -> Timing:
+    """没有同步清单时扫描文章目录清理旧文章"""
+    return bench_cleanup(scale, record=False)
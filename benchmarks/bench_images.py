@@ -0,0 +1,130 @@
+"""
+图片处理基准测试
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from notion_sync.fake_notion import FAKE_IMAGE_HOST, FakeNotionTransport, FakeWorkspace
+from notion_sync.hugo_generator import HugoGenerator
+from notion_sync.image_config import ImageConfig
+from notion_sync.image_index import ImageIndex
+
+from .harness import Timing, benchmark, hugo_config, measure, measure_async
+
+
+def image_post(urls: List[str]) -> str:
+    """生成每段文字后跟一张图片的文章正文"""
+    paragraphs = [
+        f"第 {i} 段正文，介绍一些内容。\n\n![图片 {i}]({url})"
+        for i, url in enumerate(urls)
+    ]
+    return "\n\n".join(paragraphs)
+
+
+def image_urls(count: int) -> List[str]:
+    return [
+        f"https://file.notion.so/f/{i:08x}-0000-4000-8000-000000000000/image.png?expires=1"
+        for i in range(count)
+    ]
+
+
+@benchmark("images.process_images", unit="images")
+async def bench_process_images(scale: float) -> Timing:
+    """图片均已存在时的 _process_images（查找索引并替换链接）"""
+    count = max(1, int(500 * scale))
+    urls = image_urls(count)
+    content = image_post(urls)
+
+    with tempfile.TemporaryDirectory() as root:
+        generator = HugoGenerator(hugo_config(root), image_config=ImageConfig(optimize_images=False))
+        for url in urls:
+            image_id = generator._extract_notion_image_id(url)
+            filename = f"{image_id[:16]}.png"
+            (generator.images_dir / filename).write_bytes(b"png")
+            generator.image_index.add(image_id, filename, size=3)
+
+        timing = await measure_async(
+            lambda: generator._process_images(content, "benchmark"),
+            items=count,
+            images=count,
+        )
+        await generator.aclose()
+    return timing
+
+
+@benchmark("images.download", unit="images")
+async def bench_download(scale: float) -> Timing:
+    """图片不存在时的 _process_images（经由离线替身下载、去重、写入）"""
+    count = max(1, int(200 * scale))
+    urls = [f"https://{FAKE_IMAGE_HOST}/{i}-0.png" for i in range(count)]
+    content = image_post(urls)
+    transport = FakeNotionTransport(FakeWorkspace.synthesize(pages=0, image_size=(400, 300)))
+    root = Path(tempfile.mkdtemp())
+    generators: List[HugoGenerator] = []
+
+    async def setup():
+        shutil.rmtree(root, ignore_errors=True)
+        generators.append(HugoGenerator(
+            hugo_config(root),
+            image_config=ImageConfig(optimize_images=False),
+            http_client=httpx.AsyncClient(transport=transport),
+        ))
+
+    try:
+        return await measure_async(
+            lambda: generators[-1]._process_images(content, "benchmark"),
+            items=count,
+            setup=setup,
+            images=count,
+            image_size=[400, 300],
+        )
+    finally:
+        for generator in generators:
+            await generator.aclose()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def legacy_images_dir(root: Path, count: int) -> List[str]:
+    """创建旧版命名（{slug}-{id[:8]}.png）的图片目录，返回图片 ID"""
+    images_dir = Path(root) / "images"
+    images_dir.mkdir(parents=True)
+    image_ids = [f"{i:08x}" for i in range(count)]
+    for i, image_id in enumerate(image_ids):
+        (images_dir / f"post-{i % 500}-{image_id}.png").write_bytes(b"png")
+    return image_ids
+
+
+@benchmark("images.index_scan", unit="files")
+def bench_index_scan(scale: float) -> Timing:
+    """没有图片索引时扫描图片目录建立索引"""
+    count = max(1, int(20000 * scale))
+    with tempfile.TemporaryDirectory() as root:
+        legacy_images_dir(root, count)
+        return measure(
+            lambda: ImageIndex.load(Path(root) / "images.json", Path(root) / "images"),
+            items=count,
+            files=count,
+        )
+
+
+@benchmark("images.find_existing_image", unit="lookups")
+def bench_find_existing_image(scale: float) -> Timing:
+    """在大图片目录中按文件 ID 查找已有图片"""
+    count = max(1, int(20000 * scale))
+    with tempfile.TemporaryDirectory() as root:
+        image_ids = legacy_images_dir(root, count)
+        config = hugo_config(root).model_copy(update={"images_dir": Path(root) / "images"})
+        generator = HugoGenerator(config, image_config=ImageConfig(optimize_images=False))
+        # 查找的是 Notion 返回的完整文件 ID，旧文件只记录了前 8 位
+        lookups = [f"{image_id}-0000-4000-8000-000000000000" for image_id in image_ids]
+
+        def run():
+            for image_id in lookups:
+                generator._find_existing_image(image_id)
+
+        return measure(run, items=count, files=count)
@@ -0,0 +1,211 @@
+"""
+Markdown 转换基准测试
+legacy.* 为改用 notion_sync.renderer 之前的实现，保留用于对比
+"""
+
+import textwrap
+from typing import Any, Dict, List
+
+from notion_sync.config import NotionConfig
+from notion_sync.fake_notion import FakeWorkspace
+from notion_sync.notion_client import NotionClient
+
+from .harness import Timing, benchmark, measure
+
+
+def notion_client() -> NotionClient:
+    """创建不访问网络、不启用缓存的客户端"""
+    config = NotionConfig(token="fake", database_id="fake-database", cache_path=None)
+    return NotionClient(config, offline=True)
+
+
+def block_tree(workspace: FakeWorkspace, block_id: str) -> List[Dict[str, Any]]:
+    """按 get_block_tree 的结构展开合成的 block 树"""
+    blocks = [dict(block) for block in workspace.children(block_id)]
+    for block in blocks:
+        if block["has_children"]:
+            block["children"] = block_tree(workspace, block["id"])
+    return blocks
+
+
+def count_blocks(blocks: List[Dict[str, Any]]) -> int:
+    return sum(1 + count_blocks(block.get("children", [])) for block in blocks)
+
+
+def legacy_blocks_to_markdown(blocks: List[Dict[str, Any]]) -> str:
+    """旧实现：每层拼接字符串后整体缩进"""
+    content_parts = []
+    for block in blocks:
+        text = legacy_block_to_markdown(block)
+
+        children = block.get("children")
+        if children:
+            children_text = legacy_blocks_to_markdown(children)
+            if block.get("type") in ("bulleted_list_item", "numbered_list_item", "to_do"):
+                children_text = textwrap.indent(children_text, "    ")
+            text = f"{text}\n\n{children_text}" if text else children_text
+
+        content_parts.append(text)
+
+    return "\n\n".join(content_parts)
+
+
+def legacy_block_to_markdown(block: Dict[str, Any]) -> str:
+    """旧实现：按类型逐个比较的 if/elif 链"""
+    block_type = block.get("type", "")
+    prefixes = {
+        "paragraph": "",
+        "heading_1": "# ",
+        "heading_2": "## ",
+        "heading_3": "### ",
+        "bulleted_list_item": "- ",
+        "numbered_list_item": "1. ",
+    }
+    if block_type in prefixes:
+        text = legacy_extract_rich_text(block.get(block_type, {}).get("rich_text", []))
+        return f"{prefixes[block_type]}{text}" if text else ""
+    elif block_type == "code":
+        text = legacy_extract_rich_text(block.get("code", {}).get("rich_text", []))
+        language = block.get("code", {}).get("language", "")
+        return f"```{language}\n{text}\n```" if text else ""
+    elif block_type == "image":
+        image_url = block.get("image", {}).get("file", {}).get("url", "") or \
+                   block.get("image", {}).get("external", {}).get("url", "")
+        return f"![image]({image_url})" if image_url else ""
+    return ""
+
+
+def legacy_extract_rich_text(rich_text: List[Dict[str, Any]]) -> str:
+    """旧实现：每个片段都检查全部格式"""
+    result = []
+    for text_item in rich_text:
+        content = text_item.get("text", {}).get("content", "")
+        if text_item.get("text", {}).get("link"):
+            content = f"[{content}]({text_item['text']['link']['url']})"
+        if text_item.get("annotations", {}).get("bold"):
+            content = f"**{content}**"
+        if text_item.get("annotations", {}).get("italic"):
+            content = f"*{content}*"
+        if text_item.get("annotations", {}).get("strikethrough"):
+            content = f"~~{content}~~"
+        if text_item.get("annotations", {}).get("code"):
+            content = f"`{content}`"
+        result.append(content)
+    return "".join(result)
+
+
+def page_trees(scale: float, depth: int = 2) -> List[List[Dict[str, Any]]]:
+    pages = max(1, int(20 * scale))
+    workspace = FakeWorkspace.synthesize(pages=pages, blocks_per_page=200, depth=depth, images_per_page=5)
+    return [block_tree(workspace, page["id"]) for page in workspace.pages]
+
+
+def page_rich_texts(scale: float) -> List[List[Dict[str, Any]]]:
+    pages = max(1, int(20 * scale))
+    workspace = FakeWorkspace.synthesize(pages=pages, blocks_per_page=200, depth=0, images_per_page=0)
+    return [
+        block[block["type"]]["rich_text"]
+        for page in workspace.pages
+        for block in workspace.children(page["id"])
+        if "rich_text" in block.get(block["type"], {})
+    ]
+
+
+NESTED_DEPTH = 7
+
+
+def nested_list(width: int, depth: int) -> List[Dict[str, Any]]:
+    """每层 width 个列表项、嵌套 depth 层的 block 树（子块缩进开销随深度增长）"""
+    rich_text = [{"type": "text", "text": {"content": "nested " * 20, "link": None}, "plain_text": "nested " * 20, "href": None}]
+    if depth == 0:
+        return [{"type": "paragraph", "paragraph": {"rich_text": rich_text}} for _ in range(width)]
+    children = nested_list(width, depth - 1)
+    return [
+        {"type": "bulleted_list_item", "bulleted_list_item": {"rich_text": rich_text}, "children": children}
+        for _ in range(width)
+    ]
+
+
+@benchmark("markdown.blocks_to_markdown", unit="blocks")
+def bench_blocks_to_markdown(scale: float) -> Timing:
+    trees = page_trees(scale)
+    client = notion_client()
+
+    def run():
+        for blocks in trees:
+            client._blocks_to_markdown(blocks)
+
+    return measure(
+        run,
+        items=sum(count_blocks(blocks) for blocks in trees),
+        pages=len(trees),
+        blocks_per_page=200,
+        depth=2,
+    )
+
+
+@benchmark("markdown.extract_rich_text", unit="items")
+def bench_extract_rich_text(scale: float) -> Timing:
+    rich_texts = page_rich_texts(scale)
+    client = notion_client()
+
+    def run():
+        for rich_text in rich_texts:
+            client._extract_rich_text(rich_text)
+
+    return measure(
+        run,
+        items=sum(len(rich_text) for rich_text in rich_texts),
+        pages=max(1, int(20 * scale)),
+        blocks_per_page=200,
+    )
+
+
+@benchmark("markdown.nested_lists", unit="blocks")
+def bench_nested_lists(scale: float) -> Timing:
+    blocks = nested_list(3, NESTED_DEPTH)
+    client = notion_client()
+    return measure(
+        lambda: client._blocks_to_markdown(blocks), items=count_blocks(blocks), width=3, depth=NESTED_DEPTH
+    )
+
+
+@benchmark("markdown.legacy.blocks_to_markdown", unit="blocks")
+def bench_legacy_blocks_to_markdown(scale: float) -> Timing:
+    trees = page_trees(scale)
+
+    def run():
+        for blocks in trees:
+            legacy_blocks_to_markdown(blocks)
+
+    return measure(
+        run,
+        items=sum(count_blocks(blocks) for blocks in trees),
+        pages=len(trees),
+        blocks_per_page=200,
+        depth=2,
+    )
+
+
+@benchmark("markdown.legacy.extract_rich_text", unit="items")
+def bench_legacy_extract_rich_text(scale: float) -> Timing:
+    rich_texts = page_rich_texts(scale)
+
+    def run():
+        for rich_text in rich_texts:
+            legacy_extract_rich_text(rich_text)
+
+    return measure(
+        run,
+        items=sum(len(rich_text) for rich_text in rich_texts),
+        pages=max(1, int(20 * scale)),
+        blocks_per_page=200,
+    )
+
+
+@benchmark("markdown.legacy.nested_lists", unit="blocks")
+def bench_legacy_nested_lists(scale: float) -> Timing:
+    blocks = nested_list(3, NESTED_DEPTH)
+    return measure(
+        lambda: legacy_blocks_to_markdown(blocks), items=count_blocks(blocks), width=3, depth=NESTED_DEPTH
+    )
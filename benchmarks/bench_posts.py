@@ -0,0 +1,63 @@
+"""
+文章列表解析基准测试
+"""
+
+import gc
+import json
+import tracemalloc
+from typing import Any, Dict, List
+
+from notion_sync.fake_notion import FakeWorkspace
+from notion_sync.notion_client import NotionPost
+
+from .harness import Timing, benchmark, measure
+
+
+def listed_pages(scale: float) -> List[Dict[str, Any]]:
+    """数据库查询返回的页面数据（序列化后再解析，与接口返回一样是独立的对象）"""
+    count = max(1, int(10000 * scale))
+    workspace = FakeWorkspace.synthesize(pages=count, blocks_per_page=0)
+    return json.loads(json.dumps(workspace.pages))
+
+
+def retained_bytes(pages: List[Dict[str, Any]]) -> float:
+    """每篇文章对象常驻的内存（字节）：包括仍被引用的页面数据"""
+    raw = json.dumps(pages)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        pages = json.loads(raw)
+        posts = [NotionPost(page) for page in pages]
+        del pages
+        gc.collect()
+        return (tracemalloc.get_traced_memory()[0] - before) / len(posts)
+    finally:
+        tracemalloc.stop()
+
+
+@benchmark("posts.parse", unit="pages")
+def bench_parse(scale: float) -> Timing:
+    pages = listed_pages(scale)
+
+    def run():
+        for page in pages:
+            NotionPost(page)
+
+    return measure(run, items=len(pages), pages=len(pages), bytes_per_post=round(retained_bytes(pages)))
+
+
+@benchmark("posts.access", unit="posts")
+def bench_access(scale: float) -> Timing:
+    posts = [NotionPost(page) for page in listed_pages(scale)]
+
+    def run():
+        # 把读到的字段累加到结果中，避免只读属性的表达式被当作无用代码
+        fields = 0
+        for post in posts:
+            fields += len((post.title, post.slug, post.tags, post.status, post.date))
+            fields += len((post.excerpt, post.post_type, post.cover_url))
+            fields += post.is_published() + post.is_page()
+        return fields
+
+    return measure(run, items=len(posts), pages=len(posts))
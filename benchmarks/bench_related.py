@@ -0,0 +1,68 @@
+"""
+相关文章基准测试
+related.pairwise 为逐对计算余弦相似度的纯 Python 实现，保留用于对比
+"""
+
+import heapq
+import math
+from typing import Dict, List, Tuple
+
+from notion_sync.related import RelatedPosts, np
+from notion_sync.search_index import SearchDocument, SearchIndex
+
+from .bench_search import indexed_posts
+from .harness import Timing, benchmark, measure
+
+
+def search_documents(scale: float) -> Dict[str, SearchDocument]:
+    index = SearchIndex("unused.json", None)
+    for post, text in indexed_posts(scale):
+        index.update(post, text)
+    return index.documents
+
+
+def pairwise_related(documents: Dict[str, SearchDocument], count: int = 5) -> Dict[str, List[Tuple[str, float]]]:
+    """纯 Python 实现：与 RelatedPosts 相同的 TF-IDF 权重，逐对计算相似度"""
+    related = RelatedPosts(None, count)
+    total = len(documents)
+    frequency: Dict[str, int] = {}
+    for document in documents.values():
+        for term in document.terms:
+            frequency[term] = frequency.get(term, 0) + 1
+
+    vectors = {}
+    for notion_id, document in documents.items():
+        vector = {
+            term: (1.0 + math.log(weight)) * (math.log((1 + total) / (1 + frequency[term])) + 1.0)
+            for term, weight in document.terms.items()
+            if 2 <= frequency[term] <= max(2, total // 2)
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        vectors[notion_id] = {term: value / norm for term, value in vector.items()}
+
+    result = {}
+    for notion_id, vector in vectors.items():
+        scores = (
+            (sum(value * other_vector.get(term, 0.0) for term, value in vector.items()), other)
+            for other, other_vector in vectors.items()
+            if other != notion_id
+        )
+        result[notion_id] = [
+            (other, round(score, 4)) for score, other in heapq.nlargest(count, scores) if score >= related.min_score
+        ]
+    return result
+
+
+@benchmark("related.compute", unit="posts")
+def bench_compute(scale: float) -> Timing:
+    if np is None:
+        raise RuntimeError("未安装 NumPy")
+    documents = search_documents(scale)
+    related = RelatedPosts(None)
+    return measure(lambda: related.compute(documents), items=len(documents), posts=len(documents))
+
+
+@benchmark("related.pairwise", unit="posts")
+def bench_pairwise(scale: float) -> Timing:
+    documents = search_documents(scale)
+    return measure(lambda: pairwise_related(documents), items=len(documents), repeat=1, posts=len(documents))
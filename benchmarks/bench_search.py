@@ -0,0 +1,116 @@
+"""
+搜索索引基准测试
+"""
+
+import json
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from notion_sync.fake_notion import FakeWorkspace
+from notion_sync.notion_client import NotionPost
+from notion_sync.search_index import SearchIndex, blocks_text, term_shard, tokenize
+
+from .bench_markdown import block_tree
+from .harness import Timing, benchmark, measure
+
+
+def indexed_posts(scale: float) -> List[Tuple[NotionPost, str]]:
+    """已发布的合成文章及其正文"""
+    pages = max(1, int(500 * scale))
+    workspace = FakeWorkspace.synthesize(pages=pages, blocks_per_page=60, depth=1, images_per_page=0)
+    posts = [NotionPost(page) for page in workspace.pages]
+    return [
+        (post, blocks_text(block_tree(workspace, post.id)))
+        for post in posts
+        if post.is_published()
+    ]
+
+
+def directory_bytes(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*.json"))
+
+
+def query_bytes(output_dir: Path, posts: List[Tuple[NotionPost, str]], queries: int = 50) -> float:
+    """一次两词查询平均下载的字节数（meta、查询词所在的分片和结果所在的文章分块）"""
+    meta_path = output_dir / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    rng = random.Random(0)
+    total = 0
+    for _ in range(queries):
+        _, text = rng.choice(posts)
+        terms = set(rng.sample(tokenize(text), 2))
+        files = {meta_path}
+        matched = None
+        for term in terms:
+            path = output_dir / "terms" / f"{term_shard(term, meta['shards'])}.json"
+            files.add(path)
+            flat = json.loads(path.read_text(encoding="utf-8")).get(term, [])
+            docs = set(flat[::2])
+            matched = docs if matched is None else matched & docs
+        files.update(output_dir / "docs" / f"{doc_id // meta['doc_chunk']}.json" for doc_id in matched)
+        total += sum(path.stat().st_size for path in files)
+    return total / queries
+
+
+def full_text_bytes(posts: List[Tuple[NotionPost, str]]) -> int:
+    """Hugo 按页面输出 JSON 时搜索页需要下载的全文索引大小（对比）"""
+    documents = [
+        {"title": post.title, "date": post.date, "permalink": f"/{post.slug}/", "content": text}
+        for post, text in posts
+    ]
+    return len(json.dumps(documents, ensure_ascii=False).encode("utf-8"))
+
+
+@benchmark("search.build", unit="posts")
+def bench_build(scale: float) -> Timing:
+    posts = indexed_posts(scale)
+    workdir = Path(tempfile.mkdtemp(prefix="bench-search-"))
+
+    def setup():
+        (workdir / "state.json").unlink(missing_ok=True)
+        shutil.rmtree(workdir / "search", ignore_errors=True)
+
+    def run():
+        index = SearchIndex.load(workdir / "state.json", workdir / "search")
+        for post, text in posts:
+            index.update(post, text)
+        index.save()
+
+    try:
+        timing = measure(run, items=len(posts), setup=setup, posts=len(posts))
+        timing.params.update(
+            index_bytes=directory_bytes(workdir / "search"),
+            query_bytes=round(query_bytes(workdir / "search", posts)),
+            full_text_bytes=full_text_bytes(posts),
+        )
+        return timing
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+@benchmark("search.update", unit="posts")
+def bench_update(scale: float) -> Timing:
+    """修改一篇文章后的增量更新：只重写该文章涉及的分片"""
+    posts = indexed_posts(scale)
+    workdir = Path(tempfile.mkdtemp(prefix="bench-search-"))
+    index = SearchIndex.load(workdir / "state.json", workdir / "search")
+    for post, text in posts:
+        index.update(post, text)
+    index.save()
+    post, text = posts[0]
+    edits = iter(range(1_000_000))
+
+    def run():
+        index = SearchIndex.load(workdir / "state.json", workdir / "search")
+        index.update(post, f"{text}\nedit{next(edits)}")
+        index.save()
+
+    try:
+        dirty = SearchIndex.load(workdir / "state.json", workdir / "search")
+        dirty.update(post, f"{text}\nedited")
+        return measure(run, items=1, posts=len(posts), shards_rewritten=len(dirty._dirty_shards))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
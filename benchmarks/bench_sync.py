@@ -0,0 +1,102 @@
+"""
+端到端同步基准测试（使用离线 Notion 替身）
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List
+
+from notion_sync.config import NotionConfig, SyncConfig
+from notion_sync.fake_notion import FakeNotionTransport, FakeWorkspace
+from notion_sync.image_optimizer import Image
+from notion_sync.main import BlogSyncer
+
+from .harness import Timing, benchmark, hugo_config, measure_async
+
+
+# 模拟的 Notion API 延迟（秒）
+LATENCY = 0.005
+# 增量同步时被修改的文章比例
+EDITED_RATIO = 0.05
+
+
+def sync_config(root: Path) -> SyncConfig:
+    # 替身不限速，基准测试测量的是同步本身的开销
+    notion = NotionConfig(
+        token="fake",
+        database_id="fake-database",
+        concurrency=8,
+        rate_limit=1000,
+        cache_path=root / ".cache/notion_blocks.sqlite3",
+    )
+    return SyncConfig(notion=notion, hugo=hugo_config(root / "hugo"))
+
+
+async def run_sync(workspace: FakeWorkspace, root: Path, force: bool = False):
+    syncer = BlogSyncer(sync_config(root), transport=FakeNotionTransport(workspace, latency=LATENCY))
+    try:
+        if not await syncer.sync(force=force):
+            raise RuntimeError("同步失败")
+    finally:
+        await syncer.aclose()
+
+
+def workspace_params(pages: int) -> dict:
+    return {
+        "pages": pages,
+        "blocks_per_page": 30,
+        "depth": 2,
+        "images_per_page": 1,
+        "latency": LATENCY,
+        "pillow": Image is not None,
+    }
+
+
+def synthesize(pages: int) -> FakeWorkspace:
+    return FakeWorkspace.synthesize(pages=pages, blocks_per_page=30, depth=2, images_per_page=1)
+
+
+@benchmark("sync.full", unit="pages")
+async def bench_full_sync(scale: float) -> Timing:
+    """首次全量同步"""
+    pages = max(1, int(200 * scale))
+    workspace = synthesize(pages)
+    root = Path(tempfile.mkdtemp())
+    try:
+        return await measure_async(
+            lambda: run_sync(workspace, root),
+            items=pages,
+            repeat=3,
+            setup=lambda: shutil.rmtree(root, ignore_errors=True),
+            **workspace_params(pages),
+        )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@benchmark("sync.incremental", unit="pages")
+async def bench_incremental_sync(scale: float) -> Timing:
+    """少量文章修改后的增量同步"""
+    pages = max(1, int(200 * scale))
+    workspace = synthesize(pages)
+    root = Path(tempfile.mkdtemp())
+    edited: List[str] = [page["id"] for page in workspace.pages[:max(1, int(pages * EDITED_RATIO))]]
+
+    await run_sync(workspace, root)
+
+    def setup():
+        for page_id in edited:
+            workspace.touch(page_id)
+
+    try:
+        return await measure_async(
+            lambda: run_sync(workspace, root),
+            items=pages,
+            repeat=3,
+            setup=setup,
+            edited_ratio=EDITED_RATIO,
+            **workspace_params(pages),
+        )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,208 @@
+"""
+基准测试框架
+注册、计时、输出 JSON 结果，并与基线比较吞吐量
+"""
+
+import contextlib
+import inspect
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field, computed_field
+
+from notion_sync.config import HugoConfig
+
+
+REPORT_VERSION = 1
+
+
+class Timing(BaseModel):
+    """一次基准测试的计时结果"""
+    items: int
+    runs: List[float]
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BenchmarkResult(BaseModel):
+    """单个基准测试的结果"""
+    name: str
+    unit: str
+    items: int
+    repeat: int
+    best_seconds: float
+    mean_seconds: float
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+    @computed_field
+    @property
+    def throughput(self) -> float:
+        """每秒处理的条目数（按最快一次计算）"""
+        return self.items / self.best_seconds if self.best_seconds else 0.0
+
+
+class BenchmarkReport(BaseModel):
+    """一次完整运行的结果"""
+    version: int = REPORT_VERSION
+    created_at: str
+    python: str
+    platform: str
+    scale: float
+    results: List[BenchmarkResult] = Field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchmarkReport":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.model_dump(), f, ensure_ascii=False, indent=2)
+
+
+class Regression(BaseModel):
+    """相对基线的吞吐量下降"""
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+
+BenchmarkFunc = Callable[[float], Union[Timing, Awaitable[Timing]]]
+
+
+class Benchmark(BaseModel):
+    """已注册的基准测试"""
+    name: str
+    unit: str
+    func: BenchmarkFunc
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, unit: str):
+    """注册基准测试；被装饰的函数接收规模系数 scale，返回 Timing"""
+
+    def decorator(func: BenchmarkFunc) -> BenchmarkFunc:
+        BENCHMARKS[name] = Benchmark(name=name, unit=unit, func=func)
+        return func
+
+    return decorator
+
+
+def measure(
+    func: Callable[[], Any],
+    items: int,
+    repeat: int = 5,
+    setup: Optional[Callable[[], Any]] = None,
+    **params: Any,
+) -> Timing:
+    """多次运行 func 并计时；setup 在每次运行前执行，不计入耗时"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return Timing(items=items, runs=runs, params=params)
+
+
+async def measure_async(
+    func: Callable[[], Awaitable[Any]],
+    items: int,
+    repeat: int = 5,
+    setup: Optional[Callable[[], Any]] = None,
+    **params: Any,
+) -> Timing:
+    """measure 的异步版本；setup 可以是协程函数"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            result = setup()
+            if inspect.isawaitable(result):
+                await result
+        started = time.perf_counter()
+        await func()
+        runs.append(time.perf_counter() - started)
+    return Timing(items=items, runs=runs, params=params)
+
+
+def hugo_config(root: Path) -> HugoConfig:
+    """在临时目录下创建 Hugo 目录配置（所有输出都写入临时目录，不影响站点目录）"""
+    root = Path(root)
+    return HugoConfig(
+        content_dir=root / "content/posts",
+        pages_dir=root / "content",
+        static_dir=root / "static",
+        images_dir=root / "static/images",
+        manifest_path=root / ".notion_sync/manifest.json",
+        image_index_path=root / ".notion_sync/images.json",
+        shards_dir=root / ".notion_sync/shards",
+        search_state_path=root / ".notion_sync/search.json",
+        search_dir=root / "static/search",
+        related_path=root / "data/related.json",
+    )
+
+
+async def run_benchmark(bench: Benchmark, scale: float, verbose: bool = False) -> BenchmarkResult:
+    """运行单个基准测试；默认屏蔽被测代码的输出，避免打印影响计时"""
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        timing = bench.func(scale)
+        if inspect.isawaitable(timing):
+            timing = await timing
+
+    return BenchmarkResult(
+        name=bench.name,
+        unit=bench.unit,
+        items=timing.items,
+        repeat=len(timing.runs),
+        best_seconds=min(timing.runs),
+        mean_seconds=sum(timing.runs) / len(timing.runs),
+        params=timing.params,
+    )
+
+
+async def run_all(names: List[str], scale: float, verbose: bool = False) -> BenchmarkReport:
+    """依次运行基准测试"""
+    report = BenchmarkReport(
+        created_at=datetime.now().astimezone().isoformat(),
+        python=sys.version.split()[0],
+        platform=platform.platform(),
+        scale=scale,
+    )
+    for name in names:
+        result = await run_benchmark(BENCHMARKS[name], scale, verbose)
+        report.results.append(result)
+        print(f"[OK] {name}: {result.throughput:,.1f} {result.unit}/s ({result.best_seconds:.3f}s)")
+    return report
+
+
+def compare(report: BenchmarkReport, baseline: BenchmarkReport, threshold: float) -> List[Regression]:
+    """找出吞吐量比基线下降超过 threshold 的基准测试"""
+    baseline_results = {result.name: result for result in baseline.results}
+    regressions = []
+    for result in report.results:
+        previous = baseline_results.get(result.name)
+        if previous is None:
+            continue
+        if previous.params != result.params:
+            print(f"[WARNING] {result.name} 的参数与基线不同，跳过比较")
+            continue
+        if result.throughput < previous.throughput * (1 - threshold):
+            regressions.append(
+                Regression(name=result.name, baseline=previous.throughput, current=result.throughput)
+            )
+    return regressions
@@ -0,0 +1,170 @@
+/**
+ * 站内搜索
+ * 索引由 notion_sync 在同步时生成（static/search）：
+ *   meta.json          分片数等参数
+ *   terms/{n}.json     {词: [文章 ID, 权重, ...]}，词按 FNV-1a 哈希分片
+ *   docs/{n}.json      {文章 ID: [url, 标题, 日期, 摘要]}
+ * 查询时只下载查询词所在的分片和结果所在的文章分块
+ */
+(function () {
+    "use strict";
+
+    // 与 notion_sync/search_index.py 的 tokenize 相同
+    var TOKEN_PATTERN = /[0-9a-z\u00df-\u00f6\u00f8-\u024f]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+/g;
+    var MAX_RESULTS = 50;
+
+    function tokenize(text) {
+        var tokens = [];
+        var matches = text.toLowerCase().match(TOKEN_PATTERN) || [];
+        matches.forEach(function (token) {
+            if (token.charCodeAt(0) < 0x3040) {
+                if (token.length > 1) tokens.push(token);
+            } else if (token.length === 1) {
+                tokens.push(token);
+            } else {
+                for (var i = 0; i < token.length - 1; i++) tokens.push(token.slice(i, i + 2));
+            }
+        });
+        return tokens;
+    }
+
+    // 与 notion_sync/search_index.py 的 term_shard 相同
+    var encoder = new TextEncoder();
+    function termShard(term, shards) {
+        var hash = 0x811c9dc5;
+        encoder.encode(term).forEach(function (byte) {
+            hash = Math.imul(hash ^ byte, 0x01000193) >>> 0;
+        });
+        return hash % shards;
+    }
+
+    function SearchIndex(base) {
+        this.base = base;
+        this.cache = new Map();
+    }
+
+    SearchIndex.prototype.load = function (path) {
+        if (!this.cache.has(path)) {
+            var request = fetch(this.base + path).then(function (response) {
+                return response.ok ? response.json() : {};
+            });
+            this.cache.set(path, request);
+        }
+        return this.cache.get(path);
+    };
+
+    /** 返回包含全部查询词的文章，按权重之和排序 */
+    SearchIndex.prototype.search = async function (query) {
+        var terms = Array.from(new Set(tokenize(query)));
+        if (!terms.length) return [];
+
+        var meta = await this.load("meta.json");
+        var self = this;
+        var postings = await Promise.all(terms.map(function (term) {
+            return self.load("terms/" + termShard(term, meta.shards) + ".json").then(function (shard) {
+                return shard[term] || [];
+            });
+        }));
+
+        var scores = null;
+        postings.forEach(function (flat) {
+            var next = new Map();
+            for (var i = 0; i < flat.length; i += 2) {
+                if (scores === null || scores.has(flat[i])) {
+                    next.set(flat[i], (scores === null ? 0 : scores.get(flat[i])) + flat[i + 1]);
+                }
+            }
+            scores = next;
+        });
+
+        var ranked = Array.from(scores.entries())
+            .sort(function (a, b) { return b[1] - a[1] || a[0] - b[0]; })
+            .slice(0, MAX_RESULTS);
+        return Promise.all(ranked.map(function (item) {
+            var chunk = Math.floor(item[0] / meta.doc_chunk);
+            return self.load("docs/" + chunk + ".json").then(function (docs) {
+                return docs[item[0]];
+            });
+        })).then(function (docs) {
+            return docs.filter(Boolean);
+        });
+    };
+
+    function renderResult(doc) {
+        var article = document.createElement("article");
+        var link = document.createElement("a");
+        link.href = doc[0];
+
+        var details = document.createElement("div");
+        details.className = "article-details";
+        var title = document.createElement("h2");
+        title.className = "article-title";
+        title.textContent = doc[1];
+        details.appendChild(title);
+
+        if (doc[3]) {
+            var summary = document.createElement("p");
+            summary.className = "article-preview";
+            summary.textContent = doc[3];
+            details.appendChild(summary);
+        }
+        if (doc[2]) {
+            var footer = document.createElement("footer");
+            footer.className = "article-time";
+            var time = document.createElement("time");
+            time.textContent = doc[2];
+            footer.appendChild(time);
+            details.appendChild(footer);
+        }
+
+        link.appendChild(details);
+        article.appendChild(link);
+        return article;
+    }
+
+    window.addEventListener("load", function () {
+        var form = document.querySelector(".search-form");
+        if (!form) return;
+        var input = form.querySelector("input");
+        var list = document.querySelector(".article-list--compact");
+        var title = document.querySelector(".section-title");
+        var index = new SearchIndex(form.dataset.index);
+        var current = 0;
+
+        async function run(keyword) {
+            var id = ++current;
+            var start = performance.now();
+            var docs = keyword ? await index.search(keyword) : [];
+            // 输入变化后丢弃旧查询的结果
+            if (id !== current) return;
+
+            list.replaceChildren.apply(list, docs.map(renderResult));
+            title.textContent = keyword
+                ? form.dataset.resultTitle
+                    .replace("#count", docs.length)
+                    .replace("#time", ((performance.now() - start) / 1000).toPrecision(1))
+                : "";
+        }
+
+        function update() {
+            var keyword = input.value.trim();
+            var url = new URL(window.location.href);
+            if (keyword) url.searchParams.set("keyword", keyword);
+            else url.searchParams.delete("keyword");
+            window.history.replaceState(null, "", url.toString());
+            run(keyword);
+        }
+
+        form.addEventListener("submit", function (event) {
+            event.preventDefault();
+            update();
+        });
+        input.addEventListener("input", update);
+
+        var keyword = new URL(window.location.href).searchParams.get("keyword");
+        if (keyword) {
+            input.value = keyword;
+            run(keyword);
+        }
+    });
+})();
@@ -0,0 +1,147 @@
+"""
+Notion block 缓存模块
+将 blocks/children 的原始响应和页面数据保存在本地 SQLite 中，
+用于避免重复下载以及离线重建 Hugo 内容
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    block_id TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_accessed_at ON blocks (accessed_at);
+CREATE TABLE IF NOT EXISTS pages (
+    page_id TEXT PRIMARY KEY,
+    last_edited_time TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+# 其他进程持有写锁时的最长等待时间（秒）
+BUSY_TIMEOUT = 30.0
+
+
+class BlockCache:
+    """Notion block 响应缓存
+
+    每个 block 的子块列表以 (block_id, version) 为键保存，version 为所在页面的
+    last_edited_time：页面内任意 block 变化都会更新页面的编辑时间，而父 block
+    自身的编辑时间不一定随子块变化。超过 max_bytes 时按最近访问时间淘汰。
+
+    每次写入立即提交（自动提交模式），同步中途退出或长期运行（watch / serve）时
+    已获取的内容不会丢失，也不会长时间占用写锁。使用 WAL 模式并在加锁时等待，
+    多个进程（并行的分片同步）可以共用同一个缓存文件。
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, isolation_level=None, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """多条语句在一个事务中提交"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def get_children(self, block_id: str, version: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """读取缓存的子块列表；version 为 None 时忽略版本（离线模式）"""
+        if version is None:
+            row = self.conn.execute(
+                "SELECT data FROM blocks WHERE block_id = ?", (block_id,)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT data FROM blocks WHERE block_id = ? AND version = ?",
+                (block_id, version),
+            ).fetchone()
+        if row is None:
+            return None
+
+        self.conn.execute(
+            "UPDATE blocks SET accessed_at = ? WHERE block_id = ?", (time.time(), block_id)
+        )
+        blocks: List[Dict[str, Any]] = json.loads(row[0])
+        return blocks
+
+    def put_children(self, block_id: str, version: str, blocks: List[Dict[str, Any]]) -> None:
+        """保存子块列表"""
+        data = json.dumps(blocks, ensure_ascii=False, separators=(",", ":"))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO blocks (block_id, version, data, size, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (block_id, version, data, len(data), time.time()),
+        )
+
+    def put_page(self, page_data: Dict[str, Any]) -> None:
+        """保存页面的原始数据（用于离线重建）"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (page_id, last_edited_time, data) VALUES (?, ?, ?)",
+            (
+                page_data["id"],
+                page_data["last_edited_time"],
+                json.dumps(page_data, ensure_ascii=False, separators=(",", ":")),
+            ),
+        )
+
+    def get_page(self, page_id: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的页面数据"""
+        row = self.conn.execute("SELECT data FROM pages WHERE page_id = ?", (page_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_pages(self) -> Iterator[Dict[str, Any]]:
+        """遍历缓存的页面数据，按编辑时间倒序"""
+        rows = self.conn.execute("SELECT data FROM pages ORDER BY last_edited_time DESC")
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def prune_pages(self, page_ids: set) -> None:
+        """移除已不在 Notion 中的页面"""
+        cached_ids = {row[0] for row in self.conn.execute("SELECT page_id FROM pages")}
+        stale_ids = cached_ids - set(page_ids)
+        with self._transaction():
+            self.conn.executemany(
+                "DELETE FROM pages WHERE page_id = ?", [(page_id,) for page_id in stale_ids]
+            )
+
+    def evict(self) -> None:
+        """按最近访问时间淘汰，直到缓存大小不超过 max_bytes"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute("SELECT block_id, size FROM blocks ORDER BY accessed_at")
+        evicted = []
+        for block_id, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((block_id,))
+            total -= size
+        with self._transaction():
+            self.conn.executemany("DELETE FROM blocks WHERE block_id = ?", evicted)
+        print(f"[OK] 缓存淘汰了 {len(evicted)} 个 block")
+
+    def close(self) -> None:
+        """淘汰超出部分并关闭连接"""
+        self.evict()
+        self.conn.close()
@@ -21,10 +21,28 @@ except ImportError:
     print("请运行: uv add python-dotenv")
 
 
+class PropertyMapping(BaseModel):
+    """文章字段对应的 Notion 数据库属性名"""
+    title: str = Field(default="Title", description="标题（title 类型）；找不到时使用数据库的标题属性")
+    slug: str = Field(default="Slug", description="slug（rich_text 类型）")
+    tags: str = Field(default="Tags", description="标签（multi_select 类型）")
+    status: str = Field(default="Status", description="状态（select 类型）")
+    date: str = Field(default="Date", description="发布日期（date 类型）")
+    excerpt: str = Field(default="Excerpt", description="摘要（rich_text 类型）")
+    post_type: str = Field(default="Type", description="文章类型（select 类型，Post 或 Page）")
+
+
 class NotionConfig(BaseModel):
     """Notion API 配置"""
     token: str = Field(..., description="Notion API token")
     database_id: str = Field(..., description="Notion database ID")
+    concurrency: int = Field(default=4, ge=1, description="同时进行的 Notion 请求数")
+    rate_limit: float = Field(default=3.0, gt=0, description="每秒最多发出的 Notion 请求数")
+    max_retries: int = Field(default=5, ge=0, description="请求失败后的最大重试次数")
+    cache_path: Optional[Path] = Field(default=Path(".cache/notion_blocks.sqlite3"), description="block 缓存文件，为空时不启用缓存")
+    cache_max_bytes: int = Field(default=256 * 1024 * 1024, description="block 缓存的最大大小（字节）")
+    properties: PropertyMapping = Field(default_factory=PropertyMapping, description="文章字段对应的数据库属性名")
+    keep_raw: bool = Field(default=False, description="在文章对象上保留原始页面数据（调试用）")
     
     @classmethod
     def from_env(cls) -> "NotionConfig":
@@ -32,6 +50,8 @@ class NotionConfig(BaseModel):
         return cls(
             token=os.getenv("NOTION_TOKEN", ""),
             database_id=os.getenv("NOTION_DATABASE_ID", ""),
+            concurrency=int(os.getenv("NOTION_CONCURRENCY", "4")),
+            keep_raw=os.getenv("NOTION_KEEP_RAW", "").lower() in ("1", "true", "yes"),
         )
 
 
@@ -41,12 +61,54 @@ class HugoConfig(BaseModel):
     pages_dir: Path = Field(default=Path("hugo/content"), description="Hugo 页面目录")
     static_dir: Path = Field(default=Path("hugo/static"), description="Hugo 静态资源目录")
     images_dir: Path = Field(default=Path("hugo/static/images"), description="图片存储目录")
+    manifest_path: Path = Field(default=Path("hugo/.notion_sync/manifest.json"), description="同步清单文件")
+    image_index_path: Path = Field(default=Path("hugo/.notion_sync/images.json"), description="图片索引文件")
+    shards_dir: Path = Field(default=Path("hugo/.notion_sync/shards"), description="分片同步的输出目录")
+    search_state_path: Path = Field(default=Path("hugo/.notion_sync/search.json"), description="搜索索引状态文件")
+    search_dir: Optional[Path] = Field(default=Path("hugo/static/search"), description="搜索索引输出目录，为空时只更新状态文件")
+    search_shards: int = Field(default=64, ge=1, description="搜索索引的分片数")
+    related_path: Optional[Path] = Field(default=Path("hugo/data/related.json"), description="相关文章数据文件，为空时不计算")
+    related_count: int = Field(default=5, ge=1, description="每篇文章的相关文章数")
+
+
+class PipelineConfig(BaseModel):
+    """同步流水线配置（各阶段的并发数和队列长度）"""
+    fetch_workers: Optional[int] = Field(default=None, ge=1, description="获取 block 的并发数，为空时使用 Notion 请求并发数")
+    render_workers: int = Field(default=1, ge=1, description="渲染 Markdown 的并发数")
+    asset_workers: int = Field(default=4, ge=1, description="处理图片的并发数")
+    write_workers: int = Field(default=1, ge=1, description="写入文件的并发数")
+    queue_size: int = Field(default=16, ge=1, description="阶段之间的队列长度")
+
+
+class WatchConfig(BaseModel):
+    """watch 模式配置"""
+    interval: float = Field(default=60.0, gt=0, description="轮询 Notion 的间隔（秒）")
+    debounce: float = Field(default=30.0, ge=0, description="最后一次变化后等待多久运行钩子（秒）")
+    hook: Optional[str] = Field(default=None, description="同步出变化后运行的命令，例如 Hugo 构建")
+    full_sync_interval: float = Field(default=3600.0, gt=0, description="全量同步（清理已删除文章）的间隔（秒）")
+
+
+class ServeConfig(BaseModel):
+    """webhook 接收服务配置"""
+    host: str = Field(default="127.0.0.1", description="监听地址")
+    port: int = Field(default=8787, ge=0, le=65535, description="监听端口")
+    secret: str = Field(default="", description="校验 webhook 请求的共享密钥")
+    coalesce: float = Field(default=2.0, ge=0, description="合并同一批事件的等待时间（秒）")
+    max_body_bytes: int = Field(default=1024 * 1024, description="请求体的最大大小（字节）")
+    
+    @classmethod
+    def from_env(cls) -> "ServeConfig":
+        """从环境变量加载配置"""
+        return cls(secret=os.getenv("NOTION_WEBHOOK_SECRET", ""))
 
 
 class SyncConfig(BaseModel):
     """同步配置"""
     notion: NotionConfig
     hugo: HugoConfig
+    pipeline: PipelineConfig = Field(default_factory=PipelineConfig)
+    watch: WatchConfig = Field(default_factory=WatchConfig)
+    serve: ServeConfig = Field(default_factory=ServeConfig)
     
     @classmethod
     def from_env(cls) -> "SyncConfig":
@@ -54,6 +116,7 @@ class SyncConfig(BaseModel):
         return cls(
             notion=NotionConfig.from_env(),
             hugo=HugoConfig(),
+            serve=ServeConfig.from_env(),
         )
 
 
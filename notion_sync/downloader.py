@@ -0,0 +1,159 @@
+"""
+图片下载模块
+流式下载到临时文件并边下载边计算哈希，成功后原子重命名，
+所有文章共用同一个并发限制
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import httpx
+from pydantic import BaseModel
+
+
+TEMP_PREFIX = ".download-"
+TEMP_SUFFIX = ".part"
+
+# 超过此时间（秒）未修改的临时文件视为残留，无论写入它的进程是否还在运行
+STALE_TEMP_AGE = 3600
+
+
+class ImageTooLargeError(ValueError):
+    """图片超过大小限制"""
+
+
+class DownloadedFile(BaseModel):
+    """已下载到临时文件的图片"""
+    temp_path: Path
+    size: int
+    sha256: str
+    content_type: str = ""
+
+    def commit(self, final_path: Path) -> None:
+        """原子地移动到最终位置"""
+        # mkstemp 创建的文件只有属主可读，静态资源需要普通权限
+        os.chmod(self.temp_path, 0o644)
+        os.replace(self.temp_path, final_path)
+
+    def discard(self) -> None:
+        """丢弃临时文件"""
+        try:
+            self.temp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ImageDownloader:
+    """流式图片下载器"""
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        temp_dir: Path,
+        max_bytes: int,
+        concurrency: int,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.http_client = http_client
+        self.temp_dir = Path(temp_dir)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.clean_temp_files()
+
+    def clean_temp_files(self) -> None:
+        """清理上次运行中断后残留的临时文件
+
+        分片同步时多个进程共用图片目录，只删除写入进程已退出或长时间未修改的临时文件
+        """
+        if not self.temp_dir.exists():
+            return
+        now = time.time()
+        for temp_file in self.temp_dir.glob(f"{TEMP_PREFIX}*{TEMP_SUFFIX}"):
+            try:
+                stale = now - temp_file.stat().st_mtime > STALE_TEMP_AGE
+            except FileNotFoundError:
+                continue
+            pid = _temp_file_pid(temp_file)
+            if stale or (pid is not None and not _process_alive(pid)):
+                temp_file.unlink(missing_ok=True)
+
+    async def download(self, url: str) -> DownloadedFile:
+        """下载到临时文件，超过大小限制或失败时不留下任何文件"""
+        async with self._semaphore:
+            # 文件名中带进程 ID，清理时可以判断写入进程是否还在运行
+            fd, temp_name = tempfile.mkstemp(
+                dir=self.temp_dir, prefix=f"{TEMP_PREFIX}{os.getpid()}-", suffix=TEMP_SUFFIX
+            )
+            temp_path = Path(temp_name)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    return await self._stream_to(url, f, temp_path)
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+
+    async def _stream_to(self, url: str, f: BinaryIO, temp_path: Path) -> DownloadedFile:
+        digest = hashlib.sha256()
+        size = 0
+
+        async with self.http_client.stream("GET", url) as response:
+            response.raise_for_status()
+
+            content_length = self._content_length(response)
+            if content_length is not None and content_length > self.max_bytes:
+                raise ImageTooLargeError(
+                    f"图片大小 {content_length} 超过限制 {self.max_bytes}: {url}"
+                )
+
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ImageTooLargeError(f"图片大小超过限制 {self.max_bytes}: {url}")
+                digest.update(chunk)
+                f.write(chunk)
+
+            content_type = response.headers.get("content-type", "")
+
+        f.flush()
+        os.fsync(f.fileno())
+        return DownloadedFile(
+            temp_path=temp_path,
+            size=size,
+            sha256=digest.hexdigest(),
+            content_type=content_type,
+        )
+
+    @staticmethod
+    def _content_length(response: httpx.Response) -> Optional[int]:
+        try:
+            return int(response.headers["content-length"])
+        except (KeyError, ValueError):
+            return None
+
+
+def _temp_file_pid(temp_file: Path) -> Optional[int]:
+    """临时文件名中的进程 ID（旧版本的文件名中没有，只按时间清理）"""
+    pid, sep, _ = temp_file.name[len(TEMP_PREFIX):].partition("-")
+    if sep and pid.isdigit():
+        return int(pid)
+    return None
+
+
+def _process_alive(pid: int) -> bool:
+    """进程是否还在运行"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 进程属于其他用户（PermissionError）或无法判断时不删除，交给按时间清理
+        return True
+    return True
@@ -0,0 +1,471 @@
+"""
+离线 Notion API 替身
+通过 httpx 传输层模拟 search、数据库查询、blocks/children、pages 接口以及图片服务器，
+数据来自录制的响应或按需合成的工作区，支持分页、429（带 Retry-After）和延迟注入，
+用于在没有 Notion token 的情况下测试和压测同步流程
+"""
+
+import asyncio
+import json
+import random
+import re
+import struct
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+FAKE_IMAGE_HOST = "images.fake-notion.test"
+
+BLOCKS_PATH = re.compile(r"^/v1/blocks/([^/]+)/children$")
+PAGES_PATH = re.compile(r"^/v1/pages/([^/]+)$")
+QUERY_PATH = re.compile(r"^/v1/databases/([^/]+)/query$")
+
+WORDS = (
+    "notion hugo sync python async cache image block page markdown pipeline "
+    "性能 优化 博客 同步 缓存 图片 并发 文章 笔记 工具"
+).split()
+
+
+def png_bytes(width: int, height: int, seed: int = 0) -> bytes:
+    """生成纯色 PNG 图片（不依赖 Pillow）"""
+    rng = random.Random(seed)
+    pixel = bytes(rng.randrange(256) for _ in range(3))
+    raw = (b"\x00" + pixel * width) * height
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + tag
+            + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _rich_text(content: str, **annotations: bool) -> Dict[str, Any]:
+    return {
+        "type": "text",
+        "text": {"content": content, "link": None},
+        "annotations": {
+            "bold": False,
+            "italic": False,
+            "strikethrough": False,
+            "underline": False,
+            "code": False,
+            "color": "default",
+            **annotations,
+        },
+        "plain_text": content,
+        "href": None,
+    }
+
+
+class FakeWorkspace:
+    """Notion 工作区数据
+
+    页面和 block 可以来自录制的 fixture（load），也可以按需确定性地合成（synthesize）：
+    合成的 block 树只在被请求时生成，因此一万个页面的深层 block 树也不会占满内存
+    """
+
+    def __init__(self, database_id: Optional[str] = "fake-database"):
+        self.database_id = database_id
+        self.pages: List[Dict[str, Any]] = []
+        self.blocks: Dict[str, List[Dict[str, Any]]] = {}
+        self.images: Dict[str, bytes] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+
+        # 合成参数
+        self.seed = 0
+        self.blocks_per_page = 0
+        self.depth = 0
+        self.images_per_page = 0
+        self.image_size = (800, 600)
+
+    @classmethod
+    def synthesize(
+        cls,
+        pages: int = 100,
+        blocks_per_page: int = 30,
+        depth: int = 2,
+        images_per_page: int = 2,
+        image_size: tuple = (800, 600),
+        seed: int = 0,
+    ) -> "FakeWorkspace":
+        """合成一个工作区"""
+        workspace = cls()
+        workspace.seed = seed
+        workspace.blocks_per_page = blocks_per_page
+        workspace.depth = depth
+        workspace.images_per_page = images_per_page
+        workspace.image_size = image_size
+
+        base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for index in range(pages):
+            edited = base_time + timedelta(minutes=index)
+            workspace.pages.append(workspace._page(index, edited))
+        workspace.pages.sort(key=lambda page: page["last_edited_time"], reverse=True)
+        return workspace
+
+    @classmethod
+    def load(cls, fixture_dir: Path, database_id: Optional[str] = None) -> "FakeWorkspace":
+        """从录制的 fixture 目录加载（见 RecordingTransport）
+
+        未指定 database_id 时接受任意数据库 ID 的查询
+        """
+        fixture_dir = Path(fixture_dir)
+        workspace = cls(database_id)
+        with open(fixture_dir / "pages.json", "r", encoding="utf-8") as f:
+            workspace.pages = json.load(f)
+        for block_file in (fixture_dir / "blocks").glob("*.json"):
+            with open(block_file, "r", encoding="utf-8") as f:
+                workspace.blocks[block_file.stem] = json.load(f)
+        return workspace
+
+    def touch(self, page_id: str, when: Optional[datetime] = None) -> None:
+        """模拟页面被编辑"""
+        when = when or datetime.now(timezone.utc)
+        page = self.page(page_id)
+        if page is not None:
+            page["last_edited_time"] = when.strftime("%Y-%m-%dT%H:%M:00.000Z")
+        self.pages.sort(key=lambda page: page["last_edited_time"], reverse=True)
+
+    def page(self, page_id: str) -> Optional[Dict[str, Any]]:
+        if len(self._by_id) != len(self.pages):
+            self._by_id = {page["id"]: page for page in self.pages}
+        return self._by_id.get(page_id)
+
+    def children(self, block_id: str) -> Optional[List[Dict[str, Any]]]:
+        """返回 block 的子块列表"""
+        if block_id in self.blocks:
+            return self.blocks[block_id]
+        if self.blocks_per_page and block_id.startswith("page-"):
+            return self._synthesize_children(block_id)
+        return None
+
+    def image(self, name: str) -> Optional[bytes]:
+        if name in self.images:
+            return self.images[name]
+        match = re.match(r"^(\d+)-(\d+)\.png$", name)
+        if not match:
+            return None
+        width, height = self.image_size
+        return png_bytes(width, height, seed=int(match.group(1)) * 1000 + int(match.group(2)))
+
+    def _page(self, index: int, edited: datetime) -> Dict[str, Any]:
+        rng = random.Random(f"{self.seed}:page:{index}")
+        page_id = f"page-{index:06d}"
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+        page: Dict[str, Any] = {
+            "object": "page",
+            "id": page_id,
+            "created_time": "2024-01-01T00:00:00.000Z",
+            "last_edited_time": edited.strftime("%Y-%m-%dT%H:%M:00.000Z"),
+            "cover": None,
+            "archived": False,
+            "parent": {"type": "database_id", "database_id": self.database_id},
+            "properties": {
+                "Title": {"type": "title", "title": [_rich_text(f"{title} {index}")]},
+                "Slug": {"type": "rich_text", "rich_text": [_rich_text(f"post-{index:06d}")]},
+                "Status": {"type": "select", "select": {"name": "Published" if index % 10 else "Draft"}},
+                "Type": {"type": "select", "select": {"name": "Post"}},
+                "Tags": {
+                    "type": "multi_select",
+                    "multi_select": [{"name": rng.choice(WORDS)} for _ in range(rng.randint(0, 3))],
+                },
+                "Date": {"type": "date", "date": {"start": edited.date().isoformat()}},
+                "Excerpt": {"type": "rich_text", "rich_text": [_rich_text(title)]},
+            },
+        }
+        if self.images_per_page and index % 3 == 0:
+            page["cover"] = {
+                "type": "external",
+                "external": {"url": f"https://{FAKE_IMAGE_HOST}/{index}-999.png"},
+            }
+        return page
+
+    def _synthesize_children(self, block_id: str) -> List[Dict[str, Any]]:
+        """按 block ID 确定性地合成子块；ID 形如 page-000001.3.2，段数即深度"""
+        parts = block_id.split(".")
+        level = len(parts) - 1
+        page_index = int(parts[0].split("-")[1])
+        rng = random.Random(f"{self.seed}:{block_id}")
+        count = self.blocks_per_page if level == 0 else rng.randint(1, 4)
+        page = self.page(parts[0])
+        edited = page["last_edited_time"] if page else "2024-01-01T00:00:00.000Z"
+
+        blocks = []
+        for position in range(count):
+            child_id = f"{block_id}.{position}"
+            if level == 0 and position < self.images_per_page:
+                block_type = "image"
+            else:
+                block_type = rng.choice(
+                    ["paragraph", "paragraph", "paragraph", "heading_2", "bulleted_list_item",
+                     "numbered_list_item", "to_do", "code", "equation", "divider", "quote",
+                     "toggle", "callout"]
+                )
+            has_children = level < self.depth and block_type in (
+                "bulleted_list_item", "numbered_list_item", "toggle", "callout"
+            )
+            block = {
+                "object": "block",
+                "id": child_id,
+                "type": block_type,
+                "has_children": has_children,
+                "last_edited_time": edited,
+            }
+            if block_type == "image":
+                block["image"] = {
+                    "type": "external",
+                    "external": {"url": f"https://{FAKE_IMAGE_HOST}/{page_index}-{position}.png"},
+                    "caption": [],
+                }
+            elif block_type == "equation":
+                block["equation"] = {"expression": "e^{i\\pi} + 1 = 0"}
+            elif block_type == "divider":
+                block["divider"] = {}
+            elif block_type == "code":
+                block["code"] = {
+                    "rich_text": [_rich_text("print('hello')\n" * rng.randint(1, 5))],
+                    "language": "python",
+                }
+            else:
+                words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40)))
+                block[block_type] = {
+                    "rich_text": [
+                        _rich_text(words),
+                        _rich_text(" bold", bold=True),
+                        _rich_text(" code", code=True),
+                    ]
+                }
+            blocks.append(block)
+        return blocks
+
+
+class FakeNotionTransport(httpx.AsyncBaseTransport):
+    """模拟 Notion API 和图片服务器的 httpx 传输层"""
+
+    def __init__(
+        self,
+        workspace: FakeWorkspace,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: Optional[float] = None,
+        rate_limit_probability: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            latency: 每个请求的固定延迟（秒）
+            jitter: 在固定延迟上附加的随机延迟上限（秒）
+            rate_limit: 每秒允许的请求数，超出时返回 429
+            rate_limit_probability: 随机返回 429 的概率
+            retry_after: 429 响应的 Retry-After（秒）
+        """
+        self.workspace = workspace
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.bytes_sent = 0
+        self._window: List[float] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+
+        if request.url.host == FAKE_IMAGE_HOST:
+            self.requests["image"] += 1
+            data = self.workspace.image(request.url.path.lstrip("/"))
+            if data is None:
+                return httpx.Response(404, request=request)
+            self.bytes_sent += len(data)
+            return httpx.Response(
+                200,
+                content=data,
+                headers={"content-type": "image/png", "content-length": str(len(data))},
+                request=request,
+            )
+
+        if self._throttled():
+            self.requests["429"] += 1
+            return self._error(
+                request, 429, "rate_limited", "You have been rate limited.",
+                headers={"retry-after": str(self.retry_after)},
+            )
+
+        path = request.url.path
+        body = json.loads(request.content) if request.content else {}
+
+        if path == "/v1/search":
+            self.requests["search"] += 1
+            return self._paginate(request, self._query_pages(body), body)
+
+        match = QUERY_PATH.match(path)
+        if match:
+            self.requests["query"] += 1
+            database_id = self.workspace.database_id
+            if database_id and match.group(1) != database_id:
+                return self._error(request, 404, "object_not_found", "Database not found.")
+            return self._paginate(request, self._query_pages(body), body)
+
+        match = BLOCKS_PATH.match(path)
+        if match:
+            self.requests["blocks"] += 1
+            children = self.workspace.children(match.group(1))
+            if children is None:
+                return self._error(request, 404, "object_not_found", "Block not found.")
+            return self._paginate(request, children, dict(request.url.params))
+
+        match = PAGES_PATH.match(path)
+        if match:
+            self.requests["pages"] += 1
+            page = self.workspace.page(match.group(1))
+            if page is None:
+                return self._error(request, 404, "object_not_found", "Page not found.")
+            return self._json(request, page)
+
+        return self._error(request, 400, "invalid_request_url", f"Unsupported path {path}")
+
+    def _throttled(self) -> bool:
+        if self.rate_limit_probability and self.rng.random() < self.rate_limit_probability:
+            return True
+        if self.rate_limit:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate_limit:
+                return True
+            self._window.append(now)
+        return False
+
+    def _query_pages(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        query_filter = body.get("filter")
+        return [page for page in self.workspace.pages if self._matches(page, query_filter)]
+
+    def _matches(self, page: Dict[str, Any], condition: Optional[Dict[str, Any]]) -> bool:
+        """支持 and / or、select equals、rich_text equals 和 last_edited_time 过滤"""
+        if not condition:
+            return True
+        if "and" in condition:
+            return all(self._matches(page, c) for c in condition["and"])
+        if "or" in condition:
+            return any(self._matches(page, c) for c in condition["or"])
+        if condition.get("property") == "object":
+            return True
+        if condition.get("timestamp") == "last_edited_time":
+            edited: Dict[str, str] = condition["last_edited_time"]
+            page_edited: str = page["last_edited_time"]
+            if "on_or_after" in edited:
+                return page_edited >= edited["on_or_after"]
+            if "after" in edited:
+                return page_edited > edited["after"]
+            return True
+
+        prop = page["properties"].get(condition.get("property"), {})
+        if "select" in condition:
+            value = (prop.get("select") or {}).get("name")
+            return bool(value == condition["select"].get("equals"))
+        if "rich_text" in condition:
+            value = "".join(item["plain_text"] for item in prop.get("rich_text", []))
+            return bool(value == condition["rich_text"].get("equals"))
+        return True
+
+    def _paginate(self, request: httpx.Request, items: List[Any], params: Dict[str, Any]) -> httpx.Response:
+        page_size = min(int(params.get("page_size") or 100), 100)
+        start = int(params.get("start_cursor") or 0)
+        end = start + page_size
+        has_more = end < len(items)
+        return self._json(request, {
+            "object": "list",
+            "results": items[start:end],
+            "has_more": has_more,
+            "next_cursor": str(end) if has_more else None,
+        })
+
+    def _json(self, request: httpx.Request, data: Any) -> httpx.Response:
+        content = json.dumps(data).encode("utf-8")
+        self.bytes_sent += len(content)
+        return httpx.Response(
+            200, content=content, headers={"content-type": "application/json"}, request=request
+        )
+
+    def _error(
+        self,
+        request: httpx.Request,
+        status: int,
+        code: str,
+        message: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        return httpx.Response(
+            status,
+            json={"object": "error", "status": status, "code": code, "message": message},
+            headers=headers,
+            request=request,
+        )
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """包装真实传输层，把 Notion 响应录制为 FakeWorkspace.load 可读取的 fixture"""
+
+    def __init__(self, fixture_dir: Path, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.fixture_dir = Path(fixture_dir)
+        self.inner = inner or httpx.AsyncHTTPTransport()
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.blocks: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        if response.status_code != 200 or "json" not in response.headers.get("content-type", ""):
+            return response
+
+        content = await response.aread()
+        data = json.loads(content)
+        path = request.url.path
+
+        if path == "/v1/search" or QUERY_PATH.match(path):
+            for page in data.get("results", []):
+                self.pages[page["id"]] = page
+        else:
+            match = BLOCKS_PATH.match(path)
+            if match:
+                self.blocks.setdefault(match.group(1), []).extend(data.get("results", []))
+
+        # aread() 返回的是解压后的内容，去掉原响应的压缩和长度头，避免 httpx 再次解压
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    def save(self) -> None:
+        """写出录制结果"""
+        blocks_dir = self.fixture_dir / "blocks"
+        blocks_dir.mkdir(parents=True, exist_ok=True)
+        pages = sorted(self.pages.values(), key=lambda page: page["last_edited_time"], reverse=True)
+        with open(self.fixture_dir / "pages.json", "w", encoding="utf-8") as f:
+            json.dump(pages, f, ensure_ascii=False, indent=2)
+        for block_id, children in self.blocks.items():
+            with open(blocks_dir / f"{block_id}.json", "w", encoding="utf-8") as f:
+                json.dump(children, f, ensure_ascii=False, indent=2)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
@@ -4,23 +4,68 @@ Hugo 内容生成器
 """
 
 import asyncio
+import hashlib
 import httpx
+import os
 import re
-from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Union
 import frontmatter
 from pydantic import BaseModel
 
-from .config import HugoConfig
+from .config import HugoConfig, PipelineConfig
+from .downloader import ImageDownloader
+from .image_config import ImageConfig, ImageNamingStrategy, get_image_config
+from .image_index import ImageIndex
+from .image_optimizer import ImageOptimizer, largest_variant, picture_html
+from .manifest import SyncManifest, content_hash
+from .metrics import SyncMetrics
 from .notion_client import NotionPost, NotionClient
+from .pipeline import Pipeline, StageStats
+from .related import RelatedPosts
+from .search_index import SearchIndex, blocks_text
+
+
+# 匹配内容中引用的本地图片（Markdown 图片语法以及 <picture> 的 src/srcset）
+LOCAL_IMAGE_PATTERN = re.compile(r'/images/([^\s"\'(),]+)')
+
+
+class PostJob:
+    """流水线中单篇文章的处理状态"""
+    
+    __slots__ = ("post", "blocks", "content", "text", "math", "cover_path", "failed_assets")
+    
+    def __init__(self, post: NotionPost):
+        self.post = post
+        self.blocks: Optional[List[Dict[str, Any]]] = None
+        self.content = ""
+        # 正文纯文本，用于搜索索引
+        self.text = ""
+        self.math = False
+        self.cover_path: Optional[str] = None
+        # 下载失败的图片 URL（文章中仍是会过期的远程地址，下次同步需要重试）
+        self.failed_assets: List[str] = []
+    
+    def __repr__(self) -> str:
+        return self.post.title
 
 
 class HugoGenerator:
     """Hugo 内容生成器"""
     
-    def __init__(self, config: HugoConfig):
+    def __init__(
+        self,
+        config: HugoConfig,
+        offline: bool = False,
+        image_config: Optional[ImageConfig] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        metrics: Optional[SyncMetrics] = None,
+    ):
         self.config = config
+        self.metrics = metrics or SyncMetrics()
+        self.image_config = image_config or get_image_config()
+        # 离线模式下不下载新图片，只使用本地已有的图片
+        self.offline = offline
         
         # 确保目录存在
         self.config.content_dir.mkdir(parents=True, exist_ok=True)
@@ -29,76 +74,236 @@ class HugoGenerator:
         self.static_dir = Path(self.config.static_dir)
         self.images_dir = Path(self.config.images_dir)
         
-        self.http_client = httpx.AsyncClient()
+        # 同步清单，用于增量同步
+        self.manifest = SyncManifest.load(self.config.manifest_path)
+        # 图片索引，每次运行只加载一次
+        self.image_index = ImageIndex.load(self.config.image_index_path, self.images_dir)
+        self.optimizer = ImageOptimizer(self.images_dir, self.image_config, self.image_index)
+        # 搜索索引，只重写变化文章涉及的分片
+        self.search_index = SearchIndex.load(
+            self.config.search_state_path, self.config.search_dir, self.config.search_shards
+        )
+        # 相关文章，搜索索引变化时重新计算
+        self.related = RelatedPosts(self.config.related_path, self.config.related_count)
+        if self.image_config.optimize_images and not self.optimizer.enabled:
+            print("警告: 未安装 Pillow，跳过图片优化")
+            print("请运行: pip install -e .[images]")
+        if self.config.related_path and not self.related.enabled:
+            print("警告: 未安装 NumPy，跳过相关文章计算")
+            print("请运行: pip install -e .[related]")
+        
+        self.http_client = http_client or httpx.AsyncClient()
+        self.downloader = ImageDownloader(
+            self.http_client,
+            self.images_dir,
+            max_bytes=self.image_config.max_image_bytes,
+            concurrency=self.image_config.download_concurrency,
+        )
+        # 最近一次流水线各阶段的统计
+        self.pipeline_stats: List[StageStats] = []
+        # 最近一次生成中处理失败或有图片下载失败、需要在下次同步时重试的文章
+        self.retry_posts: List[NotionPost] = []
+        # 正在下载中的图片（文件 ID -> 任务），避免多篇文章重复下载同一张图片
+        self._pending_images: Dict[str, asyncio.Task] = {}
     
-    async def generate_posts(self, posts: List[NotionPost], notion_client: NotionClient) -> int:
-        """生成 Hugo 文章"""
-        generated_count = 0
+    async def generate_posts(
+        self,
+        posts: Union[Iterable[NotionPost], AsyncIterable[NotionPost]],
+        notion_client: NotionClient,
+        pipeline_config: Optional[PipelineConfig] = None,
+    ) -> int:
+        """生成 Hugo 文章
         
-        print(f"开始生成 {len(posts)} 篇文章...")
+        文章依次经过 获取 block → 渲染 Markdown → 处理图片 → 写入文件 四个阶段，
+        阶段之间由有界队列连接，可以边列出文章边处理
+        """
+        print("开始生成文章...")
         
-        for i, post in enumerate(posts, 1):
-            try:
-                print(f"处理第 {i}/{len(posts)} 篇: {post.title}")
-                
-                # 获取文章内容
-                content = await notion_client.get_page_content(post.id)
-                
-                # 生成文件
-                await self._generate_post_file(post, content)
-                generated_count += 1
-                
-            except Exception as e:
-                print(f"[ERROR] 生成失败 {post.title}: {e}")
+        pipeline = self.build_pipeline(notion_client, pipeline_config or PipelineConfig())
+        jobs: List[PostJob] = []
+        results = await pipeline.run(self._iter_jobs(posts, jobs))
+        self.pipeline_stats = pipeline.stats
+        generated_count = len(results)
+        
+        # 没有走完流水线（某个阶段失败）或有图片下载失败的文章
+        written = {id(job) for job in results}
+        self.retry_posts = [job.post for job in jobs if id(job) not in written or job.failed_assets]
         
         print(f"文章生成完成，共 {generated_count} 篇")
-        await self.http_client.aclose()
+        self.manifest.save()
+        self.image_index.save()
+        self.save_search_index()
         return generated_count
+    
+    def build_pipeline(self, notion_client: NotionClient, config: PipelineConfig) -> Pipeline:
+        """构建文章生成流水线"""
+        
+        async def fetch(job: PostJob) -> PostJob:
+            print(f"处理: {job.post.title}")
+            job.blocks = await notion_client.get_block_tree(job.post.id, job.post.last_edited_time)
+            return job
+        
+        async def render(job: PostJob) -> PostJob:
+            blocks = job.blocks or []
+            job.content, job.math = notion_client.renderer.render_page(blocks)
+            job.text = blocks_text(blocks)
+            job.blocks = None
+            return job
+        
+        async def write(job: PostJob) -> PostJob:
+            self._write_post(job)
+            return job
+        
+        def timed(
+            stage: str, func: Callable[[PostJob], Awaitable[PostJob]]
+        ) -> Callable[[PostJob], Awaitable[PostJob]]:
+            """记录每篇文章在各阶段的耗时"""
+            async def run(job: PostJob) -> PostJob:
+                with self.metrics.post_timer(job.post.id, job.post.slug, stage):
+                    return await func(job)
+            return run
         
+        return (
+            Pipeline("generate")
+            .add_stage("fetch", timed("fetch", fetch), config.fetch_workers or notion_client.config.concurrency, config.queue_size)
+            .add_stage("render", timed("render", render), config.render_workers, config.queue_size)
+            .add_stage("assets", timed("assets", self._fetch_assets), config.asset_workers, config.queue_size)
+            .add_stage("write", timed("write", write), config.write_workers, config.queue_size)
+        )
+    
+    async def _iter_jobs(
+        self, posts: Union[Iterable[NotionPost], AsyncIterable[NotionPost]], jobs: List[PostJob]
+    ) -> AsyncIterator[PostJob]:
+        """将文章列表（或异步迭代器）转换为流水线任务，创建的任务同时追加到 jobs"""
+        if isinstance(posts, AsyncIterable):
+            async for post in posts:
+                jobs.append(PostJob(post))
+                yield jobs[-1]
+        else:
+            for post in posts:
+                jobs.append(PostJob(post))
+                yield jobs[-1]
+    
+    async def aclose(self) -> None:
+        """关闭图片下载使用的 HTTP 连接池和图片优化进程池"""
+        await self.http_client.aclose()
+        self.optimizer.shutdown()
+    
     async def _download_cover_image(self, image_url: str, post_slug: str) -> str:
-        """Download cover image and return relative path"""
+        """下载封面图片并返回相对路径（与正文图片共用去重逻辑），有优化版本时使用最宽的版本"""
+        filename = await self._fetch_image(image_url, post_slug)
+        with self.metrics.timer("image.optimize"):
+            variant = largest_variant(await self.optimizer.optimize(filename))
+        if variant:
+            return f"/images/{variant.filename}"
+        return f"/images/{filename}"
+    
+    async def _fetch_image(self, image_url: str, post_slug: str) -> str:
+        """获取图片的本地文件名，已存在时直接复用，否则下载"""
+        # 从 Notion URL 中提取稳定的文件 ID
+        image_id = self._extract_notion_image_id(image_url)
+        
+        # 检查图片是否已存在（基于文件 ID，并校验文件大小）
+        existing_file = self._find_existing_image(image_id)
+        if existing_file:
+            print(f"[OK] 使用已存在的图片: {existing_file.name}")
+            self._record_reused_image(existing_file.name)
+            return existing_file.name
+        
+        if self.offline:
+            raise FileNotFoundError(f"离线模式下找不到图片 {image_url}")
+        
+        # 同一张图片只下载一次
+        task = self._pending_images.get(image_id)
+        if task is None:
+            task = asyncio.ensure_future(self._download_image(image_url, image_id, post_slug))
+            self._pending_images[image_id] = task
+            task.add_done_callback(lambda _: self._pending_images.pop(image_id, None))
+        return await asyncio.shield(task)
+    
+    async def _download_image(self, image_url: str, image_id: str, post_slug: str) -> str:
+        """流式下载图片并原子地保存到图片目录"""
+        with self.metrics.timer("image.download"):
+            downloaded = await self.downloader.download(image_url)
+        self.metrics.incr("images_downloaded")
+        self.metrics.incr("image_bytes_downloaded", downloaded.size)
         try:
-            # Extract image ID for consistent naming
-            image_id = self._extract_notion_image_id(image_url)
-            if not image_id:
-                image_id = str(hash(image_url))
+            # 内容相同的图片（例如在多篇文章中使用或重新上传）只保存一份
+            if self.image_config.naming_strategy == ImageNamingStrategy.CONTENT_HASH:
+                existing = self.image_index.find_by_hash(downloaded.sha256)
+                if existing:
+                    downloaded.discard()
+                    self.metrics.incr("images_deduplicated")
+                    self.image_index.link(image_id, existing)
+                    print(f"[OK] 图片内容与已有文件相同: {existing}")
+                    return existing
             
-            # Get file extension from URL or content type
-            ext = ".jpg"  # default
-            if "." in image_url:
-                url_ext = image_url.split(".")[-1].lower()
-                if url_ext in ["jpg", "jpeg", "png", "gif", "webp"]:
-                    ext = f".{url_ext}"
-            
-            # Download image
-            filename = f"{post_slug}-{image_id}{ext}"
-            local_path = self.images_dir / filename
-            
-            async with self.http_client.stream("GET", image_url) as response:
-                response.raise_for_status()
-                with open(local_path, "wb") as f:
-                    async for chunk in response.aiter_bytes():
-                        f.write(chunk)
-            
-            return f"/images/{filename}"
-        except Exception as e:
-            print(f"[ERROR] Failed to download cover image: {e}")
+            ext = self._guess_image_ext(downloaded.content_type, image_url)
+            filename = self._image_filename(post_slug, image_id, downloaded.sha256, ext)
+            downloaded.commit(self.images_dir / filename)
+        except BaseException:
+            downloaded.discard()
             raise
-
-    async def _generate_post_file(self, post: NotionPost, content: str):
-        """生成单篇文章"""
+        
+        self.image_index.add(image_id, filename, size=downloaded.size, sha256=downloaded.sha256)
+        return filename
+    
+    def _record_reused_image(self, filename: str) -> None:
+        """记录复用的本地图片"""
+        record = self.image_index.files.get(filename)
+        self.metrics.incr("images_reused")
+        if record and record.size:
+            self.metrics.incr("image_bytes_reused", record.size)
+    
+    def _image_filename(self, post_slug: str, image_id: str, sha256: str, ext: str) -> str:
+        """按命名策略生成本地文件名"""
+        if self.image_config.naming_strategy == ImageNamingStrategy.CONTENT_HASH:
+            return f"{sha256[:self.image_config.content_hash_length]}{ext}"
+        
+        # 生成本地文件名：post_slug-image_id.ext
+        return self.image_config.filename_template.format(
+            post_slug=post_slug, identifier=image_id, ext=ext
+        )
+    
+    def _guess_image_ext(self, content_type: str, image_url: str) -> str:
+        """根据 content-type（其次是 URL）确定图片扩展名"""
+        if "jpeg" in content_type or "jpg" in content_type:
+            return ".jpg"
+        elif "png" in content_type:
+            return ".png"
+        elif "gif" in content_type:
+            return ".gif"
+        elif "webp" in content_type:
+            return ".webp"
+        
+        url_ext = Path(image_url.split("?")[0]).suffix.lower()
+        if url_ext in [".jpg", ".jpeg", ".png", ".gif", ".webp"]:
+            return url_ext
+        return ".jpg"  # 默认扩展名
+    
+    async def _fetch_assets(self, job: PostJob) -> PostJob:
+        """下载文章正文和封面中的图片"""
+        post = job.post
+        
         # 处理内容中的图片
-        processed_content = await self._process_images(content, post.slug)
-
-        cover_path = None
+        job.content = await self._process_images(job.content, post.slug, job.failed_assets)
+        
         if post.cover_url:
             try:
-                cover_path = await self._download_cover_image(post.cover_url, post.slug)
+                job.cover_path = await self._download_cover_image(post.cover_url, post.slug)
             except Exception as e:
                 print(f"[WARNING] Failed to download cover image: {e}")
+                job.failed_assets.append(post.cover_url)
+        
+        return job
+    
+    def _write_post(self, job: PostJob) -> None:
+        """生成单篇文章"""
+        post = job.post
+        images = LOCAL_IMAGE_PATTERN.findall(job.content)
         
         # 创建 front matter
-        front_matter = {
+        front_matter: Dict[str, Any] = {
             "title": post.title,
             "date": post.date,
             "lastmod": post.last_edited_time.split("T")[0],
@@ -111,11 +316,16 @@ class HugoGenerator:
             "type": post.post_type,
         }
 
-        if cover_path:
-            front_matter["image"] = cover_path
+        if job.cover_path:
+            front_matter["image"] = job.cover_path
+            images.extend(LOCAL_IMAGE_PATTERN.findall(job.cover_path))
+        
+        # 包含公式的文章在页面上加载 KaTeX
+        if job.math:
+            front_matter["math"] = True
         
         # 创建 post 对象
-        post_obj = frontmatter.Post(processed_content, **front_matter)
+        post_obj = frontmatter.Post(job.content, **front_matter)
         
         # 根据文章类型选择目录
         if post.is_page():
@@ -125,18 +335,55 @@ class HugoGenerator:
             # Post 类型放在 posts 目录下
             filepath = self.config.content_dir / f"{post.slug}.md"
         
-        # 写入文件
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(frontmatter.dumps(post_obj))
+        # 内容有变化时才写入文件，保持未变文件的 mtime
+        text = frontmatter.dumps(post_obj)
+        if self._write_if_changed(post, filepath, text):
+            self.metrics.incr("files_written")
+            print(f"[OK] 生成文章: {filepath.name}")
+        else:
+            self.metrics.incr("files_unchanged")
+            print(f"[OK] 文章无变化: {filepath.name}")
+        
+        # slug 或类型变化时删除旧文件
+        entry = self.manifest.get(post.id)
+        if entry and Path(entry.path) != filepath:
+            self._remove_post_file(Path(entry.path))
         
-        print(f"[OK] 生成文章: {filepath.name}")
+        # 有图片下载失败时记录为过期，下次同步重新生成这篇文章
+        if job.failed_assets:
+            print(f"[WARNING] {len(job.failed_assets)} 张图片下载失败，下次同步将重试: {filepath.name}")
+        self.manifest.record(post, filepath, text, images, stale=bool(job.failed_assets))
+        self.search_index.update(post, job.text)
     
-    async def _process_images(self, content: str, post_slug: str) -> str:
-        """处理文章中的图片"""
+    def _write_if_changed(self, post: NotionPost, filepath: Path, text: str) -> bool:
+        """内容与现有文件不同时原子写入，返回是否写入"""
+        data = text.encode("utf-8")
+        
+        if filepath.exists():
+            # 先用同步清单中的哈希判断，避免读取文件
+            entry = self.manifest.get(post.id)
+            if (
+                entry
+                and Path(entry.path) == filepath
+                and entry.content_hash == content_hash(text)
+                and filepath.stat().st_size == len(data)
+            ):
+                return False
+            if filepath.read_bytes() == data:
+                return False
+        
+        tmp_path = filepath.with_name(f".{filepath.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+        return True
+    
+    async def _process_images(self, content: str, post_slug: str, failures: Optional[List[str]] = None) -> str:
+        """处理文章中的图片，下载失败的图片 URL 追加到 failures"""
         # 匹配 Markdown 图片语法
         image_pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
         
-        async def download_and_replace(match):
+        async def download_and_replace(match: re.Match[str]) -> str:
             alt_text = match.group(1)
             image_url = match.group(2)
             
@@ -145,40 +392,13 @@ class HugoGenerator:
                 return match.group(0)
             
             try:
-                # 从 Notion URL 中提取稳定的文件 ID
-                image_id = self._extract_notion_image_id(image_url)
-                
-                # 检查图片是否已存在（基于文件 ID）
-                existing_file = self._find_existing_image(image_id)
-                if existing_file:
-                    relative_path = f"/images/{existing_file.name}"
-                    print(f"[OK] 使用已存在的图片: {existing_file.name}")
-                    return f"![{alt_text}]({relative_path})"
-                
-                # 下载图片
-                response = await self.http_client.get(image_url)
-                response.raise_for_status()
-                
-                # 获取文件扩展名
-                content_type = response.headers.get("content-type", "")
-                if "jpeg" in content_type or "jpg" in content_type:
-                    ext = ".jpg"
-                elif "png" in content_type:
-                    ext = ".png"
-                elif "gif" in content_type:
-                    ext = ".gif"
-                elif "webp" in content_type:
-                    ext = ".webp"
-                else:
-                    ext = ".jpg"  # 默认扩展名
+                filename = await self._fetch_image(image_url, post_slug)
                 
-                # 生成本地文件名：post_slug-image_id.ext
-                filename = f"{post_slug}-{image_id}{ext}"
-                local_path = self.images_dir / filename
-                
-                # 保存图片
-                with open(local_path, "wb") as f:
-                    f.write(response.content)
+                # 有优化版本时使用带 srcset 的 <picture>
+                with self.metrics.timer("image.optimize"):
+                    variants = await self.optimizer.optimize(filename)
+                if variants:
+                    return picture_html(alt_text, filename, variants, self.image_config.variant_sizes)
                 
                 # 返回新的 Markdown 语法
                 relative_path = f"/images/{filename}"
@@ -186,6 +406,8 @@ class HugoGenerator:
                 
             except Exception as e:
                 print(f"[WARNING] 下载图片失败 {image_url}: {e}")
+                if failures is not None:
+                    failures.append(image_url)
                 return match.group(0)
         
         # 使用异步处理所有图片
@@ -202,9 +424,7 @@ class HugoGenerator:
         return content
     
     def _extract_notion_image_id(self, image_url: str) -> str:
-        """从 Notion 图片 URL 中提取稳定的文件 ID"""
-        import hashlib
-        
+        """从 Notion 图片 URL 中提取稳定的文件 ID（完整长度，避免截断后冲突）"""
         # Notion 图片 URL 格式通常为：
         # https://prod-files-secure.s3.us-west-2.amazonaws.com/USER_ID/FILE_ID/IMAGE_ID/file_name?expires=...
         # 或者
@@ -217,7 +437,7 @@ class HugoGenerator:
                 parts = image_url.split("/f/")
                 if len(parts) > 1:
                     file_id = parts[1].split("/")[0]
-                    return file_id[:8]  # 取前8位
+                    return file_id
             
             elif "s3.amazonaws.com" in image_url:
                 # 格式：https://prod-files-secure.s3.us-west-2.amazonaws.com/USER_ID/FILE_ID/...
@@ -229,7 +449,7 @@ class HugoGenerator:
                         if "amazonaws.com" in part and i + 2 < len(parts):
                             file_id = parts[i + 2]  # USER_ID 后面的段是 FILE_ID
                             if len(file_id) >= 8:
-                                return file_id[:8]
+                                return file_id
                 except (ValueError, IndexError):
                     pass
                 
@@ -237,7 +457,7 @@ class HugoGenerator:
                 for part in parts:
                     # 查找看起来像文件 ID 的段（包含字母数字，长度合适）
                     if len(part) >= 8 and any(c.isalpha() for c in part) and any(c.isdigit() for c in part):
-                        return part[:8]
+                        return part
             
             # 方法2：如果无法提取文件 ID，使用 URL 的稳定部分生成哈希
             # 移除查询参数（包含时间戳和签名）
@@ -246,32 +466,85 @@ class HugoGenerator:
             stable_url = re.sub(r'/[^/]*expires[^/]*', '', stable_url)
             
             # 生成稳定哈希
-            return hashlib.md5(stable_url.encode()).hexdigest()[:8]
+            return hashlib.md5(stable_url.encode()).hexdigest()
             
         except Exception:
             # 如果所有方法都失败，使用完整的 URL 哈希
-            return hashlib.md5(image_url.encode()).hexdigest()[:8]
+            return hashlib.md5(image_url.encode()).hexdigest()
     
     def _find_existing_image(self, image_id: str) -> Optional[Path]:
         """查找是否已存在相同 ID 的图片"""
-        if not self.images_dir.exists():
-            return None
+        filename = self.image_index.find_by_id(image_id)
+        return self.images_dir / filename if filename else None
+    
+    def save_search_index(self) -> None:
+        """保存搜索索引；索引有变化（或还没有相关文章数据）时重新计算相关文章"""
+        if self.related.enabled and (self.search_index.changed or not self.related.exists()):
+            try:
+                self.related.write(self.search_index.documents, self._post_paths())
+            except Exception as e:
+                print(f"[ERROR] 计算相关文章失败: {e}")
+        self.search_index.save()
+    
+    def _post_paths(self) -> Dict[str, str]:
+        """文章（不含 Page 类型）在 Hugo 中的路径，如 /posts/slug"""
+        content_dir = self.config.content_dir.resolve()
+        pages_dir = self.config.pages_dir.resolve()
+        paths = {}
+        for notion_id, entry in self.manifest.entries.items():
+            filepath = Path(entry.path).resolve()
+            if filepath.parent == content_dir:
+                paths[notion_id] = "/" + filepath.relative_to(pages_dir).with_suffix("").as_posix()
+        return paths
+    
+    def clean_old_posts(self, current_posts: List[NotionPost]) -> None:
+        """清理不再存在的文章（根据同步清单计算，不读取文章文件）"""
+        if not self.manifest.entries:
+            # 还没有同步清单时（首次运行）退回到扫描文章目录
+            self._clean_untracked_posts(current_posts)
+            return
+        
+        self.remove_missing_posts({post.id for post in current_posts})
+    
+    def remove_missing_posts(self, current_ids: set) -> None:
+        """删除同步清单中不在 current_ids 里的文章"""
+        removed_ids = set(self.manifest.entries) - current_ids
         
-        # 查找所有包含该图片 ID 的文件
-        for image_file in self.images_dir.glob(f"*-{image_id}.*"):
-            if image_file.is_file():
-                return image_file
+        for notion_id in removed_ids:
+            entry = self.manifest.remove(notion_id)
+            if entry:
+                self._remove_post_file(Path(entry.path))
+            self.search_index.remove(notion_id)
         
-        return None
+        if removed_ids:
+            self.manifest.save()
+            self.save_search_index()
     
-    def clean_old_posts(self, current_posts: List[NotionPost]):
-        """清理不再存在的文章"""
+    def remove_post(self, notion_id: str) -> bool:
+        """删除单篇文章（页面在 Notion 中被删除或移出数据库时），返回是否删除"""
+        entry = self.manifest.remove(notion_id)
+        if entry is None:
+            return False
+        self._remove_post_file(Path(entry.path))
+        self.search_index.remove(notion_id)
+        self.manifest.save()
+        self.save_search_index()
+        return True
+    
+    def _remove_post_file(self, filepath: Path) -> None:
+        """删除文章文件"""
+        try:
+            filepath.unlink(missing_ok=True)
+            self.metrics.incr("files_removed")
+            print(f"[WARNING] 删除旧文章: {filepath.name}")
+        except Exception as e:
+            print(f"[ERROR] 删除文章失败 {filepath}: {e}")
+    
+    def _clean_untracked_posts(self, current_posts: List[NotionPost]) -> None:
+        """扫描文章目录，删除不在当前文章列表中的文件"""
         current_slugs = {post.slug for post in current_posts}
         
-        # 扫描现有文件
-        existing_files = list(self.config.content_dir.glob("*.md"))
-        
-        for filepath in existing_files:
+        for filepath in self.config.content_dir.glob("*.md"):
             try:
                 # 读取文件获取 slug
                 with open(filepath, "r", encoding="utf-8") as f:
@@ -280,54 +553,39 @@ class HugoGenerator:
                 
                 # 如果文章不在当前列表中，删除文件
                 if slug and slug not in current_slugs:
-                    filepath.unlink()
-                    print(f"[WARNING] 删除旧文章: {filepath.name}")
+                    self._remove_post_file(filepath)
                     
             except Exception as e:
                 print(f"[ERROR] 处理文件失败 {filepath}: {e}")
     
-    def clean_unused_images(self, current_posts: List[NotionPost]):
-        """清理无用的图片文件"""
-        if not self.images_dir.exists():
-            return
-        
-        # 获取所有当前文章中使用的图片
-        used_images = set()
-        for post in current_posts:
-            try:
-                # 读取文章内容
-                post_file = self.config.content_dir / f"{post.slug}.md"
-                if post_file.exists():
-                    with open(post_file, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        # 提取图片路径
-                        import re
-                        image_matches = re.findall(r'!\[([^\]]*)\]\(/images/([^)]+)\)', content)
-                        used_images.update(image_matches)
-            except Exception as e:
-                print(f"[ERROR] 读取文章 {post.slug} 失败: {e}")
+    def clean_unused_images(self) -> None:
+        """清理无用的图片文件（根据同步清单中的图片引用计数计算）"""
+        used_images = self.manifest.referenced_images()
         
-        # 扫描所有图片文件
-        all_images = set()
-        for image_file in self.images_dir.glob("*.*"):
-            if image_file.is_file() and image_file.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-                all_images.add(image_file.name)
+        # 源图片或任一优化版本被引用时保留源图片和全部优化版本：
+        # 封面只引用最宽的版本，删除其余版本会在下次同步时重新生成、再次被清理
+        for source, variants in self.image_index.variants.items():
+            filenames = {variant["filename"] for variant in variants}
+            if source in used_images or filenames & used_images:
+                used_images.add(source)
+                used_images |= filenames
         
-        # 删除未使用的图片
-        unused_images = all_images - used_images
+        unused_images = set(self.image_index.files) - used_images
         for image_name in unused_images:
             try:
-                (self.images_dir / image_name).unlink()
+                (self.images_dir / image_name).unlink(missing_ok=True)
                 print(f"[OK] 删除无用图片: {image_name}")
             except Exception as e:
                 print(f"[ERROR] 删除图片失败 {image_name}: {e}")
         
+        self.image_index.remove_many(unused_images)
+        self.image_index.save()
         if unused_images:
             print(f"[OK] 清理完成，删除了 {len(unused_images)} 个无用图片")
         else:
             print("[OK] 没有无用图片需要清理")
     
-    def generate_index(self):
+    def generate_index(self) -> None:
         """生成首页（可选）"""
         index_content = """---
 title: "我的博客"
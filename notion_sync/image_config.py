@@ -3,13 +3,14 @@
 """
 
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
 class ImageNamingStrategy(str, Enum):
     """图片命名策略"""
     HASH = "hash"          # 基于URL哈希
+    CONTENT_HASH = "content_hash"  # 基于图片内容的 sha256，相同内容只保存一份
     TIMESTAMP = "timestamp" # 基于时间戳
     SEQUENTIAL = "sequential" # 基于序号
 
@@ -18,11 +19,14 @@ class ImageConfig(BaseModel):
     """图片处理配置"""
     
     # 命名策略
-    naming_strategy: ImageNamingStrategy = ImageNamingStrategy.HASH
+    naming_strategy: ImageNamingStrategy = ImageNamingStrategy.CONTENT_HASH
     
     # 哈希长度（当使用hash策略时）
     hash_length: int = 8
     
+    # 内容哈希长度（当使用content_hash策略时）
+    content_hash_length: int = 16
+    
     # 是否启用重复检查
     enable_duplicate_check: bool = True
     
@@ -37,6 +41,30 @@ class ImageConfig(BaseModel):
     
     # 图片文件名模板
     filename_template: str = "{post_slug}-{identifier}{ext}"
+    
+    # 单张图片的最大字节数，超过时放弃下载
+    max_image_bytes: int = 20 * 1024 * 1024
+    
+    # 所有文章共享的同时下载数
+    download_concurrency: int = 8
+    
+    # 是否生成优化版本（需要安装 Pillow: pip install -e .[images]）
+    optimize_images: bool = True
+    
+    # 优化版本的宽度（像素），不会放大原图
+    variant_widths: List[int] = [640, 1280, 1920]
+    
+    # 优化版本的格式，可加入 "avif"
+    variant_formats: List[str] = ["webp"]
+    
+    # 优化版本的编码质量
+    variant_quality: int = 80
+    
+    # 优化进程数，为空时使用 CPU 核数
+    optimize_workers: Optional[int] = None
+    
+    # <picture> 标签的 sizes 属性
+    variant_sizes: str = "(max-width: 768px) 100vw, 768px"
 
 
 # 默认配置
@@ -0,0 +1,165 @@
+"""
+图片索引模块
+记录 Notion 文件 ID / 内容哈希与本地图片文件名的对应关系，
+每次运行只加载一次，替代逐张图片扫描目录
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+
+# 旧版文件名为 {post_slug}-{image_id[:8]}{ext}
+LEGACY_ID_LENGTH = 8
+LEGACY_PREFIX = "legacy:"
+
+
+class ImageRecord(BaseModel):
+    """本地图片文件的记录"""
+    filename: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+
+
+class ImageIndex:
+    """图片索引（文件 ID / 内容哈希 -> 本地文件名）"""
+
+    VERSION = 1
+
+    def __init__(self, path: Path, images_dir: Path):
+        self.path = Path(path)
+        self.images_dir = Path(images_dir)
+        self.by_id: Dict[str, str] = {}
+        self.by_hash: Dict[str, str] = {}
+        self.files: Dict[str, ImageRecord] = {}
+        # 源图片文件名 -> 优化版本列表
+        self.variants: Dict[str, List[Dict]] = {}
+
+    @classmethod
+    def load(cls, path: Path, images_dir: Path) -> "ImageIndex":
+        """加载索引；索引不存在时扫描一次图片目录建立索引"""
+        index = cls(path, images_dir)
+        path = Path(path)
+
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == cls.VERSION:
+                    index.by_id = data.get("ids", {})
+                    index.by_hash = data.get("hashes", {})
+                    index.variants = data.get("variants", {})
+                    index.files = {
+                        name: ImageRecord(**record)
+                        for name, record in data.get("files", {}).items()
+                    }
+                    return index
+            except Exception as e:
+                print(f"[WARNING] 读取图片索引失败，将重新扫描图片目录: {e}")
+
+        index.scan()
+        return index
+
+    def scan(self) -> None:
+        """扫描图片目录，登记已有文件（兼容旧版 8 位 ID 的文件名）"""
+        if not self.images_dir.exists():
+            return
+
+        for image_file in self.images_dir.iterdir():
+            if not image_file.is_file() or image_file.name.startswith("."):
+                continue
+            self.files.setdefault(
+                image_file.name,
+                ImageRecord(filename=image_file.name, size=image_file.stat().st_size),
+            )
+            legacy_id = image_file.stem.rsplit("-", 1)[-1]
+            if len(legacy_id) == LEGACY_ID_LENGTH:
+                self.by_id.setdefault(LEGACY_PREFIX + legacy_id, image_file.name)
+
+    def save(self) -> None:
+        """原子写入索引文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "ids": dict(sorted(self.by_id.items())),
+            "hashes": dict(sorted(self.by_hash.items())),
+            "files": {
+                name: record.model_dump(exclude_none=True)
+                for name, record in sorted(self.files.items())
+            },
+            "variants": dict(sorted(self.variants.items())),
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _existing(self, filename: Optional[str]) -> Optional[str]:
+        """文件仍存在且大小与记录一致时返回文件名"""
+        if not filename:
+            return None
+        record = self.files.get(filename)
+        if record is None:
+            return None
+
+        try:
+            size = (self.images_dir / filename).stat().st_size
+        except OSError:
+            return None
+        if record.size is not None and record.size != size:
+            print(f"[WARNING] 图片大小与索引不一致，将重新下载: {filename}")
+            return None
+        return filename
+
+    def find_by_id(self, image_id: str) -> Optional[str]:
+        """按 Notion 文件 ID 查找本地文件"""
+        filename = self._existing(self.by_id.get(image_id))
+        if filename:
+            return filename
+
+        # 兼容旧版截断 ID 的文件，命中后登记完整 ID
+        filename = self._existing(self.by_id.get(LEGACY_PREFIX + image_id[:LEGACY_ID_LENGTH]))
+        if filename:
+            self.link(image_id, filename)
+        return filename
+
+    def find_by_hash(self, sha256: str) -> Optional[str]:
+        """按内容哈希查找本地文件"""
+        return self._existing(self.by_hash.get(sha256))
+
+    def link(self, image_id: str, filename: str) -> None:
+        """把 Notion 文件 ID 指向已登记的文件（内容相同的图片共用一个文件）"""
+        self.by_id[image_id] = filename
+
+    def add(self, image_id: Optional[str], filename: str, size: Optional[int] = None, sha256: Optional[str] = None) -> None:
+        """登记一个本地图片文件"""
+        self.files[filename] = ImageRecord(filename=filename, size=size, sha256=sha256)
+        if image_id:
+            self.by_id[image_id] = filename
+        if sha256:
+            self.by_hash[sha256] = filename
+
+    def merge(self, other: "ImageIndex") -> None:
+        """合并另一个索引（分片同步的图片索引）的记录"""
+        self.files.update(other.files)
+        self.by_id.update(other.by_id)
+        self.by_hash.update(other.by_hash)
+        self.variants.update(other.variants)
+
+    def remove(self, filename: str) -> None:
+        """移除一个本地图片文件的所有记录"""
+        self.remove_many({filename})
+
+    def remove_many(self, filenames: set) -> None:
+        """批量移除本地图片文件的所有记录"""
+        if not filenames:
+            return
+
+        for filename in filenames:
+            record = self.files.pop(filename, None)
+            if record and record.sha256 and self.by_hash.get(record.sha256) == filename:
+                del self.by_hash[record.sha256]
+            self.variants.pop(filename, None)
+        self.by_id = {key: name for key, name in self.by_id.items() if name not in filenames}
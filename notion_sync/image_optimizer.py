@@ -0,0 +1,176 @@
+"""
+图片优化模块
+在进程池中为下载的图片生成不同宽度的 WebP / AVIF 版本，用于 srcset
+"""
+
+import asyncio
+import html
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .image_config import ImageConfig
+from .image_index import ImageIndex
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # type: ignore[assignment]
+
+
+# 可以生成优化版本的源图片格式（GIF 可能是动图，保持原样）
+OPTIMIZABLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+
+class ImageVariant(BaseModel):
+    """图片的一个优化版本"""
+    filename: str
+    width: int
+    format: str
+
+
+def _generate_variants(
+    source_path: str,
+    widths: List[int],
+    formats: List[str],
+    quality: int,
+) -> List[Dict]:
+    """生成优化版本（在子进程中执行）"""
+    source = Path(source_path)
+    variants: List[Dict] = []
+
+    with Image.open(source) as opened:
+        opened.load()
+        image: Image.Image = opened
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        # 不放大图片；原图比所有宽度都窄时只转换格式
+        targets = sorted({w for w in widths if w < image.width} | {min(image.width, max(widths))})
+
+        for width in targets:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                filename = f"{source.stem}-{width}w.{fmt}"
+                target = source.with_name(filename)
+                if not target.exists():
+                    # 每个进程使用各自的临时文件，分片同步的多个进程可能同时生成同一张图片
+                    fd, temp_name = tempfile.mkstemp(dir=source.parent, prefix=f".{filename}.", suffix=".part")
+                    os.close(fd)
+                    try:
+                        resized.save(temp_name, format=fmt.upper(), quality=quality)
+                        os.chmod(temp_name, 0o644)
+                        os.replace(temp_name, target)
+                    except BaseException:
+                        Path(temp_name).unlink(missing_ok=True)
+                        raise
+                variants.append({"filename": filename, "width": width, "format": fmt})
+
+    return variants
+
+
+class ImageOptimizer:
+    """图片优化器
+
+    结果按源文件缓存在图片索引中（内容哈希命名时文件名即内容哈希），
+    每张图片只处理一次
+    """
+
+    def __init__(self, images_dir: Path, image_config: ImageConfig, image_index: ImageIndex):
+        self.images_dir = Path(images_dir)
+        self.config = image_config
+        self.image_index = image_index
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.optimize_images and Image is not None
+
+    async def optimize(self, filename: str) -> List[ImageVariant]:
+        """返回图片的优化版本，必要时在进程池中生成"""
+        if not self.enabled or Path(filename).suffix.lower() not in OPTIMIZABLE_EXTENSIONS:
+            return []
+
+        cached = self._cached_variants(filename)
+        if cached is not None:
+            return cached
+
+        future = self._pending.get(filename)
+        if future is None:
+            future = asyncio.ensure_future(self._generate(filename))
+            self._pending[filename] = future
+            future.add_done_callback(lambda _: self._pending.pop(filename, None))
+        return await asyncio.shield(future)
+
+    async def _generate(self, filename: str) -> List[ImageVariant]:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.config.optimize_workers)
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor,
+                _generate_variants,
+                str(self.images_dir / filename),
+                self.config.variant_widths,
+                self.config.variant_formats,
+                self.config.variant_quality,
+            )
+        except Exception as e:
+            print(f"[WARNING] 图片优化失败 {filename}: {e}")
+            return []
+
+        variants = [ImageVariant(**result) for result in results]
+        self.image_index.variants[filename] = [variant.model_dump() for variant in variants]
+        for variant in variants:
+            size = (self.images_dir / variant.filename).stat().st_size
+            self.image_index.add(None, variant.filename, size=size)
+        return variants
+
+    def _cached_variants(self, filename: str) -> Optional[List[ImageVariant]]:
+        cached = self.image_index.variants.get(filename)
+        if cached is None:
+            return None
+
+        variants = [ImageVariant(**variant) for variant in cached]
+        if all((self.images_dir / variant.filename).is_file() for variant in variants):
+            return variants
+        return None
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def largest_variant(variants: List[ImageVariant], fmt: str = "webp") -> Optional[ImageVariant]:
+    """返回指定格式中最宽的版本"""
+    candidates = [variant for variant in variants if variant.format == fmt] or variants
+    return max(candidates, key=lambda variant: variant.width, default=None)
+
+
+def picture_html(alt_text: str, filename: str, variants: List[ImageVariant], sizes: str) -> str:
+    """生成带 srcset 的 <picture> 标签，原图作为回退"""
+    sources = []
+    # AVIF 优先于 WebP
+    for fmt in sorted({variant.format for variant in variants}, key=lambda f: f != "avif"):
+        srcset = ", ".join(
+            f"/images/{variant.filename} {variant.width}w"
+            for variant in sorted(variants, key=lambda v: v.width)
+            if variant.format == fmt
+        )
+        sources.append(
+            f'<source type="{MIME_TYPES.get(fmt, "image/" + fmt)}" srcset="{srcset}" sizes="{sizes}">'
+        )
+
+    alt = html.escape(alt_text, quote=True)
+    return f'<picture>{"".join(sources)}<img src="/images/{filename}" alt="{alt}" loading="lazy"></picture>'
@@ -4,59 +4,294 @@
 """
 
 import asyncio
+import os
+import re
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, List
+from typing import AsyncIterator, Iterable, Optional, List, Tuple
 import click
+import httpx
 from rich.console import Console
+from pydantic import BaseModel
 from rich.table import Table
 
 from .config import SyncConfig, get_config
-from .notion_client import NotionClient, NotionPost
+from .fake_notion import RecordingTransport
+from .notion_client import NotionClient, NotionPost, parse_page_id
 from .hugo_generator import HugoGenerator
+from .metrics import SyncMetrics
+from .shard import (
+    STATE_FILE,
+    ShardSpec,
+    ShardState,
+    load_shard_states,
+    merge_shard_outputs,
+    remove_shard_outputs,
+    shard_config,
+)
+from .watcher import SyncWatcher
+from .webhook import WebhookServer
+
+
+# sync --profile 未指定路径时的报告文件
+DEFAULT_PROFILE_PATH = Path(".cache/sync_profile.json")
+
+
+def parse_since(value: str) -> str:
+    """把日期、时间或相对时长（30m / 2h / 3d）转换为 Notion 的 UTC 时间格式"""
+    match = re.fullmatch(r"(\d+)([mhd])", value.strip())
+    if match:
+        unit = {"m": "minutes", "h": "hours", "d": "days"}[match.group(2)]
+        moment = datetime.now(timezone.utc) - timedelta(**{unit: int(match.group(1))})
+    else:
+        try:
+            moment = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"无效的时间: {value}")
+        if moment.tzinfo is None:
+            # 没有时区时按本地时间处理
+            moment = moment.astimezone()
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class SyncResult(BaseModel):
+    """一次同步的结果"""
+    listed: int = 0
+    generated: int = 0
+    # 实际写入或删除的文章文件数
+    written: int = 0
+    # 列出的文章中最新的编辑时间，用作下一次增量查询的游标
+    latest_edited_time: Optional[str] = None
+    # 流水线中处理失败的文章数（大于 0 时同步返回失败）
+    failed: int = 0
+    # 需要重试的文章中最早的编辑时间，增量查询的游标不能超过此时间
+    retry_edited_time: Optional[str] = None
 
 
 class BlogSyncer:
     """博客同步器主类"""
     
-    def __init__(self, config: Optional[SyncConfig] = None):
+    def __init__(
+        self,
+        config: Optional[SyncConfig] = None,
+        offline: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        shard: Optional[ShardSpec] = None,
+    ):
         self.config = config or get_config()
         self.console = Console()
+        # 离线模式：只用本地缓存重建 Hugo 内容，不访问 Notion API
+        self.offline = offline
+        # 分片同步：只处理属于本分片的文章，清单和图片索引写入分片目录，清理留给 merge
+        self.shard = shard
+        hugo_config = shard_config(self.config.hugo, shard) if shard else self.config.hugo
+        # NotionClient 和 HugoGenerator 共用的指标
+        self.metrics = SyncMetrics()
         
         # 初始化客户端
-        self.notion_client = NotionClient(self.config.notion)
-        self.hugo_generator = HugoGenerator(self.config.hugo)
+        # transport 可替换为离线的 Notion 替身（见 fake_notion），图片下载使用独立的客户端，
+        # 避免 Notion 的认证头被发送到图片服务器
+        self.notion_client = NotionClient(
+            self.config.notion, offline=offline, transport=transport, metrics=self.metrics
+        )
+        self.hugo_generator = HugoGenerator(
+            hugo_config,
+            offline=offline,
+            http_client=httpx.AsyncClient(transport=transport) if transport else None,
+            metrics=self.metrics,
+        )
+        # 最近一次同步的结果
+        self.last_result: Optional[SyncResult] = None
     
-    async def sync(self, force: bool = False) -> bool:
-        """执行同步操作"""
+    async def sync(
+        self,
+        force: bool = False,
+        edited_since: Optional[str] = None,
+        page_ids: Optional[Iterable[str]] = None,
+        slugs: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """执行同步操作
+        
+        指定 edited_since 时只列出该时间之后编辑过的文章，指定 page_ids / slugs 时只同步这些文章；
+        此时文章列表不完整，不清理旧文章
+        """
+        with self.metrics.timer("sync.total"):
+            return await self._sync(force, edited_since, page_ids, slugs)
+    
+    async def _iter_selected_posts(
+        self,
+        edited_since: Optional[str],
+        page_ids: Optional[Iterable[str]],
+        slugs: Optional[Iterable[str]],
+    ) -> AsyncIterator[NotionPost]:
+        """列出需要同步的文章"""
+        if page_ids is None and slugs is None:
+            async for post in self.notion_client.iter_posts(edited_since=edited_since):
+                # 离线模式读取缓存时不支持服务端过滤
+                if edited_since is None or post.last_edited_time >= edited_since:
+                    yield post
+            return
+        
+        for slug in slugs or []:
+            found = False
+            async for post in self.notion_client.iter_posts(slug=slug):
+                # 未配置数据库（使用 search）或离线时过滤条件不生效，需要再检查一次
+                if post.slug == slug:
+                    found = True
+                    yield post
+            if not found:
+                print(f"[WARNING] 没有找到 slug 为 {slug} 的文章")
+        
+        for page_id in page_ids or []:
+            page_post = await self.notion_client.get_post(page_id)
+            if page_post is None:
+                # 页面已删除、移出数据库或没有标题
+                if not self.hugo_generator.remove_post(page_id):
+                    print(f"[WARNING] 页面不是数据库中的文章: {page_id}")
+                continue
+            yield page_post
+    
+    async def _sync(
+        self,
+        force: bool,
+        edited_since: Optional[str],
+        page_ids: Optional[Iterable[str]],
+        slugs: Optional[Iterable[str]],
+    ) -> bool:
+        partial = edited_since is not None or page_ids is not None or slugs is not None
+        # 长期运行时指标会累积，本次的写入统计按差值计算
+        before = self.metrics.counters.copy()
+        # 同步中途出错时没有结果，watch 模式据此不移动游标
+        self.last_result = None
         try:
-            print("开始同步 Notion 到 Hugo...")
+            if self.shard:
+                print(f"开始同步 Notion 到 Hugo（分片 {self.shard}）...")
+                # 同步完成后才重新写入分片状态，失败的分片不会被 merge 合并
+                (self.shard.state_dir(self.config.hugo) / STATE_FILE).unlink(missing_ok=True)
+            else:
+                print("开始同步 Notion 到 Hugo...")
+            
+            # 边列出文章边生成：只有自上次同步后有变化的文章进入生成流水线
+            posts: List[NotionPost] = []
             
-            # 从 Notion 获取所有文章
-            posts = await self.notion_client.get_posts()
+            async def changed_posts() -> AsyncIterator[NotionPost]:
+                async for post in self._iter_selected_posts(edited_since, page_ids, slugs):
+                    if self.shard and not self.shard.contains(post.id):
+                        continue
+                    posts.append(post)
+                    self.metrics.incr("posts_listed")
+                    if (
+                        force
+                        or self.hugo_generator.manifest.is_stale(post)
+                        or self.hugo_generator.search_index.is_missing(post)
+                    ):
+                        self.metrics.incr("posts_changed")
+                        yield post
             
+            # 生成 Hugo 文章
+            with self.metrics.timer("sync.generate"):
+                generated_count = await self.hugo_generator.generate_posts(
+                    changed_posts(), self.notion_client, self.config.pipeline
+                )
+            
+            retry_posts = self.hugo_generator.retry_posts
+            self.last_result = SyncResult(
+                listed=len(posts),
+                generated=generated_count,
+                written=(self.metrics.counters - before)["files_written"],
+                latest_edited_time=max((post.last_edited_time for post in posts), default=None),
+                failed=sum(stats.failed for stats in self.hugo_generator.pipeline_stats),
+                retry_edited_time=min((post.last_edited_time for post in retry_posts), default=None),
+            )
+            if self.shard and not partial:
+                self._save_shard_state(self.shard, posts)
             if not posts:
-                print("[OK] 没有找到文章")
+                print("[OK] 没有更新的文章" if partial else "[OK] 没有找到文章")
                 return True
             
             # 显示同步概览
             self._show_sync_summary(posts)
+            self._show_pipeline_stats()
+            if not force:
+                print(f"增量同步: {generated_count} 篇有更新，跳过 {len(posts) - generated_count} 篇")
             
-            # 清理旧文章
-            self.hugo_generator.clean_old_posts(posts)
-            
-            # 生成 Hugo 文章
-            generated_count = await self.hugo_generator.generate_posts(posts, self.notion_client)
+            if not partial and not self.shard:
+                with self.metrics.timer("sync.cleanup"):
+                    # 缓存中只保留当前仍存在的页面
+                    if self.notion_client.cache and not self.offline:
+                        self.notion_client.cache.prune_pages({post.id for post in posts})
+                    
+                    # 文章列表完整获取后再清理旧文章
+                    self.hugo_generator.clean_old_posts(posts)
             
-            print(f"[OK] 同步完成！生成了 {generated_count} 篇文章")
+            counters = self.metrics.counters - before
+            self.last_result.written = counters["files_written"] + counters["files_removed"]
+            if self.last_result.failed:
+                print(
+                    f"[ERROR] 同步未完成：{self.last_result.failed} 篇文章处理失败，"
+                    f"成功生成 {generated_count} 篇"
+                )
+                return False
+            print(
+                f"[OK] 同步完成！生成了 {generated_count} 篇文章"
+                f"（写入 {counters['files_written']} 个文件，{counters['files_unchanged']} 个无变化）"
+            )
             return True
             
         except Exception as e:
             print(f"[ERROR] 同步失败: {e}")
+            self.last_result = None
+            return False
+    
+    def _save_shard_state(self, shard: ShardSpec, posts: List[NotionPost]) -> None:
+        """记录本分片当前的全部文章，供 merge 合并和清理"""
+        state = ShardState(
+            index=shard.index,
+            count=shard.count,
+            posts=sorted(post.id for post in posts),
+            synced_at=datetime.now().astimezone().isoformat(),
+        )
+        state.save(shard.state_dir(self.config.hugo) / STATE_FILE)
+        print(f"[OK] 分片 {shard} 完成，共 {len(posts)} 篇文章")
+    
+    def merge_shards(self, clean_images: bool = False) -> bool:
+        """合并所有分片的输出，然后统一清理已删除的文章（以及无用图片）"""
+        try:
+            states = load_shard_states(self.config.hugo)
+        except ValueError as e:
+            print(f"[ERROR] 无法合并分片: {e}")
             return False
+        
+        generator = self.hugo_generator
+        current_ids, stale_files = merge_shard_outputs(
+            generator.manifest, generator.image_index, generator.search_index, states
+        )
+        print(f"合并 {len(states)} 个分片，共 {len(current_ids)} 篇文章")
+        
+        with self.metrics.timer("sync.cleanup"):
+            # slug 变化后旧文件名的文章（分片在各自的工作目录中已删除）
+            for path in stale_files:
+                if Path(path).exists():
+                    generator._remove_post_file(Path(path))
+            generator.remove_missing_posts(current_ids)
+            generator.manifest.save()
+            generator.image_index.save()
+            generator.save_search_index()
+            if clean_images:
+                print("\n开始清理无用图片...")
+                generator.clean_unused_images()
+        
+        remove_shard_outputs(self.config.hugo)
+        print("[OK] 分片合并完成")
+        return True
     
-    def _show_sync_summary(self, posts):
+    async def aclose(self) -> None:
+        """释放 Notion 客户端和图片下载的连接"""
+        await self.notion_client.aclose()
+        await self.hugo_generator.aclose()
+    
+    def _show_sync_summary(self, posts: List[NotionPost]) -> None:
         """显示同步概览"""
         published_count = sum(1 for post in posts if post.is_published())
         draft_count = len(posts) - published_count
@@ -79,34 +314,254 @@ class BlogSyncer:
                 posts_table.add_row(post.title, status, tags)
             
             self.console.print(posts_table)
+    
+    def _show_pipeline_stats(self) -> None:
+        """显示流水线各阶段的统计，用于调整各阶段的并发数"""
+        stats_table = Table(title="流水线统计")
+        stats_table.add_column("阶段", style="cyan")
+        stats_table.add_column("并发", justify="right")
+        stats_table.add_column("完成", justify="right", style="green")
+        stats_table.add_column("失败", justify="right", style="red")
+        stats_table.add_column("最大队列", justify="right")
+        stats_table.add_column("吞吐 (篇/秒)", justify="right")
+        stats_table.add_column("繁忙度", justify="right", style="yellow")
+        
+        for stage in self.hugo_generator.pipeline_stats:
+            stats_table.add_row(
+                stage.name,
+                str(stage.workers),
+                str(stage.processed),
+                str(stage.failed),
+                str(stage.max_queue_depth),
+                f"{stage.throughput:.2f}",
+                f"{stage.utilization:.0%}" if stage.name != "list" else "-",
+            )
+        
+        self.console.print(stats_table)
+    
+    def write_profile(self, json_path: Optional[Path] = None, prometheus_path: Optional[Path] = None) -> None:
+        """输出性能报告（JSON 和 / 或 Prometheus textfile）并显示汇总表"""
+        if json_path:
+            self.metrics.write_json(
+                json_path,
+                pipeline=[stage.model_dump() for stage in self.hugo_generator.pipeline_stats],
+            )
+            print(f"[OK] 性能报告已保存到: {json_path}")
+        if prometheus_path:
+            self.metrics.write_prometheus(prometheus_path)
+            print(f"[OK] Prometheus 指标已保存到: {prometheus_path}")
+        self._show_metrics()
+    
+    def _show_metrics(self) -> None:
+        """显示各阶段耗时、计数器和最慢的文章"""
+        timers_table = Table(title="阶段耗时")
+        timers_table.add_column("阶段", style="cyan")
+        timers_table.add_column("次数", justify="right")
+        timers_table.add_column("总耗时 (秒)", justify="right", style="yellow")
+        timers_table.add_column("最长 (秒)", justify="right")
+        for name, stats in sorted(self.metrics.timers.items()):
+            timers_table.add_row(
+                name, str(stats.count), f"{stats.total_seconds:.2f}", f"{stats.max_seconds:.2f}"
+            )
+        self.console.print(timers_table)
+        
+        counters_table = Table(title="计数")
+        counters_table.add_column("指标", style="cyan")
+        counters_table.add_column("值", justify="right", style="green")
+        for name, value in sorted(self.metrics.counters.items()):
+            counters_table.add_row(name, f"{value:,}")
+        self.console.print(counters_table)
+        
+        slowest = self.metrics.slowest_posts()
+        if slowest:
+            posts_table = Table(title="最慢的文章")
+            posts_table.add_column("文章", style="cyan")
+            posts_table.add_column("总耗时 (秒)", justify="right", style="yellow")
+            for stage in ("fetch", "render", "assets", "write"):
+                posts_table.add_column(stage, justify="right")
+            for timing in slowest:
+                posts_table.add_row(
+                    timing.slug,
+                    f"{timing.total_seconds:.2f}",
+                    *(f"{timing.stages.get(stage, 0.0):.2f}" for stage in ("fetch", "render", "assets", "write")),
+                )
+            self.console.print(posts_table)
 
 
-def cli():
+def cli() -> None:
     """Notion-Hugo 同步工具"""
     
     @click.group()
-    def main():
+    def main() -> None:
         """Notion-Hugo 同步工具"""
         pass
     
     @main.command()
     @click.option("--clean", is_flag=True, help="清理无用的图片文件")
-    def sync(clean):
-        """同步 Notion 内容到 Hugo"""
-        syncer = BlogSyncer()
+    @click.option("--force", is_flag=True, help="忽略同步清单，重新生成所有文章")
+    @click.option("--concurrency", type=click.IntRange(min=1), default=None, help="同时进行的 Notion 请求数")
+    @click.option("--rebuild-from-cache", is_flag=True, help="不访问 Notion，仅用本地缓存重新生成所有文章")
+    @click.option(
+        "--record-fixtures",
+        type=click.Path(file_okay=False, path_type=Path),
+        default=None,
+        help="把 Notion 响应录制到指定目录，供离线替身回放",
+    )
+    @click.option(
+        "--profile",
+        "profile_path",
+        type=click.Path(dir_okay=False, path_type=Path),
+        is_flag=False,
+        flag_value=DEFAULT_PROFILE_PATH,
+        default=None,
+        help=f"输出各阶段耗时和计数的 JSON 报告（默认 {DEFAULT_PROFILE_PATH}）",
+    )
+    @click.option(
+        "--prometheus",
+        "prometheus_path",
+        type=click.Path(dir_okay=False, path_type=Path),
+        default=None,
+        help="输出 Prometheus textfile 格式的指标",
+    )
+    @click.option("--page", "pages", multiple=True, help="只同步指定页面（页面 ID 或 URL），可多次指定")
+    @click.option("--slug", "slugs", multiple=True, help="只同步指定 slug 的文章，可多次指定")
+    @click.option("--since", default=None, help="只同步该时间之后编辑过的文章（如 2024-05-01、2024-05-01T08:00 或 2h、3d）")
+    @click.option("--shard", default=None, help="只同步第 i 个分片的文章（i/n，如 1/4），之后用 merge 合并")
+    def sync(
+        clean: bool,
+        force: bool,
+        concurrency: Optional[int],
+        rebuild_from_cache: bool,
+        record_fixtures: Optional[Path],
+        profile_path: Optional[Path],
+        prometheus_path: Optional[Path],
+        pages: Tuple[str, ...],
+        slugs: Tuple[str, ...],
+        since: Optional[str],
+        shard: Optional[str],
+    ) -> None:
+        """同步 Notion 内容到 Hugo
+        
+        指定 --page / --slug / --since 时只同步选中的文章，其余文章保持不变，也不清理旧文章；
+        指定 --shard 时只同步本分片的文章，清理在所有分片完成后由 merge 统一进行
+        """
+        if since and (pages or slugs):
+            raise click.UsageError("--since 不能与 --page / --slug 同时使用")
+        if shard and (since or pages or slugs):
+            raise click.UsageError("--shard 不能与 --page / --slug / --since 同时使用")
+        if shard and clean:
+            raise click.UsageError("分片同步不清理图片，请在 merge 时使用 --clean")
+        try:
+            page_ids = [parse_page_id(page) for page in pages] or None
+            edited_since = parse_since(since) if since else None
+            shard_spec = ShardSpec.parse(shard) if shard else None
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        
+        config = get_config()
+        if concurrency:
+            config.notion.concurrency = concurrency
+        if shard_spec:
+            # 每个分片可以使用独立的 integration token，分摊请求限速
+            config.notion.token = os.getenv(f"NOTION_TOKEN_{shard_spec.index}") or config.notion.token
+        recorder = RecordingTransport(record_fixtures) if record_fixtures else None
+        syncer = BlogSyncer(config, offline=rebuild_from_cache, transport=recorder, shard=shard_spec)
         
-        async def run_sync():
-            success = await syncer.sync()
+        async def run_sync() -> None:
+            success = await syncer.sync(
+                force=force or rebuild_from_cache,
+                edited_since=edited_since,
+                page_ids=page_ids,
+                slugs=list(slugs) or None,
+            )
             
             # 如果指定了清理选项，清理无用图片
             if success and clean:
                 print("\n开始清理无用图片...")
-                # 需要重新获取文章列表来进行清理
-                posts = await syncer.notion_client.get_posts()
-                syncer.hugo_generator.clean_unused_images(posts)
+                syncer.hugo_generator.clean_unused_images()
             
+            await syncer.aclose()
+            if profile_path or prometheus_path:
+                syncer.write_profile(profile_path, prometheus_path)
+            if recorder:
+                recorder.save()
+                print(f"[OK] Notion 响应已录制到: {record_fixtures}")
             sys.exit(0 if success else 1)
         
         asyncio.run(run_sync())
+    
+    @main.command()
+    @click.option("--clean", is_flag=True, help="合并后清理无用的图片文件")
+    def merge(clean: bool) -> None:
+        """合并 sync --shard 的输出，并统一清理已删除的文章"""
+        syncer = BlogSyncer(get_config())
+        success = syncer.merge_shards(clean_images=clean)
+        asyncio.run(syncer.aclose())
+        sys.exit(0 if success else 1)
+    
+    @main.command()
+    @click.option("--interval", type=click.FloatRange(min=0, min_open=True), default=None, help="轮询间隔（秒，默认 60）")
+    @click.option("--hook", default=None, help="有文章更新后运行的命令，例如 \"cd hugo && hugo --minify\"")
+    @click.option("--debounce", type=click.FloatRange(min=0), default=None, help="最后一次更新后等待多久运行钩子（秒，默认 30）")
+    @click.option("--full-sync-interval", type=click.FloatRange(min=0, min_open=True), default=None, help="全量同步的间隔（秒，默认 3600）")
+    def watch(
+        interval: Optional[float],
+        hook: Optional[str],
+        debounce: Optional[float],
+        full_sync_interval: Optional[float],
+    ) -> None:
+        """常驻运行，定期同步有更新的文章"""
+        config = get_config()
+        overrides = {
+            "interval": interval,
+            "hook": hook,
+            "debounce": debounce,
+            "full_sync_interval": full_sync_interval,
+        }
+        config.watch = config.watch.model_copy(
+            update={key: value for key, value in overrides.items() if value is not None}
+        )
+        syncer = BlogSyncer(config)
+        watcher = SyncWatcher(syncer, config.watch)
+        
+        async def run_watch() -> None:
+            print(f"开始监视 Notion 更新，每 {config.watch.interval:g} 秒检查一次（Ctrl+C 退出）")
+            try:
+                await watcher.run()
+            finally:
+                await syncer.aclose()
+        
+        try:
+            asyncio.run(run_watch())
+        except KeyboardInterrupt:
+            print("[OK] 已停止监视")
+    
+    @main.command()
+    @click.option("--host", default=None, help="监听地址（默认 127.0.0.1）")
+    @click.option("--port", type=click.IntRange(0, 65535), default=None, help="监听端口（默认 8787）")
+    @click.option("--secret", default=None, help="共享密钥（默认读取 NOTION_WEBHOOK_SECRET）")
+    @click.option("--coalesce", type=click.FloatRange(min=0), default=None, help="合并同一批事件的等待时间（秒，默认 2）")
+    def serve(host: Optional[str], port: Optional[int], secret: Optional[str], coalesce: Optional[float]) -> None:
+        """运行 webhook 接收服务，收到页面事件后只同步该页面"""
+        config = get_config()
+        overrides = {"host": host, "port": port, "secret": secret, "coalesce": coalesce}
+        config.serve = config.serve.model_copy(
+            update={key: value for key, value in overrides.items() if value is not None}
+        )
+        if not config.serve.secret:
+            print("[WARNING] 未设置 NOTION_WEBHOOK_SECRET，除 Notion 的验证请求外所有事件都会被拒绝")
+        syncer = BlogSyncer(config)
+        server = WebhookServer(syncer, config.serve)
+        
+        async def run_serve() -> None:
+            try:
+                await server.run()
+            finally:
+                await syncer.aclose()
+        
+        try:
+            asyncio.run(run_serve())
+        except KeyboardInterrupt:
+            print("[OK] 已停止 webhook 服务")
 
     main()
@@ -0,0 +1,147 @@
+"""
+同步清单模块
+记录每篇文章的同步状态（notion_id -> last_edited_time、输出文件、内容哈希、图片），
+用于增量同步
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from pydantic import BaseModel, Field
+
+from .notion_client import EDIT_TIME_RESOLUTION, NotionPost, parse_notion_time
+
+
+def content_hash(text: str) -> str:
+    """计算文本内容的哈希"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ManifestEntry(BaseModel):
+    """单篇文章的同步记录"""
+    notion_id: str
+    last_edited_time: str
+    slug: str
+    path: str
+    content_hash: str
+    images: List[str] = Field(default_factory=list)
+    synced_at: str
+
+
+class SyncManifest:
+    """同步清单（notion_id -> ManifestEntry）"""
+
+    VERSION = 1
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, ManifestEntry]] = None):
+        self.path = Path(path)
+        self.entries: Dict[str, ManifestEntry] = entries or {}
+        # 图片文件名 -> 引用它的文章数
+        self.image_refs: Counter = Counter()
+        for entry in self.entries.values():
+            self.image_refs.update(entry.images)
+
+    @classmethod
+    def load(cls, path: Path) -> "SyncManifest":
+        """从文件加载清单，文件不存在或损坏时返回空清单"""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != cls.VERSION:
+                print(f"[WARNING] 同步清单版本不匹配，将执行全量同步: {path}")
+                return cls(path)
+            entries = {
+                notion_id: ManifestEntry(**entry)
+                for notion_id, entry in data.get("posts", {}).items()
+            }
+            return cls(path, entries)
+        except Exception as e:
+            print(f"[WARNING] 读取同步清单失败，将执行全量同步: {e}")
+            return cls(path)
+
+    def save(self) -> None:
+        """原子写入清单文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "posts": {
+                notion_id: entry.model_dump()
+                for notion_id, entry in sorted(self.entries.items())
+            },
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, notion_id: str) -> Optional[ManifestEntry]:
+        """获取文章的同步记录"""
+        return self.entries.get(notion_id)
+
+    def record(self, post: NotionPost, path: Path, text: str, images: Iterable[str], stale: bool = False) -> None:
+        """记录一篇文章的同步结果
+
+        stale 为 True 时（例如有图片下载失败）不记录编辑时间，文章在下次同步时仍视为过期
+        """
+        self.remove(post.id)
+        entry = self.entries[post.id] = ManifestEntry(
+            notion_id=post.id,
+            last_edited_time="" if stale else post.last_edited_time,
+            slug=post.slug,
+            path=str(path),
+            content_hash=content_hash(text),
+            images=sorted(set(images)),
+            synced_at=datetime.now().astimezone().isoformat(),
+        )
+        self.image_refs.update(entry.images)
+
+    def put(self, entry: ManifestEntry) -> Optional[ManifestEntry]:
+        """写入一条同步记录（合并分片清单时使用），返回被替换的旧记录"""
+        previous = self.remove(entry.notion_id)
+        self.entries[entry.notion_id] = entry
+        self.image_refs.update(entry.images)
+        return previous
+
+    def remove(self, notion_id: str) -> Optional[ManifestEntry]:
+        """移除文章的同步记录"""
+        entry = self.entries.pop(notion_id, None)
+        if entry:
+            for image in entry.images:
+                self.image_refs[image] -= 1
+                if self.image_refs[image] <= 0:
+                    del self.image_refs[image]
+        return entry
+
+    def is_stale(self, post: NotionPost) -> bool:
+        """检查文章是否需要重新生成"""
+        entry = self.entries.get(post.id)
+        if entry is None:
+            return True
+        if entry.last_edited_time != post.last_edited_time:
+            return True
+        if not Path(entry.path).exists():
+            return True
+
+        # 同步发生在编辑时间所在的那一分钟内时，之后的编辑可能没有改变 last_edited_time
+        try:
+            edited = parse_notion_time(post.last_edited_time)
+            synced = parse_notion_time(entry.synced_at)
+            return synced < edited + EDIT_TIME_RESOLUTION
+        except ValueError:
+            return True
+
+    def referenced_images(self) -> set:
+        """所有文章引用的图片文件名"""
+        return set(self.image_refs)
+
+    def changed_posts(self, posts: List[NotionPost]) -> List[NotionPost]:
+        """筛选出自上次同步后发生变化的文章"""
+        return [post for post in posts if self.is_stale(post)]
@@ -0,0 +1,158 @@
+"""
+同步指标模块
+记录各阶段和每篇文章的耗时、Notion 请求 / 重试 / 429 次数、图片下载与复用的字节数、
+文件写入情况，可输出为 JSON 报告或 Prometheus textfile
+"""
+
+import json
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from pydantic import BaseModel, Field
+
+
+PROMETHEUS_PREFIX = "notion_sync"
+
+# 计数器说明，用于 Prometheus 的 HELP 行
+COUNTER_HELP = {
+    "notion_requests": "Notion API 请求次数（含重试）",
+    "notion_retries": "Notion API 重试次数",
+    "notion_rate_limited": "Notion API 返回 429 的次数",
+    "notion_errors": "重试耗尽后仍失败的 Notion API 请求数",
+    "block_cache_hits": "命中本地缓存的 block 列表数",
+    "block_cache_misses": "未命中本地缓存的 block 列表数",
+    "posts_listed": "列出的文章数",
+    "posts_changed": "需要重新生成的文章数",
+    "images_downloaded": "下载的图片数",
+    "image_bytes_downloaded": "下载的图片字节数",
+    "images_deduplicated": "下载后发现内容已存在的图片数",
+    "images_reused": "直接复用本地文件的图片数",
+    "image_bytes_reused": "直接复用本地文件的图片字节数",
+    "files_written": "写入的文章文件数",
+    "files_unchanged": "内容未变化、未写入的文章文件数",
+    "files_removed": "删除的旧文章文件数",
+}
+
+
+class TimerStats(BaseModel):
+    """一类操作的耗时统计"""
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+class PostTiming(BaseModel):
+    """单篇文章各阶段的耗时"""
+    slug: str
+    stages: Dict[str, float] = Field(default_factory=dict)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stages.values())
+
+
+class SyncMetrics:
+    """一次同步运行的指标
+
+    由 BlogSyncer 创建并传给 NotionClient 和 HugoGenerator 共用；
+    记录开销很小，不开启 --profile 时也会收集
+    """
+
+    def __init__(self) -> None:
+        self.started_at = datetime.now().astimezone()
+        self.counters: Counter = Counter()
+        self.timers: Dict[str, TimerStats] = defaultdict(TimerStats)
+        self.posts: Dict[str, PostTiming] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        """增加计数器"""
+        self.counters[name] += value
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """记录一段代码的耗时（可重复进入，累加到同一个统计）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name].add(time.perf_counter() - started)
+
+    @contextmanager
+    def post_timer(self, post_id: str, slug: str, stage: str) -> Iterator[None]:
+        """记录单篇文章某个阶段的耗时，同时累加到 post.{stage} 统计"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.timers[f"post.{stage}"].add(seconds)
+            timing = self.posts.setdefault(post_id, PostTiming(slug=slug))
+            timing.stages[stage] = timing.stages.get(stage, 0.0) + seconds
+
+    def slowest_posts(self, limit: int = 10) -> List[PostTiming]:
+        """耗时最长的文章"""
+        return sorted(self.posts.values(), key=lambda p: p.total_seconds, reverse=True)[:limit]
+
+    def report(self, **extra: Any) -> Dict[str, Any]:
+        """生成 JSON 报告"""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "counters": dict(sorted(self.counters.items())),
+            "timers": {name: stats.model_dump() for name, stats in sorted(self.timers.items())},
+            "posts": {
+                post_id: {**timing.model_dump(), "total_seconds": timing.total_seconds}
+                for post_id, timing in self.posts.items()
+            },
+            **extra,
+        }
+
+    def write_json(self, path: Path, **extra: Any) -> None:
+        """写出 JSON 报告"""
+        _atomic_write(Path(path), json.dumps(self.report(**extra), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: Path) -> None:
+        """写出 node_exporter textfile collector 格式的指标"""
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = f"{PROMETHEUS_PREFIX}_{_metric_name(name)}_total"
+            lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        metric = f"{PROMETHEUS_PREFIX}_duration_seconds"
+        lines.append(f"# HELP {metric} 各阶段耗时")
+        lines.append(f"# TYPE {metric} summary")
+        for name, stats in sorted(self.timers.items()):
+            label = f'phase="{name}"'
+            lines.append(f"{metric}_sum{{{label}}} {stats.total_seconds:.6f}")
+            lines.append(f"{metric}_count{{{label}}} {stats.count}")
+
+        metric = f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {self.started_at.timestamp():.0f}")
+
+        _atomic_write(Path(path), "\n".join(lines) + "\n")
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """原子写入（textfile collector 可能在写入过程中读取文件）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
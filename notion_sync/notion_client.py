@@ -4,88 +4,128 @@ Notion API 客户端
 """
 
 import asyncio
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-from notion_client import Client
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterator
+from notion_client import AsyncClient
+from notion_client.errors import APIErrorCode, APIResponseError
 import httpx
 
-from .config import NotionConfig
+from .block_cache import BlockCache
+from .config import NotionConfig, PropertyMapping
+from .metrics import SyncMetrics
+from .renderer import MarkdownRenderer, render_rich_text
+from .scheduler import RequestPriority, RequestScheduler
+
+
+NOTION_API_VERSION = "2022-06-28"
+
+# 子页面和子数据库是独立的页面，不展开其内容
+LEAF_BLOCK_TYPES = {"child_page", "child_database"}
+
+# Notion 的 last_edited_time 只精确到分钟，同一分钟内的再次编辑不会改变该值
+EDIT_TIME_RESOLUTION = timedelta(minutes=1)
+
+
+def parse_notion_time(value: str) -> datetime:
+    """解析 ISO 8601 时间（兼容 Notion 的 Z 结尾格式）"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def parse_page_id(value: str) -> str:
+    """把页面 ID（带或不带连字符）或 Notion 页面 URL 转换为带连字符的页面 ID"""
+    # URL 的查询参数中可能带有视图 ID，只在路径部分查找
+    path = value.split("?")[0]
+    matches = re.findall(r"[0-9a-fA-F]{32}|[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}", path)
+    if not matches:
+        raise ValueError(f"无效的页面 ID: {value}")
+    raw = matches[-1].replace("-", "").lower()
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+
+def _plain_text(items: List[Dict[str, Any]]) -> str:
+    """合并富文本片段的纯文本"""
+    return "".join(item.get("plain_text", item.get("text", {}).get("content", "")) for item in items)
+
+
+DEFAULT_PROPERTIES = PropertyMapping()
 
 
 class NotionPost:
-    """Notion 博客文章数据模型"""
-    
-    def __init__(self, page_data: Dict[str, Any]):
-        self.page_data = page_data
-        self.id = page_data["id"]
-        self.properties = page_data["properties"]
-        self.created_time = page_data["created_time"]
-        self.last_edited_time = page_data["last_edited_time"]
-        
-    @property
-    def title(self) -> str:
-        """获取标题"""
-        title_prop = self.properties.get("Title", self.properties.get("title", {}))
-        if title_prop.get("type") == "title":
-            title_content = title_prop.get("title", [])
-            if title_content:
-                # 合并所有文本片段
-                full_title = "".join([item["text"]["content"] for item in title_content])
-                return full_title
-        return ""
-       
-    
-    @property
-    def slug(self) -> str:
-        """获取 slug"""
-        slug_prop = self.properties.get("Slug", self.properties.get("slug", {}))
-        if slug_prop.get("type") == "rich_text" and slug_prop.get("rich_text"):
-            # 合并所有文本片段
-            full_slug = "".join([item["text"]["content"] for item in slug_prop["rich_text"]])
-            return full_slug
-        return ""
-    
-    @property
-    def tags(self) -> List[str]:
-        """获取标签"""
-        tags_prop = self.properties.get("Tags", self.properties.get("tags", {}))
-        if tags_prop.get("type") == "multi_select":
-            return [tag["name"] for tag in tags_prop.get("multi_select", [])]
-        return []
-    
-    @property
-    def status(self) -> str:
-        """获取状态"""
-        status_prop = self.properties.get("Status", self.properties.get("status", {}))
-        if status_prop.get("type") == "select":
-            return status_prop.get("select", {}).get("name", "Draft")
-        return "Draft"
-    
-    @property
-    def date(self) -> str:
-        """获取日期"""
-        date_prop = self.properties.get("Date", self.properties.get("date", {}))
-        if date_prop.get("type") == "date" and date_prop.get("date"):
-            return date_prop["date"]["start"]
-        return self.created_time.split("T")[0]
-    
-    @property
-    def excerpt(self) -> str:
-        """获取摘要"""
-        excerpt_prop = self.properties.get("Excerpt", self.properties.get("excerpt", {}))
-        if excerpt_prop.get("type") == "rich_text" and excerpt_prop.get("rich_text"):
-            # 合并所有文本片段
-            full_excerpt = "".join([item["text"]["content"] for item in excerpt_prop["rich_text"]])
-            return full_excerpt
-        return ""
-    
-    @property
-    def post_type(self) -> str:
-        """获取文章类型 (Post 或 Page)"""
-        type_prop = self.properties.get("Type", self.properties.get("type", {}))
-        if type_prop.get("type") == "select":
-            return type_prop.get("select", {}).get("name", "Post")
-        return "Post"
+    """Notion 博客文章数据模型
+
+    创建时一次性从页面数据中解析出所有字段；原始页面数据只在 keep_raw 时保留（调试用）
+    """
+    
+    __slots__ = (
+        "id",
+        "created_time",
+        "last_edited_time",
+        "title",
+        "slug",
+        "tags",
+        "status",
+        "date",
+        "excerpt",
+        "post_type",
+        "cover_url",
+        "page_data",
+    )
+    
+    def __init__(
+        self,
+        page_data: Dict[str, Any],
+        properties: Optional[PropertyMapping] = None,
+        keep_raw: bool = False,
+    ):
+        mapping = properties or DEFAULT_PROPERTIES
+        props = page_data["properties"]
+        
+        self.id: str = page_data["id"]
+        self.created_time: str = page_data["created_time"]
+        self.last_edited_time: str = page_data["last_edited_time"]
+        
+        title_prop = self._property(props, mapping.title, "title")
+        if title_prop is None:
+            # 数据库有且只有一个标题属性，属性名不匹配时按类型查找
+            title_prop = next((prop for prop in props.values() if prop.get("type") == "title"), None)
+        self.title: str = _plain_text(title_prop["title"]) if title_prop else ""
+        
+        slug_prop = self._property(props, mapping.slug, "rich_text")
+        self.slug: str = _plain_text(slug_prop["rich_text"]) if slug_prop else ""
+        
+        tags_prop = self._property(props, mapping.tags, "multi_select")
+        self.tags: List[str] = [tag["name"] for tag in tags_prop["multi_select"]] if tags_prop else []
+        
+        status_prop = self._property(props, mapping.status, "select")
+        self.status: str = (status_prop["select"] or {}).get("name", "Draft") if status_prop else "Draft"
+        
+        date_prop = self._property(props, mapping.date, "date")
+        self.date: str = (
+            date_prop["date"]["start"] if date_prop and date_prop["date"] else self.created_time.split("T")[0]
+        )
+        
+        excerpt_prop = self._property(props, mapping.excerpt, "rich_text")
+        self.excerpt: str = _plain_text(excerpt_prop["rich_text"]) if excerpt_prop else ""
+        
+        type_prop = self._property(props, mapping.post_type, "select")
+        self.post_type: str = (type_prop["select"] or {}).get("name", "Post") if type_prop else "Post"
+        
+        cover = page_data.get("cover") or {}
+        self.cover_url: Optional[str] = (cover.get(cover.get("type", "")) or {}).get("url")
+        
+        self.page_data: Optional[Dict[str, Any]] = page_data if keep_raw else None
+    
+    @staticmethod
+    def _property(props: Dict[str, Any], name: str, prop_type: str) -> Optional[Dict[str, Any]]:
+        """按属性名（精确匹配，否则匹配小写形式）查找指定类型的属性"""
+        prop: Optional[Dict[str, Any]] = props.get(name) or props.get(name.lower())
+        if prop and prop.get("type") == prop_type and prop.get(prop_type) is not None:
+            return prop
+        return None
+    
+    def __repr__(self) -> str:
+        return f"NotionPost({self.id!r}, {self.title!r})"
     
     def is_published(self) -> bool:
         """检查是否为发布状态"""
@@ -95,134 +135,263 @@ class NotionPost:
         """检查是否为页面"""
         return self.post_type == "Page"
 
-    @property
-    def cover_url(self) -> Optional[str]:
-        """Get cover image URL if exists"""
-        if not self.page_data.get("cover"):
-            return None
-            
-        cover = self.page_data["cover"]
-        if cover.get("type") == "external":
-            return cover["external"]["url"]
-        elif cover.get("type") == "file":
-            return cover["file"]["url"]
-        return None
-
 
 class NotionClient:
     """Notion API 客户端封装"""
     
-    def __init__(self, config: NotionConfig):
+    def __init__(
+        self,
+        config: NotionConfig,
+        offline: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        metrics: Optional[SyncMetrics] = None,
+    ):
         self.config = config
-        self.client = Client(auth=config.token)
+        self.metrics = metrics or SyncMetrics()
+        self.renderer = MarkdownRenderer()
+        # 离线模式只读取本地缓存，不访问 Notion API
+        self.offline = offline
+        self.cache = (
+            BlockCache(config.cache_path, config.cache_max_bytes) if config.cache_path else None
+        )
+        # 固定 API 版本，databases/{id}/query 在更新的版本中已被 data_sources 取代
+        # 重试由调度器统一处理，关闭客户端自带的重试
+        # transport 用于替换底层 HTTP 传输（如 fake_notion.FakeNotionTransport）
+        self.client = AsyncClient(
+            auth=config.token,
+            notion_version=NOTION_API_VERSION,
+            retry=False,
+            client=httpx.AsyncClient(transport=transport) if transport else None,
+        )
+        self.scheduler = RequestScheduler(
+            rate=config.rate_limit,
+            burst=config.rate_limit,
+            concurrency=config.concurrency,
+            max_retries=config.max_retries,
+            metrics=self.metrics,
+        )
         print(f'NotionClient init with token: {config.token}')
     
-    async def get_posts(self) -> List[NotionPost]:
+    async def aclose(self) -> None:
+        """关闭底层 HTTP 连接池和本地缓存"""
+        await self.client.aclose()
+        if self.cache:
+            self.cache.close()
+    
+    async def _request(
+        self,
+        path: str,
+        method: str = "GET",
+        query: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+        priority: RequestPriority = RequestPriority.BLOCKS,
+    ) -> Dict[str, Any]:
+        """通过调度器发送一次 Notion API 请求（限速、排队、重试）"""
+        return await self.scheduler.submit(
+            lambda: self.client.request(path=path, method=method, query=query, body=body),
+            priority,
+        )
+    
+    async def get_posts(self, **filters: Any) -> List[NotionPost]:
         """获取博客文章列表"""
-        try:
-            print("正在从 Notion 获取文章...")
-            
-            # 查询所有文章
-            response = self.client.search(
-                sort={
-                    "timestamp": "last_edited_time",
-                    "direction": "descending"
-                }
+        print("正在从 Notion 获取文章...")
+        
+        posts = [post async for post in self.iter_posts(**filters)]
+        
+        print(f"找到 {len(posts)} 篇文章")
+        return posts
+    
+    async def iter_posts(
+        self,
+        status: Optional[str] = None,
+        post_type: Optional[str] = None,
+        edited_since: Optional[str] = None,
+        slug: Optional[str] = None,
+        page_size: int = 100,
+    ) -> AsyncIterator[NotionPost]:
+        """逐页查询数据库并逐篇产出文章
+        
+        过滤和排序都在服务端完成，内存中只保留当前一页结果；
+        离线模式下直接读取缓存的页面（忽略过滤条件）
+        """
+        if self.offline:
+            for post in self.iter_cached_posts():
+                yield post
+            return
+        
+        body: Dict[str, Any] = {
+            "sorts": [{"timestamp": "last_edited_time", "direction": "descending"}],
+            "page_size": page_size,
+        }
+        query_filter = self._build_filter(status, post_type, edited_since, slug)
+        
+        if self.config.database_id:
+            path = f"databases/{self.config.database_id}/query"
+            if query_filter:
+                body["filter"] = query_filter
+        else:
+            # 未配置数据库时退回到搜索所有授权页面
+            path = "search"
+            body["sort"] = body.pop("sorts")[0]
+            body["filter"] = {"property": "object", "value": "page"}
+        
+        start_cursor = None
+        while True:
+            if start_cursor:
+                body["start_cursor"] = start_cursor
+            response = await self._request(
+                path, method="POST", body=body, priority=RequestPriority.LISTING
             )
             
-            results = response.get("results", [])
-            
-            # 过滤掉没有标题的文章
-            valid_posts = []
-            for page in results:
-                post = NotionPost(page)
+            for page in response.get("results", []):
+                if self.cache:
+                    self.cache.put_page(page)
+                post = self._make_post(page)
                 # 检查是否有有效标题（不是默认的无标题文章）
                 if post.title:
-                    valid_posts.append(post)
-            
-            print(f"找到 {len(valid_posts)} 篇文章")
-            return valid_posts
-            
-        except Exception as e:
-            print(f"获取文章失败: {e}")
-            return []
-    
-    async def get_page_content(self, page_id: str) -> str:
-        """获取页面内容（正文）"""
-        try:
-            # 获取页面的 blocks（内容块）
-            blocks = self.client.blocks.children.list(block_id=page_id)
-            
-            # 将 blocks 转换为 Markdown
-            content_parts = []
-            for block in blocks.get("results", []):
-                content_parts.append(self._block_to_markdown(block))
-            
-            return "\n\n".join(content_parts)
+                    yield post
             
-        except Exception as e:
-            print(f"获取页面内容失败: {e}")
-            return ""
+            start_cursor = response.get("next_cursor")
+            if not response.get("has_more") or not start_cursor:
+                break
     
-    def _block_to_markdown(self, block: Dict[str, Any]) -> str:
-        """将 Notion block 转换为 Markdown"""
-        block_type = block.get("type", "")
+    async def get_post(self, page_id: str) -> Optional[NotionPost]:
+        """获取单篇文章
         
-        if block_type == "paragraph":
-            text = self._extract_rich_text(block.get("paragraph", {}).get("rich_text", []))
-            return text if text else ""
+        页面已删除（归档或彻底删除）、不再共享给 integration、不属于配置的数据库或没有标题时返回 None
+        """
+        if self.offline:
+            page = self.cache.get_page(page_id) if self.cache else None
+        else:
+            try:
+                page = await self._request(f"pages/{page_id}", priority=RequestPriority.LISTING)
+            except APIResponseError as e:
+                if e.code != APIErrorCode.ObjectNotFound:
+                    raise
+                page = None
+        if page is None or page.get("archived") or page.get("in_trash"):
+            return None
         
-        elif block_type == "heading_1":
-            text = self._extract_rich_text(block.get("heading_1", {}).get("rich_text", []))
-            return f"# {text}" if text else ""
+        if self.config.database_id:
+            parent_id = page.get("parent", {}).get("database_id", "")
+            if parent_id.replace("-", "") != self.config.database_id.replace("-", ""):
+                return None
         
-        elif block_type == "heading_2":
-            text = self._extract_rich_text(block.get("heading_2", {}).get("rich_text", []))
-            return f"## {text}" if text else ""
+        if self.cache and not self.offline:
+            self.cache.put_page(page)
+        post = self._make_post(page)
+        return post if post.title else None
+    
+    def iter_cached_posts(self) -> Iterator[NotionPost]:
+        """从本地缓存中读取文章列表（离线重建用）"""
+        if not self.cache:
+            return
+        for page in self.cache.iter_pages():
+            post = self._make_post(page)
+            if post.title:
+                yield post
+    
+    def _make_post(self, page: Dict[str, Any]) -> NotionPost:
+        return NotionPost(page, self.config.properties, self.config.keep_raw)
+    
+    def _build_filter(
+        self,
+        status: Optional[str],
+        post_type: Optional[str],
+        edited_since: Optional[str],
+        slug: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """构建数据库查询的服务端过滤条件"""
+        conditions: List[Dict[str, Any]] = []
+        if status:
+            conditions.append({"property": self.config.properties.status, "select": {"equals": status}})
+        if post_type:
+            conditions.append({"property": self.config.properties.post_type, "select": {"equals": post_type}})
+        if slug:
+            conditions.append({"property": self.config.properties.slug, "rich_text": {"equals": slug}})
+        if edited_since:
+            conditions.append({
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": edited_since},
+            })
         
-        elif block_type == "heading_3":
-            text = self._extract_rich_text(block.get("heading_3", {}).get("rich_text", []))
-            return f"### {text}" if text else ""
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"and": conditions}
+    
+    async def get_page_content(self, page_id: str, last_edited_time: Optional[str] = None) -> str:
+        """获取页面内容（正文）
         
-        elif block_type == "bulleted_list_item":
-            text = self._extract_rich_text(block.get("bulleted_list_item", {}).get("rich_text", []))
-            return f"- {text}" if text else ""
+        传入页面的 last_edited_time 时优先使用本地缓存；
+        请求在重试耗尽后仍失败时抛出异常，避免把空内容写入文章
+        """
+        # 获取页面完整的 block 树
+        blocks = await self.get_block_tree(page_id, last_edited_time)
         
-        elif block_type == "numbered_list_item":
-            text = self._extract_rich_text(block.get("numbered_list_item", {}).get("rich_text", []))
-            return f"1. {text}" if text else ""
+        # 将 blocks 转换为 Markdown
+        return self._blocks_to_markdown(blocks)
+    
+    async def get_block_tree(self, block_id: str, version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取 block 的完整子树
         
-        elif block_type == "code":
-            text = self._extract_rich_text(block.get("code", {}).get("rich_text", []))
-            language = block.get("code", {}).get("language", "")
-            return f"```{language}\n{text}\n```" if text else ""
+        每个含有子块的 block 会带上 "children" 字段；
+        同级子树并发获取，总请求数受调度器的并发限制约束
+        """
+        blocks = await self._list_block_children(block_id, version)
         
-        elif block_type == "image":
-            image_url = block.get("image", {}).get("file", {}).get("url", "") or \
-                       block.get("image", {}).get("external", {}).get("url", "")
-            return f"![image]({image_url})" if image_url else ""
+        parents = [
+            block for block in blocks
+            if block.get("has_children") and block.get("type") not in LEAF_BLOCK_TYPES
+        ]
+        subtrees = await asyncio.gather(
+            *(self.get_block_tree(block["id"], version) for block in parents)
+        )
+        for block, children in zip(parents, subtrees):
+            block["children"] = children
         
-        return ""
+        return blocks
     
-    def _extract_rich_text(self, rich_text: List[Dict[str, Any]]) -> str:
-        """从富文本中提取纯文本"""
-        result = []
-        for text_item in rich_text:
-            content = text_item.get("text", {}).get("content", "")
-            if text_item.get("text", {}).get("link"):
-                url = text_item["text"]["link"]["url"]
-                content = f"[{content}]({url})"
-            
-            # 处理格式
-            if text_item.get("annotations", {}).get("bold"):
-                content = f"**{content}**"
-            if text_item.get("annotations", {}).get("italic"):
-                content = f"*{content}*"
-            if text_item.get("annotations", {}).get("strikethrough"):
-                content = f"~~{content}~~"
-            if text_item.get("annotations", {}).get("code"):
-                content = f"`{content}`"
+    async def _list_block_children(self, block_id: str, version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """分页获取 block 的所有直接子块"""
+        if self.cache and (version or self.offline):
+            cached = self.cache.get_children(block_id, None if self.offline else version)
+            if cached is not None:
+                self.metrics.incr("block_cache_hits")
+                return cached
+            self.metrics.incr("block_cache_misses")
+        if self.offline:
+            raise LookupError(f"缓存中没有 block {block_id} 的内容")
+        
+        blocks: List[Dict[str, Any]] = []
+        query: Dict[str, Any] = {"page_size": 100}
+        
+        while True:
+            response = await self._request(f"blocks/{block_id}/children", query=query)
+            blocks.extend(response.get("results", []))
             
-            result.append(content)
+            next_cursor = response.get("next_cursor")
+            if not response.get("has_more") or not next_cursor:
+                break
+            query["start_cursor"] = next_cursor
         
-        return "".join(result)
+        if self.cache and version and self._version_settled(version):
+            self.cache.put_children(block_id, version, blocks)
+        return blocks
+    
+    @staticmethod
+    def _version_settled(version: str) -> bool:
+        """编辑时间所在的那一分钟过去之后，同一版本的内容才不会再变化，才可以缓存"""
+        try:
+            return datetime.now(timezone.utc) >= parse_notion_time(version) + EDIT_TIME_RESOLUTION
+        except ValueError:
+            return False
+    
+    def _blocks_to_markdown(self, blocks: List[Dict[str, Any]]) -> str:
+        """将 block 树转换为 Markdown"""
+        return self.renderer.render(blocks)
+    
+    def _extract_rich_text(self, rich_text: List[Dict[str, Any]]) -> str:
+        """将富文本转换为 Markdown"""
+        return render_rich_text(rich_text)
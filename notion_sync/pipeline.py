@@ -0,0 +1,153 @@
+"""
+同步流水线模块
+将同步拆分为多个阶段，阶段之间通过有界队列连接，每个阶段有独立的并发数，
+使网络请求和 CPU 处理可以重叠进行，同时限制内存中的在途数据量
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel
+
+
+# 阶段结束标记
+_DONE = object()
+
+
+class StageStats(BaseModel):
+    """单个阶段的运行统计"""
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """每秒处理的条目数"""
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """worker 忙碌时间占比，接近 1 说明该阶段是瓶颈"""
+        capacity = self.elapsed_seconds * self.workers
+        return self.busy_seconds / capacity if capacity else 0.0
+
+
+class Stage:
+    """流水线中的一个阶段"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        queue_size: int = 16,
+    ):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.stats = StageStats(name=name, workers=workers)
+
+    async def put(self, item: Any) -> None:
+        await self.queue.put(item)
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queue.qsize())
+
+
+class Pipeline:
+    """由有界队列连接的多阶段异步流水线
+
+    每个阶段的函数返回传给下一阶段的条目；返回 None 或抛出异常时该条目被丢弃。
+    """
+
+    def __init__(self, name: str = "sync"):
+        self.name = name
+        self.stages: List[Stage] = []
+        self.source_stats = StageStats(name="list", workers=1)
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        queue_size: int = 16,
+    ) -> "Pipeline":
+        self.stages.append(Stage(name, func, workers, queue_size))
+        return self
+
+    @property
+    def stats(self) -> List[StageStats]:
+        return [self.source_stats] + [stage.stats for stage in self.stages]
+
+    async def run(self, source: AsyncIterable[Any]) -> List[Any]:
+        """运行流水线，返回最后一个阶段产出的条目"""
+        results: List[Any] = []
+        started = time.perf_counter()
+
+        tasks = [asyncio.create_task(self._feed(source, started))]
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            tasks.append(asyncio.create_task(self._run_stage(stage, next_stage, results, started)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return results
+
+    async def _feed(self, source: AsyncIterable[Any], started: float) -> None:
+        """从数据源读取条目放入第一个阶段；队列满时自然形成背压"""
+        first = self.stages[0]
+        try:
+            async for item in source:
+                self.source_stats.processed += 1
+                await first.put(item)
+        finally:
+            self.source_stats.elapsed_seconds = time.perf_counter() - started
+            for _ in range(first.workers):
+                await first.queue.put(_DONE)
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        next_stage: Optional[Stage],
+        results: List[Any],
+        started: float,
+    ) -> None:
+        async def worker() -> None:
+            while True:
+                item = await stage.queue.get()
+                if item is _DONE:
+                    return
+
+                begin = time.perf_counter()
+                try:
+                    output = await stage.func(item)
+                except Exception as e:
+                    stage.stats.failed += 1
+                    print(f"[ERROR] {stage.name} 阶段处理失败 {item}: {e}")
+                    output = None
+                finally:
+                    stage.stats.busy_seconds += time.perf_counter() - begin
+
+                if output is None:
+                    continue
+                stage.stats.processed += 1
+                if next_stage is None:
+                    results.append(output)
+                else:
+                    await next_stage.put(output)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(stage.workers)))
+        finally:
+            stage.stats.elapsed_seconds = time.perf_counter() - started
+            if next_stage is not None:
+                for _ in range(next_stage.workers):
+                    await next_stage.queue.put(_DONE)
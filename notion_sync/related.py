@@ -0,0 +1,137 @@
+"""
+相关文章模块
+用搜索索引中每篇文章的词频计算 TF-IDF 向量，按余弦相似度为每篇文章找出最相关的几篇，
+写入 hugo/data/related.json 供模板读取，Hugo 构建时不再计算相关内容。需要 NumPy（可选依赖）
+"""
+
+import json
+import math
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+from .search_index import SearchDocument
+
+
+class RelatedPosts:
+    """相关文章计算
+
+    向量由搜索索引的词表构建：词表只在文章变化时重新生成（见 SearchIndex），
+    这里只需在索引有变化时重新计算相似度矩阵
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        count: int = 5,
+        min_score: float = 0.05,
+        max_features: int = 4096,
+        batch_size: int = 256,
+    ):
+        self.path = Path(path) if path else None
+        self.count = count
+        # 相似度低于此值的文章不作为相关文章
+        self.min_score = min_score
+        # 向量维数上限（按文档频率保留最常见的词）
+        self.max_features = max_features
+        # 每次矩阵乘法计算的文章数，限制相似度矩阵占用的内存
+        self.batch_size = batch_size
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None and self.path is not None
+
+    def exists(self) -> bool:
+        return self.path is not None and self.path.exists()
+
+    def compute(self, documents: Dict[str, SearchDocument]) -> Dict[str, List[Tuple[str, float]]]:
+        """计算每篇文章的相关文章：notion_id -> [(notion_id, 相似度), ...]，按相似度降序"""
+        ids = sorted(documents)
+        if len(ids) < 2:
+            return {}
+        matrix = self._vectorize([documents[notion_id].terms for notion_id in ids])
+
+        count = min(self.count, len(ids) - 1)
+        related = {}
+        for start in range(0, len(ids), self.batch_size):
+            scores = matrix[start:start + self.batch_size] @ matrix.T
+            rows = np.arange(scores.shape[0])
+            # 排除文章自身
+            scores[rows, rows + start] = -1.0
+            top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for row in rows:
+                related[ids[start + row]] = [
+                    (ids[column], round(float(score), 4))
+                    for column, score in zip(top[row], top_scores[row])
+                    if score >= self.min_score
+                ]
+        return related
+
+    def _vectorize(self, documents: List[Dict[str, int]]) -> "np.ndarray":
+        """TF-IDF 矩阵（每行一篇文章，已归一化）
+
+        只出现在一篇文章中的词对相似度没有贡献，出现在超过一半文章中的词区分度太低，都不计入
+        """
+        total = len(documents)
+        document_frequency = Counter(term for terms in documents for term in terms)
+        max_frequency = max(2, total // 2)
+        vocabulary = sorted(
+            (term for term, frequency in document_frequency.items() if 2 <= frequency <= max_frequency),
+            key=lambda term: (-document_frequency[term], term),
+        )[: self.max_features]
+        columns = {term: column for column, term in enumerate(vocabulary)}
+
+        matrix = np.zeros((total, max(1, len(vocabulary))), dtype=np.float32)
+        for row, terms in enumerate(documents):
+            items = [(columns[term], count) for term, count in terms.items() if term in columns]
+            if items:
+                indexes, counts = zip(*items)
+                matrix[row, list(indexes)] = 1.0 + np.log(np.array(counts, dtype=np.float32))
+
+        idf = np.array(
+            [math.log((1 + total) / (1 + document_frequency[term])) + 1.0 for term in vocabulary] or [0.0],
+            dtype=np.float32,
+        )
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def write(self, documents: Dict[str, SearchDocument], paths: Dict[str, str]) -> None:
+        """计算并写入 related.json：notion_id -> [{path, title, url, score}, ...]
+
+        paths 为参与计算的文章在 Hugo 中的路径（如 /posts/slug），模板用 site.GetPage 取得文章
+        """
+        if self.path is None:
+            return
+        documents = {notion_id: document for notion_id, document in documents.items() if notion_id in paths}
+        data = {
+            notion_id: [
+                {
+                    "path": paths[other],
+                    "title": documents[other].title,
+                    "url": documents[other].url,
+                    "score": score,
+                }
+                for other, score in related
+            ]
+            for notion_id, related in self.compute(documents).items()
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        print(f"[OK] 更新相关文章: {len(data)} 篇")
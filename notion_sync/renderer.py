@@ -0,0 +1,445 @@
+"""
+Markdown 渲染模块
+按 block 类型分派到注册的渲染函数，所有内容写入同一个输出缓冲区；
+嵌套内容通过行前缀（缩进或引用符号）直接写出，不再对子树文本做二次缩进
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+
+BlockHandler = Callable[["RenderContext", Dict[str, Any], Dict[str, Any]], None]
+
+# 子块需要缩进才能嵌套在列表项下
+LIST_INDENT = "    "
+
+# 连续出现时不需要空行分隔的列表类型
+LIST_TYPES = {"bulleted_list_item", "numbered_list_item", "to_do"}
+
+# 默认格式的富文本注解
+PLAIN_ANNOTATIONS = {
+    "bold": False,
+    "italic": False,
+    "strikethrough": False,
+    "underline": False,
+    "code": False,
+    "color": "default",
+}
+
+# Notion 的代码语言名与 Hugo（Chroma）语言名不同的部分
+CODE_LANGUAGES = {
+    "plain text": "text",
+    "c++": "cpp",
+    "c#": "csharp",
+    "f#": "fsharp",
+    "objective-c": "objectivec",
+    "visual basic": "vbnet",
+    "java/c/c++/c#": "text",
+}
+
+
+class Renderer(NamedTuple):
+    """已注册的 block 渲染函数"""
+    handler: BlockHandler
+    # 子块的行前缀；为 None 时由渲染函数自行处理子块
+    children_prefix: Optional[str]
+
+
+class RenderedPage(NamedTuple):
+    """渲染结果"""
+    markdown: str
+    # 是否包含公式（需要在页面上启用 KaTeX）
+    math: bool
+
+
+BLOCK_RENDERERS: Dict[str, Renderer] = {}
+
+
+def register(*block_types: str, children_prefix: Optional[str] = "") -> Callable[[BlockHandler], BlockHandler]:
+    """注册 block 渲染函数（装饰器）；同一类型后注册的覆盖先注册的"""
+
+    def decorator(handler: BlockHandler) -> BlockHandler:
+        for block_type in block_types:
+            BLOCK_RENDERERS[block_type] = Renderer(handler, children_prefix)
+        return handler
+
+    return decorator
+
+
+def render_rich_text(rich_text: Optional[List[Dict[str, Any]]], state: Optional["RenderState"] = None) -> str:
+    """把富文本转换为 Markdown
+
+    无格式、无链接的片段直接使用 plain_text；支持链接、提及（mention）和行内公式，
+    行内公式使用 \\( \\) 分隔（由 Hugo 的 passthrough 扩展原样输出给 KaTeX）
+    """
+    if not rich_text:
+        return ""
+
+    parts: List[str] = []
+    append = parts.append
+    for item in rich_text:
+        text = item.get("plain_text")
+        href = item.get("href")
+        annotations = item.get("annotations")
+        if text is None:
+            # 旧格式的数据没有 plain_text / href
+            text = item.get("text", {}).get("content", "")
+            link = item.get("text", {}).get("link")
+            href = link["url"] if link else None
+
+        if item.get("type") == "equation":
+            append(f"\\({item['equation']['expression']}\\)")
+            if state is not None:
+                state.math = True
+            continue
+        # 快速路径：默认格式、无链接的普通文本
+        if not href and (not annotations or annotations == PLAIN_ANNOTATIONS):
+            append(text)
+            continue
+
+        # 格式标记不能紧挨着空白，把首尾空白移到标记外；纯空白的片段不加标记
+        padded = not text or text[0].isspace() or text[-1].isspace()
+        core = text.strip() if padded else text
+        if not core:
+            append(text)
+            continue
+        if href:
+            core = f"[{core}]({href})"
+        if annotations:
+            if annotations.get("code"):
+                core = f"`{core}`"
+            if annotations.get("bold"):
+                core = f"**{core}**"
+            if annotations.get("italic"):
+                core = f"*{core}*"
+            if annotations.get("strikethrough"):
+                core = f"~~{core}~~"
+            if annotations.get("underline"):
+                core = f"<u>{core}</u>"
+        if padded:
+            append(text[:len(text) - len(text.lstrip())] + core + text[len(text.rstrip()):])
+        else:
+            append(core)
+
+    return "".join(parts)
+
+
+def plain_text(rich_text: Optional[List[Dict[str, Any]]]) -> str:
+    """富文本的纯文本（代码块等不需要格式的地方使用）"""
+    if not rich_text:
+        return ""
+    return "".join(
+        item["plain_text"] if "plain_text" in item else item.get("text", {}).get("content", "")
+        for item in rich_text
+    )
+
+
+class RenderState:
+    """一次渲染共享的状态"""
+
+    __slots__ = ("out", "math", "unsupported", "hosted")
+
+    def __init__(self) -> None:
+        self.out: List[str] = []
+        self.math = False
+        self.unsupported: set = set()
+        # 跳过的 Notion 托管文件（视频、音频、附件）
+        self.hosted: List[str] = []
+
+
+class RenderContext:
+    """某一嵌套层级的渲染上下文（共享输出缓冲区，带各自的行前缀）"""
+
+    __slots__ = ("renderer", "state", "prefix", "separator", "newline", "last_type", "_opening")
+
+    def __init__(
+        self,
+        renderer: "MarkdownRenderer",
+        state: RenderState,
+        prefix: str = "",
+        opening: str = "\n\n",
+    ):
+        self.renderer = renderer
+        self.state = state
+        self.prefix = prefix
+        # 块之间的空行（引用内的空行保留 ">"）和带前缀的换行
+        self.separator = "\n" + prefix.rstrip() + "\n"
+        self.newline = "\n" + prefix
+        self.last_type: Optional[str] = None
+        # 本层第一个块与外层内容之间的分隔（使用外层的前缀，避免相邻的引用合并）
+        self._opening = opening
+
+    def nested(self, prefix: str) -> "RenderContext":
+        return RenderContext(self.renderer, self.state, self.prefix + prefix, self.separator)
+
+    def rich_text(self, rich_text: Optional[List[Dict[str, Any]]]) -> str:
+        return render_rich_text(rich_text, self.state)
+
+    def write(self, text: str, block_type: Optional[str] = None) -> None:
+        """写出一个块级元素；与前一个元素之间用空行分隔（同类列表项之间不空行）"""
+        out = self.state.out
+        if out:
+            if self.last_type is None:
+                out.append(self._opening)
+            elif block_type == self.last_type and block_type in LIST_TYPES:
+                out.append("\n")
+            else:
+                out.append(self.separator)
+        if self.prefix:
+            out.append(self.prefix + text.replace("\n", self.newline))
+        else:
+            out.append(text)
+        self.last_type = block_type
+
+    def children(self, block: Dict[str, Any], prefix: str = "") -> None:
+        """渲染子块"""
+        children = block.get("children")
+        if children:
+            self.renderer.render_blocks(children, self.nested(prefix) if prefix else self)
+
+
+class MarkdownRenderer:
+    """Notion block 树的 Markdown 渲染器
+
+    默认使用模块级注册表 BLOCK_RENDERERS，可以通过 register 为单个实例覆盖或补充 block 类型
+    """
+
+    def __init__(self, renderers: Optional[Dict[str, Renderer]] = None):
+        self.renderers = dict(BLOCK_RENDERERS if renderers is None else renderers)
+        # 已提示过的不支持的 block 类型
+        self._warned: set = set()
+
+    def register(self, block_type: str, handler: BlockHandler, children_prefix: Optional[str] = "") -> None:
+        self.renderers[block_type] = Renderer(handler, children_prefix)
+
+    def render(self, blocks: List[Dict[str, Any]]) -> str:
+        return self.render_page(blocks).markdown
+
+    def render_page(self, blocks: List[Dict[str, Any]]) -> RenderedPage:
+        """渲染整页 block 树"""
+        state = RenderState()
+        self.render_blocks(blocks, RenderContext(self, state))
+
+        for block_type in state.unsupported - self._warned:
+            print(f"[WARNING] 不支持的 block 类型: {block_type}")
+        self._warned |= state.unsupported
+        if state.hosted:
+            print(
+                f"[WARNING] 跳过 {len(state.hosted)} 个 Notion 托管的文件（链接约一小时后失效，请改用外部链接）: "
+                + ", ".join(state.hosted)
+            )
+        return RenderedPage("".join(state.out), state.math)
+
+    def render_blocks(self, blocks: List[Dict[str, Any]], ctx: RenderContext) -> None:
+        renderers = self.renderers
+        for block in blocks:
+            block_type = block.get("type", "")
+            renderer = renderers.get(block_type)
+            if renderer is None:
+                ctx.state.unsupported.add(block_type)
+                continue
+
+            renderer.handler(ctx, block, block.get(block_type) or {})
+            prefix = renderer.children_prefix
+            if prefix is not None and "children" in block:
+                self.render_blocks(block["children"], ctx.nested(prefix) if prefix else ctx)
+
+
+# ---- 文本类 block ----
+
+@register("paragraph")
+def _paragraph(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    text = ctx.rich_text(data.get("rich_text"))
+    if text:
+        ctx.write(text, "paragraph")
+
+
+@register("heading_1", "heading_2", "heading_3")
+def _heading(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    text = ctx.rich_text(data.get("rich_text"))
+    if text:
+        level = int(block["type"][-1])
+        ctx.write(f"{'#' * level} {text}", block["type"])
+
+
+@register("bulleted_list_item", children_prefix=LIST_INDENT)
+def _bulleted_list_item(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    ctx.write(f"- {ctx.rich_text(data.get('rich_text'))}", "bulleted_list_item")
+
+
+@register("numbered_list_item", children_prefix=LIST_INDENT)
+def _numbered_list_item(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    ctx.write(f"1. {ctx.rich_text(data.get('rich_text'))}", "numbered_list_item")
+
+
+@register("to_do", children_prefix=LIST_INDENT)
+def _to_do(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    mark = "x" if data.get("checked") else " "
+    ctx.write(f"- [{mark}] {ctx.rich_text(data.get('rich_text'))}", "to_do")
+
+
+@register("quote", children_prefix=None)
+def _quote(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    quoted = ctx.nested("> ")
+    quoted.write(ctx.rich_text(data.get("rich_text")) or " ", "quote")
+    quoted.children(block)
+
+
+@register("callout", children_prefix=None)
+def _callout(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    icon = data.get("icon") or {}
+    emoji = icon.get("emoji", "") if icon.get("type") == "emoji" else ""
+    text = ctx.rich_text(data.get("rich_text"))
+    quoted = ctx.nested("> ")
+    quoted.write(f"{emoji} {text}".strip() or " ", "callout")
+    quoted.children(block)
+
+
+@register("toggle", children_prefix=None)
+def _toggle(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    ctx.write(f"<details>\n<summary>{ctx.rich_text(data.get('rich_text'))}</summary>", "toggle")
+    ctx.children(block)
+    ctx.write("</details>", "toggle")
+
+
+@register("code")
+def _code(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    code = plain_text(data.get("rich_text"))
+    if not code:
+        return
+    language = data.get("language", "")
+    language = CODE_LANGUAGES.get(language, language)
+    ctx.write(f"```{language}\n{code}\n```", "code")
+
+
+@register("equation")
+def _equation(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    expression = data.get("expression", "").strip()
+    if expression:
+        ctx.state.math = True
+        ctx.write(f"$$\n{expression}\n$$", "equation")
+
+
+@register("divider")
+def _divider(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    ctx.write("---", "divider")
+
+
+# ---- 媒体和链接 ----
+
+def _file_url(data: Dict[str, Any]) -> str:
+    """Notion 托管文件（file）或外部链接（external）的地址"""
+    return (data.get("file") or {}).get("url") or (data.get("external") or {}).get("url") or ""
+
+
+def _external_url(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> str:
+    """视频、音频和附件的外部链接
+
+    Notion 托管文件的地址是约一小时后失效的签名链接（只有图片会被下载到本地），
+    发布后会变成死链，因此跳过并在渲染完成后给出警告
+    """
+    if data.get("type") == "file" or (data.get("file") and not data.get("external")):
+        url = (data.get("file") or {}).get("url", "")
+        name = plain_text(data.get("caption")) or data.get("name") or urlparse(url).path.rsplit("/", 1)[-1]
+        ctx.state.hosted.append(f"{block['type']} {name}".strip())
+        return ""
+    return (data.get("external") or {}).get("url") or ""
+
+
+def _caption(ctx: RenderContext, data: Dict[str, Any]) -> str:
+    return ctx.rich_text(data.get("caption"))
+
+
+@register("image")
+def _image(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    url = _file_url(data)
+    if url:
+        # 方括号会破坏图片语法，也会影响后续的图片链接替换
+        alt = plain_text(data.get("caption")).replace("[", "").replace("]", "") or "image"
+        ctx.write(f"![{alt}]({url})", "image")
+
+
+# 视频网站的页面链接（站点配置中关闭了 YouTube / Vimeo 嵌入，直接输出链接）
+VIDEO_SITES = ("youtube.com", "youtu.be", "vimeo.com", "bilibili.com", "b23.tv")
+
+
+@register("video")
+def _video(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    url = _external_url(ctx, block, data)
+    if url:
+        host = urlparse(url).netloc.lower()
+        if host.endswith(VIDEO_SITES):
+            ctx.write(f"▶️ [{_caption(ctx, data) or url}]({url})", "video")
+        else:
+            ctx.write(f'<video controls preload="metadata" src="{url}"></video>', "video")
+
+
+@register("audio")
+def _audio(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    url = _external_url(ctx, block, data)
+    if url:
+        ctx.write(f'<audio controls preload="metadata" src="{url}"></audio>', "audio")
+
+
+@register("file", "pdf")
+def _file(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    url = _external_url(ctx, block, data)
+    if url:
+        name = _caption(ctx, data) or data.get("name") or urlparse(url).path.rsplit("/", 1)[-1] or url
+        ctx.write(f"📎 [{name}]({url})", block["type"])
+
+
+@register("bookmark", "link_preview", "embed")
+def _bookmark(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    url = data.get("url", "")
+    if url:
+        ctx.write(f"[{_caption(ctx, data) or url}]({url})", block["type"])
+
+
+# ---- 表格和布局 ----
+
+def _table_cell(ctx: RenderContext, cell: List[Dict[str, Any]]) -> str:
+    return ctx.rich_text(cell).replace("|", "\\|").replace("\n", "<br>")
+
+
+@register("table", children_prefix=None)
+def _table(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    rows = [
+        [_table_cell(ctx, cell) for cell in (row.get("table_row") or {}).get("cells", [])]
+        for row in block.get("children", [])
+        if row.get("type") == "table_row"
+    ]
+    if not rows:
+        return
+
+    width = max(data.get("table_width") or 0, max(len(row) for row in rows))
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    # Markdown 表格必须有表头；Notion 表格没有列标题时使用空表头
+    header = rows.pop(0) if data.get("has_column_header") else [""] * width
+
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|" + "---|" * width,
+    ]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows)
+    ctx.write("\n".join(lines), "table")
+
+
+@register("column_list", "column", "synced_block")
+def _container(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """只渲染子块的容器"""
+
+
+# 子页面、子数据库以及导航类 block 不输出内容
+@register(
+    "child_page",
+    "child_database",
+    "table_of_contents",
+    "breadcrumb",
+    "link_to_page",
+    "template",
+    "unsupported",
+    children_prefix=None,
+)
+def _skip(ctx: RenderContext, block: Dict[str, Any], data: Dict[str, Any]) -> None:
+    pass
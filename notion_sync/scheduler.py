@@ -0,0 +1,215 @@
+"""
+Notion 请求调度模块
+所有 Notion API 请求都经过令牌桶限速和优先级队列，并统一处理 429 与重试
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+import httpx
+from notion_client.errors import APIErrorCode, HTTPResponseError, RequestTimeoutError
+
+from .metrics import SyncMetrics
+
+
+T = TypeVar("T")
+
+# 可以重试的 Notion 错误码
+RETRYABLE_CODES = {
+    APIErrorCode.RateLimited,
+    APIErrorCode.InternalServerError,
+    APIErrorCode.ServiceUnavailable,
+    APIErrorCode.GatewayTimeout,
+}
+
+
+class RequestPriority(IntEnum):
+    """请求优先级，数值越小越先执行"""
+    LISTING = 0  # 文章列表查询
+    BLOCKS = 1   # 页面内容获取
+
+
+class TokenBucket:
+    """令牌桶限速器"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        # 收到 429 后在此时间之前暂停发放令牌
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """尝试取出一个令牌，返回需要等待的秒数（0 表示已取到）"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌（用于遵守 Retry-After）"""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0
+        self.updated_at = max(self.updated_at, self.paused_until)
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """解析错误响应中的 Retry-After 头（秒）"""
+    headers = getattr(error, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """判断请求错误是否值得重试"""
+    if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, HTTPResponseError):
+        return error.code in RETRYABLE_CODES or error.status == 429 or error.status >= 500
+    return False
+
+
+class RequestScheduler:
+    """Notion 请求调度器
+
+    - 令牌桶限制整体请求速率（Notion 约为每秒 3 次）
+    - 优先级队列让列表查询优先于 block 获取
+    - 遵守 Retry-After，并对可重试错误做带抖动的指数退避
+    """
+
+    def __init__(
+        self,
+        rate: float = 3.0,
+        burst: float = 3.0,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        metrics: Optional[SyncMetrics] = None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.metrics = metrics or SyncMetrics()
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._dispatcher: Optional[asyncio.TimerHandle] = None
+
+    async def submit(
+        self,
+        func: Callable[[], Awaitable[T]],
+        priority: RequestPriority = RequestPriority.BLOCKS,
+    ) -> T:
+        """按优先级排队执行请求，失败时按策略重试"""
+        attempt = 0
+        while True:
+            with self.metrics.timer("notion.queue_wait"):
+                await self._acquire(priority)
+            self.metrics.incr("notion_requests")
+            try:
+                with self.metrics.timer("notion.request"):
+                    return await func()
+            except Exception as error:
+                if getattr(error, "status", None) == 429:
+                    self.metrics.incr("notion_rate_limited")
+                if attempt >= self.max_retries or not is_retryable(error):
+                    self.metrics.incr("notion_errors")
+                    raise
+
+                delay = self._retry_delay(error, attempt)
+                attempt += 1
+                self.metrics.incr("notion_retries")
+                print(f"[WARNING] Notion 请求失败，{delay:.1f} 秒后第 {attempt} 次重试: {error}")
+            finally:
+                self._release()
+
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """计算重试等待时间；429 时同时暂停所有请求"""
+        retry_after = parse_retry_after(error)
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay) + random.uniform(0, 0.5)
+            self.bucket.pause(delay)
+            return delay
+
+        # 全抖动指数退避
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if getattr(error, "status", None) == 429:
+            self.bucket.pause(delay)
+        return delay
+
+    async def _acquire(self, priority: RequestPriority) -> None:
+        """等待并发槽位和令牌"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已经分配到槽位但调用方被取消
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """在有空闲槽位和令牌时唤醒优先级最高的等待者"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+        while self._waiters and self._running < self.concurrency:
+            _, _, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+
+            delay = self.bucket.delay()
+            if delay > 0:
+                loop = asyncio.get_running_loop()
+                self._dispatcher = loop.call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            self._running += 1
+            future.set_result(None)
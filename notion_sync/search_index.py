@@ -0,0 +1,338 @@
+"""
+站内搜索索引模块
+同步时为文章建立倒排索引（词 -> 文章及权重），中文按相邻两字（bigram）切分；
+索引按词的哈希拆成多个小文件写入 hugo/static/search，搜索页只下载输入的词所在的分片。
+每次同步只重写变化文章涉及的分片
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from .notion_client import NotionPost
+
+
+INDEX_VERSION = 1
+
+# 字母数字词（含带变音符号的拉丁字母）和连续的中日韩字符
+TOKEN_PATTERN = re.compile(r"[0-9a-z\u00df-\u00f6\u00f8-\u024f]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+")
+
+# 标题和标签中的词权重更高
+TITLE_WEIGHT = 5
+TAG_WEIGHT = 3
+
+# 摘要的最大长度（字符）
+SUMMARY_LENGTH = 120
+
+
+def tokenize(text: str) -> List[str]:
+    """切分文本：英文和数字按词（至少 2 个字符），中日韩文字按相邻两字切分（单字成词时保留单字）
+
+    搜索页的 JavaScript 使用相同的规则切分查询
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if token[0] < "\u3040":
+            if len(token) > 1:
+                tokens.append(token)
+        elif len(token) == 1:
+            tokens.append(token)
+        else:
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+@lru_cache(maxsize=65536)
+def term_shard(term: str, shards: int) -> int:
+    """词所在的分片（UTF-8 字节的 32 位 FNV-1a 哈希）"""
+    value = 0x811C9DC5
+    for byte in term.encode("utf-8"):
+        value = ((value ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return value % shards
+
+
+def blocks_text(blocks: List[Dict[str, Any]]) -> str:
+    """提取 block 树中的纯文本（正文、代码、图片说明和表格）"""
+    parts: List[str] = []
+
+    def walk(blocks: List[Dict[str, Any]]) -> None:
+        for block in blocks:
+            data = block.get(block.get("type", "")) or {}
+            for key in ("rich_text", "caption"):
+                for item in data.get(key) or ():
+                    parts.append(item.get("plain_text", ""))
+            for cell in data.get("cells") or ():
+                for item in cell:
+                    parts.append(item.get("plain_text", ""))
+            if block.get("children"):
+                walk(block["children"])
+            parts.append("\n")
+
+    walk(blocks)
+    return "".join(parts)
+
+
+class SearchDocument(BaseModel):
+    """一篇已索引的文章"""
+    doc_id: int
+    url: str
+    title: str
+    date: str
+    summary: str
+    # 词 -> 权重
+    terms: Dict[str, int] = Field(default_factory=dict)
+
+    def listing(self) -> List[str]:
+        """搜索结果中显示的字段"""
+        return [self.url, self.title, self.date, self.summary]
+
+
+class SearchIndex:
+    """增量维护的分片搜索索引
+
+    状态文件保存每篇文章的词表，用于在文章变化或删除时从分片中移除旧的词；
+    output_dir 为空时只更新状态文件（分片同步时由 merge 统一写出）
+    """
+
+    def __init__(
+        self,
+        state_path: Path,
+        output_dir: Optional[Path],
+        shards: int = 64,
+        doc_chunk: int = 128,
+        documents: Optional[Dict[str, SearchDocument]] = None,
+        next_id: int = 0,
+    ):
+        self.state_path = Path(state_path)
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.shards = shards
+        self.doc_chunk = doc_chunk
+        # notion_id -> 文章
+        self.documents: Dict[str, SearchDocument] = documents or {}
+        self.next_id = next_id
+        # 需要重写的词分片和文章列表分块
+        self._dirty_shards: Set[int] = set()
+        self._dirty_chunks: Set[int] = set()
+        self._rebuild = False
+
+    @classmethod
+    def load(cls, state_path: Path, output_dir: Optional[Path], shards: int = 64, doc_chunk: int = 128) -> "SearchIndex":
+        """加载索引状态；状态不存在、损坏或分片参数变化时重新生成全部分片"""
+        state_path = Path(state_path)
+        index = cls(state_path, output_dir, shards, doc_chunk)
+        if not state_path.exists():
+            index.rebuild()
+            return index
+
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                print(f"[WARNING] 搜索索引版本不匹配，将重新生成: {state_path}")
+                index.rebuild()
+                return index
+            index.documents = {
+                notion_id: SearchDocument(**document)
+                for notion_id, document in data.get("documents", {}).items()
+            }
+            index.next_id = data.get("next_id", 0)
+        except Exception as e:
+            print(f"[WARNING] 读取搜索索引失败，将重新生成: {e}")
+            index.rebuild()
+            return index
+
+        if data.get("shards") != shards or data.get("doc_chunk") != doc_chunk:
+            index.rebuild()
+        elif not index._output_complete():
+            # 状态文件还在而输出目录丢失（例如 CI 只缓存了 hugo/.notion_sync）
+            print(f"[WARNING] 搜索索引文件不完整，将重新生成: {output_dir}")
+            index.rebuild()
+        return index
+
+    def _output_complete(self) -> bool:
+        """输出目录中是否有 meta.json、全部词分片和全部文章分块"""
+        if self.output_dir is None:
+            return True
+        paths = [self.output_dir / "meta.json"]
+        paths.extend(self.output_dir / "terms" / f"{shard}.json" for shard in range(self.shards))
+        chunks = {document.doc_id // self.doc_chunk for document in self.documents.values()}
+        paths.extend(self.output_dir / "docs" / f"{chunk}.json" for chunk in chunks)
+        return all(path.exists() for path in paths)
+
+    def rebuild(self) -> None:
+        """标记全部分片需要重新生成"""
+        self._dirty_shards = set(range(self.shards))
+        self._dirty_chunks = {document.doc_id // self.doc_chunk for document in self.documents.values()}
+        self._rebuild = True
+
+    @property
+    def changed(self) -> bool:
+        """上次保存后是否有变化"""
+        return bool(self._rebuild or self._dirty_shards or self._dirty_chunks)
+
+    def is_missing(self, post: NotionPost) -> bool:
+        """已发布的文章是否还没有索引（首次启用搜索索引时需要补充生成）"""
+        return post.is_published() and post.id not in self.documents
+
+    def update(self, post: NotionPost, text: str) -> None:
+        """索引一篇文章；草稿从索引中移除"""
+        if not post.is_published():
+            self.remove(post.id)
+            return
+
+        terms: Dict[str, int] = {}
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0) + 1
+        for token in tokenize(post.title):
+            terms[token] = terms.get(token, 0) + TITLE_WEIGHT
+        for tag in post.tags:
+            for token in tokenize(tag):
+                terms[token] = terms.get(token, 0) + TAG_WEIGHT
+
+        summary = post.excerpt or " ".join(text.split())
+        self.put(
+            post.id,
+            SearchDocument(
+                doc_id=-1,
+                url=f"/{post.slug}/",
+                title=post.title,
+                date=post.date,
+                summary=summary[:SUMMARY_LENGTH],
+                terms=terms,
+            ),
+        )
+
+    def put(self, notion_id: str, document: SearchDocument) -> None:
+        """写入文章；内容未变化时不标记任何分片"""
+        previous = self.documents.get(notion_id)
+        if previous is not None:
+            document = document.model_copy(update={"doc_id": previous.doc_id})
+            if document == previous:
+                return
+        else:
+            document = document.model_copy(update={"doc_id": self.next_id})
+            self.next_id += 1
+
+        self.documents[notion_id] = document
+        self._dirty_chunks.add(document.doc_id // self.doc_chunk)
+        self._mark_terms(document.terms, previous.terms if previous else {})
+
+    def remove(self, notion_id: str) -> None:
+        """从索引中移除文章"""
+        previous = self.documents.pop(notion_id, None)
+        if previous is None:
+            return
+        self._dirty_chunks.add(previous.doc_id // self.doc_chunk)
+        self._mark_terms({}, previous.terms)
+
+    def subset(self, state_path: Path, notion_ids: Iterable[str]) -> "SearchIndex":
+        """只包含指定文章的索引（不写出分片，用于分片同步）"""
+        documents = {
+            notion_id: self.documents[notion_id] for notion_id in notion_ids if notion_id in self.documents
+        }
+        return SearchIndex(state_path, None, self.shards, self.doc_chunk, documents, self.next_id)
+
+    def merge(self, other: "SearchIndex", notion_ids: Iterable[str]) -> None:
+        """合并另一个索引（分片同步）中指定文章的记录，文章 ID 由本索引重新分配"""
+        for notion_id in notion_ids:
+            document = other.documents.get(notion_id)
+            if document is not None:
+                self.put(notion_id, document)
+            else:
+                # 在分片中变为草稿的文章
+                self.remove(notion_id)
+
+    def _mark_terms(self, terms: Dict[str, int], previous: Dict[str, int]) -> None:
+        """标记权重发生变化的词所在的分片"""
+        for term in terms.keys() | previous.keys():
+            if terms.get(term) != previous.get(term):
+                self._dirty_shards.add(term_shard(term, self.shards))
+
+    def save(self) -> None:
+        """写出变化的分片和状态文件"""
+        if self.output_dir is not None:
+            self._write_output(self.output_dir)
+
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": INDEX_VERSION,
+            "shards": self.shards,
+            "doc_chunk": self.doc_chunk,
+            "next_id": self.next_id,
+            "documents": {
+                notion_id: document.model_dump()
+                for notion_id, document in sorted(self.documents.items())
+            },
+        }
+        _write_json(self.state_path, data)
+
+    def _write_output(self, output_dir: Path) -> None:
+        if self._rebuild:
+            # 删除分片数变化后多余的文件
+            for path in (output_dir / "terms").glob("*.json"):
+                path.unlink()
+            self._rebuild = False
+        if self._dirty_shards:
+            self._write_shards(output_dir, self._dirty_shards)
+
+        if self._dirty_chunks:
+            by_chunk: Dict[int, Dict[str, List[str]]] = {chunk: {} for chunk in self._dirty_chunks}
+            for document in self.documents.values():
+                chunk = document.doc_id // self.doc_chunk
+                if chunk in by_chunk:
+                    by_chunk[chunk][str(document.doc_id)] = document.listing()
+            for chunk, listings in by_chunk.items():
+                path = output_dir / "docs" / f"{chunk}.json"
+                if listings:
+                    _write_json(path, listings, compact=True)
+                else:
+                    path.unlink(missing_ok=True)
+
+        _write_json(
+            output_dir / "meta.json",
+            {
+                "version": INDEX_VERSION,
+                "shards": self.shards,
+                "doc_chunk": self.doc_chunk,
+                "documents": len(self.documents),
+            },
+            compact=True,
+        )
+        self._dirty_shards.clear()
+        self._dirty_chunks.clear()
+
+    def _write_shards(self, output_dir: Path, shards: Set[int]) -> None:
+        """按状态中的词表重写指定的词分片：{词: [文章 ID, 权重, 文章 ID, 权重, ...]}，按权重降序"""
+        postings: Dict[int, Dict[str, List[Tuple[int, int]]]] = {shard: {} for shard in shards}
+        for document in self.documents.values():
+            for term, weight in document.terms.items():
+                terms = postings.get(term_shard(term, self.shards))
+                if terms is not None:
+                    terms.setdefault(term, []).append((-weight, document.doc_id))
+
+        # 没有词的分片也写出空文件，使输出目录是否完整可以检查，搜索页也不会请求到 404
+        for shard, terms in postings.items():
+            path = output_dir / "terms" / f"{shard}.json"
+            data: Dict[str, List[int]] = {}
+            for term, entries in sorted(terms.items()):
+                entries.sort()
+                data[term] = [value for weight, doc_id in entries for value in (doc_id, -weight)]
+            _write_json(path, data, compact=True)
+
+
+def _write_json(path: Path, data: Any, compact: bool = False) -> None:
+    """原子写入 JSON 文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if compact:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,180 @@
+"""
+分片同步模块
+按 notion_id 的哈希把文章分到 n 个分片，每个分片独立同步（可在多个进程或 CI 任务中并行），
+各自写入分片的同步清单、图片索引、搜索索引和文章列表；merge 时合并到主清单并统一清理
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import List, Set, Tuple
+
+from pydantic import BaseModel
+
+from .config import HugoConfig
+from .image_index import ImageIndex
+from .manifest import SyncManifest
+from .search_index import SearchIndex
+
+
+class ShardSpec(BaseModel):
+    """分片编号（从 1 开始）和分片总数"""
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> "ShardSpec":
+        """解析 "i/n" 形式的分片参数"""
+        index, sep, count = value.partition("/")
+        try:
+            shard = cls(index=int(index), count=int(count))
+        except ValueError:
+            raise ValueError(f"无效的分片: {value}（应为 i/n，如 1/4）")
+        if not sep or not 1 <= shard.index <= shard.count:
+            raise ValueError(f"无效的分片: {value}（应为 i/n，且 1 <= i <= n）")
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @property
+    def name(self) -> str:
+        return f"{self.index}-of-{self.count}"
+
+    def contains(self, notion_id: str) -> bool:
+        """文章是否属于本分片（与 ID 是否带连字符、大小写无关）"""
+        return shard_of(notion_id, self.count) == self.index
+
+    def state_dir(self, config: HugoConfig) -> Path:
+        return config.shards_dir / self.name
+
+
+def shard_of(notion_id: str, count: int) -> int:
+    """文章所属的分片编号（1..count）"""
+    digest = hashlib.sha256(notion_id.replace("-", "").lower().encode("ascii")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+class ShardState(BaseModel):
+    """分片同步完成后写入的状态：本分片当前的全部文章"""
+    index: int
+    count: int
+    posts: List[str]
+    synced_at: str
+
+    @classmethod
+    def load(cls, path: Path) -> "ShardState":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: Path) -> None:
+        """原子写入状态文件"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.model_dump(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+STATE_FILE = "shard.json"
+
+
+def shard_config(config: HugoConfig, shard: ShardSpec) -> HugoConfig:
+    """分片使用的 Hugo 配置：清单、图片索引和搜索索引状态写入分片目录，搜索索引分片和相关文章由 merge 写出
+
+    分片目录还没有清单时，从主清单和主搜索索引中取出本分片的文章、复制主图片索引，
+    使分片同步仍然是增量的
+    """
+    state_dir = shard.state_dir(config)
+    shard_hugo = config.model_copy(
+        update={
+            "manifest_path": state_dir / "manifest.json",
+            "image_index_path": state_dir / "images.json",
+            "search_state_path": state_dir / "search.json",
+            "search_dir": None,
+            "related_path": None,
+        }
+    )
+
+    if not shard_hugo.manifest_path.exists() and config.manifest_path.exists():
+        manifest = SyncManifest.load(config.manifest_path)
+        entries = {
+            notion_id: entry for notion_id, entry in manifest.entries.items() if shard.contains(notion_id)
+        }
+        SyncManifest(shard_hugo.manifest_path, entries).save()
+    if not shard_hugo.image_index_path.exists() and config.image_index_path.exists():
+        state_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(config.image_index_path, shard_hugo.image_index_path)
+    if not shard_hugo.search_state_path.exists() and config.search_state_path.exists():
+        search_index = SearchIndex.load(config.search_state_path, None, config.search_shards)
+        notion_ids = [notion_id for notion_id in search_index.documents if shard.contains(notion_id)]
+        search_index.subset(shard_hugo.search_state_path, notion_ids).save()
+    return shard_hugo
+
+
+def load_shard_states(config: HugoConfig) -> List[Tuple[Path, ShardState]]:
+    """读取所有分片的状态，分片不完整（缺少分片或总数不一致）时抛出 ValueError"""
+    if not config.shards_dir.exists():
+        raise ValueError(f"没有找到分片输出: {config.shards_dir}")
+
+    states = []
+    for state_dir in sorted(config.shards_dir.iterdir()):
+        if not state_dir.is_dir():
+            continue
+        state_path = state_dir / STATE_FILE
+        if not state_path.exists():
+            raise ValueError(f"分片 {state_dir.name} 没有完成同步")
+        states.append((state_dir, ShardState.load(state_path)))
+    if not states:
+        raise ValueError(f"没有找到分片输出: {config.shards_dir}")
+
+    count = states[0][1].count
+    if any(state.count != count for _, state in states):
+        raise ValueError("各分片的分片总数不一致")
+    indexes = [state.index for _, state in states]
+    if len(set(indexes)) != len(indexes):
+        raise ValueError("存在重复的分片输出")
+    missing = sorted(set(range(1, count + 1)) - set(indexes))
+    if missing:
+        raise ValueError(f"缺少分片: {', '.join(f'{index}/{count}' for index in missing)}")
+    return states
+
+
+def merge_shard_outputs(
+    manifest: SyncManifest,
+    image_index: ImageIndex,
+    search_index: SearchIndex,
+    states: List[Tuple[Path, ShardState]],
+) -> Tuple[Set[str], List[str]]:
+    """把分片的清单、图片索引和搜索索引合并到主清单、主图片索引和主搜索索引
+
+    返回当前全部文章的 ID，以及因 slug 变化而不再使用的旧文章文件
+    """
+    current_ids: Set[str] = set()
+    stale_files: List[str] = []
+
+    for state_dir, state in states:
+        current_ids.update(state.posts)
+        shard_manifest = SyncManifest.load(state_dir / "manifest.json")
+        for notion_id in state.posts:
+            entry = shard_manifest.get(notion_id)
+            if entry is None:
+                continue
+            previous = manifest.put(entry)
+            if previous and previous.path != entry.path:
+                stale_files.append(previous.path)
+
+        shard_index = ImageIndex.load(state_dir / "images.json", image_index.images_dir)
+        image_index.merge(shard_index)
+
+        shard_search = SearchIndex.load(state_dir / "search.json", None, search_index.shards)
+        search_index.merge(shard_search, state.posts)
+
+    return current_ids, stale_files
+
+
+def remove_shard_outputs(config: HugoConfig) -> None:
+    """合并完成后删除分片目录，避免下次合并时混入旧的分片输出"""
+    shutil.rmtree(config.shards_dir, ignore_errors=True)
@@ -0,0 +1,98 @@
+"""
+watch 模式
+常驻进程定期查询自上次游标之后编辑过的文章，只同步这些文章；
+连接池、同步清单和图片索引在多次同步之间保持在内存中
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+from .config import WatchConfig
+
+if TYPE_CHECKING:
+    from .main import BlogSyncer
+
+
+class SyncWatcher:
+    """轮询 Notion 的增量同步器"""
+
+    def __init__(self, syncer: "BlogSyncer", config: WatchConfig):
+        self.syncer = syncer
+        self.config = config
+        # 增量查询的游标（已处理文章中最新的编辑时间）
+        self.cursor: Optional[str] = None
+        self._last_full_sync = 0.0
+        self._changed = asyncio.Event()
+
+    async def run(self) -> None:
+        """持续运行直到被取消"""
+        hook_task = asyncio.create_task(self._hook_worker()) if self.config.hook else None
+        try:
+            while True:
+                await self.poll()
+                await asyncio.sleep(self.config.interval)
+        finally:
+            if hook_task:
+                hook_task.cancel()
+
+    async def poll(self) -> None:
+        """执行一次同步：定期全量同步以清理已删除的文章，其余时间只同步游标之后的编辑"""
+        full = self.cursor is None or time.monotonic() - self._last_full_sync >= self.config.full_sync_interval
+        started = datetime.now(timezone.utc)
+
+        if full:
+            success = await self.syncer.sync()
+        else:
+            success = await self.syncer.sync(edited_since=self.cursor)
+
+        result = self.syncer.last_result
+        if result is None:
+            # 同步中途出错，游标不前进，下一轮重试
+            return
+        if full:
+            self._last_full_sync = time.monotonic()
+        if result.latest_edited_time:
+            self.cursor = max(self.cursor or "", result.latest_edited_time)
+        elif self.cursor is None:
+            self.cursor = started.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        if result.retry_edited_time:
+            # 游标退回到最早失败的文章（查询包含等于游标的编辑时间），下一轮重新列出这些文章
+            self.cursor = min(self.cursor, result.retry_edited_time)
+        if not success:
+            print(f"[WARNING] 部分文章同步失败，下一轮从 {self.cursor} 开始重试")
+
+        # 只有文件确实发生变化时才需要重新构建
+        if result.written:
+            print(f"[OK] 更新了 {result.written} 个文章文件")
+            self._changed.set()
+
+    async def _hook_worker(self) -> None:
+        """防抖运行钩子：最后一次变化后 debounce 秒内没有新变化才运行"""
+        while True:
+            await self._changed.wait()
+            while True:
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), self.config.debounce)
+                except asyncio.TimeoutError:
+                    break
+            await self._run_hook()
+
+    async def _run_hook(self) -> None:
+        hook = self.config.hook
+        if not hook:
+            return
+        print(f"运行钩子: {hook}")
+        try:
+            process = await asyncio.create_subprocess_shell(hook)
+            returncode = await process.wait()
+        except Exception as e:
+            print(f"[ERROR] 钩子运行失败: {e}")
+            return
+
+        if returncode == 0:
+            print("[OK] 钩子运行完成")
+        else:
+            print(f"[ERROR] 钩子退出码: {returncode}")
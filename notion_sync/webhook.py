@@ -0,0 +1,210 @@
+"""
+webhook 接收服务
+接收 Notion webhook / 自动化推送的页面事件，校验共享密钥后排队同步单个页面；
+短时间内同一页面的多次事件合并为一次同步
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .config import ServeConfig
+from .notion_client import parse_page_id
+
+if TYPE_CHECKING:
+    from .main import BlogSyncer
+
+
+HTTP_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+class WebhookError(Exception):
+    """请求无法处理，带 HTTP 状态码"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def extract_page_ids(payload: Dict[str, Any]) -> List[str]:
+    """从事件中提取页面 ID，统一为带连字符的小写形式（与同步清单的键一致）
+
+    无效的 ID 会被忽略
+    """
+    page_ids = []
+    for value in _raw_page_ids(payload):
+        try:
+            page_ids.append(parse_page_id(value))
+        except ValueError:
+            print(f"[WARNING] 忽略无效的页面 ID: {value}")
+    return page_ids
+
+
+def _raw_page_ids(payload: Dict[str, Any]) -> List[str]:
+    """事件中的原始页面 ID
+
+    支持 Notion webhook（{"type": "page.*", "entity": {"type": "page", "id": ...}}）、
+    数据库自动化的 "发送 webhook"（{"data": {"object": "page", "id": ...}}）
+    以及手动发送的 {"page_id": ...} / {"page_ids": [...]}
+    """
+    entity = payload.get("entity")
+    if isinstance(entity, dict):
+        return [entity["id"]] if entity.get("type") == "page" and entity.get("id") else []
+
+    data = payload.get("data")
+    if isinstance(data, dict) and data.get("object") == "page" and data.get("id"):
+        return [data["id"]]
+
+    if isinstance(payload.get("page_id"), str) and payload["page_id"]:
+        return [payload["page_id"]]
+    page_ids = payload.get("page_ids")
+    if isinstance(page_ids, list):
+        return [page_id for page_id in page_ids if isinstance(page_id, str) and page_id]
+    return []
+
+
+class WebhookServer:
+    """webhook 接收服务"""
+
+    def __init__(self, syncer: "BlogSyncer", config: ServeConfig):
+        self.syncer = syncer
+        self.config = config
+        # 等待同步的页面（保持到达顺序）
+        self._pending: Dict[str, None] = {}
+        self._has_pending = asyncio.Event()
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.config.host, self.config.port)
+        print(f"[OK] webhook 服务已启动: http://{self.config.host}:{self.port}/webhook")
+
+    @property
+    def port(self) -> int:
+        """实际监听的端口（配置为 0 时由系统分配）"""
+        if self._server is None:
+            raise RuntimeError("webhook 服务尚未启动")
+        port: int = self._server.sockets[0].getsockname()[1]
+        return port
+
+    async def run(self) -> None:
+        """启动服务并持续处理队列，直到被取消"""
+        await self.start()
+        try:
+            await self._worker()
+        finally:
+            if self._server is not None:
+                self._server.close()
+                await self._server.wait_closed()
+
+    def enqueue(self, page_ids: List[str]) -> None:
+        """排队同步页面；已在队列中的页面不重复添加"""
+        for page_id in page_ids:
+            self._pending[page_id] = None
+        if self._pending:
+            self._has_pending.set()
+
+    async def _worker(self) -> None:
+        """合并一段时间内的事件后同步"""
+        while True:
+            await self._has_pending.wait()
+            await asyncio.sleep(self.config.coalesce)
+
+            page_ids = list(self._pending)
+            self._pending.clear()
+            self._has_pending.clear()
+
+            print(f"同步 {len(page_ids)} 个页面: {', '.join(page_ids)}")
+            if not await self.syncer.sync(page_ids=page_ids):
+                print("[ERROR] 页面同步失败")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, body = await self._respond(reader)
+        except WebhookError as e:
+            status, body = e.status, {"error": str(e)}
+        except (asyncio.IncompleteReadError, ValueError) as e:
+            status, body = 400, {"error": f"无效的请求: {e}"}
+
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("ascii")
+            + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, Any]]:
+        method, path, headers = await self._read_head(reader)
+
+        if path == "/health":
+            return 200, {"status": "ok", "pending": len(self._pending)}
+        if path != "/webhook":
+            raise WebhookError(404, "未知路径")
+        if method != "POST":
+            raise WebhookError(405, "只接受 POST 请求")
+
+        length = int(headers.get("content-length", "0"))
+        if length > self.config.max_body_bytes:
+            raise WebhookError(413, "请求体过大")
+        raw = await reader.readexactly(length)
+        payload = json.loads(raw or b"{}")
+        if not isinstance(payload, dict):
+            raise WebhookError(400, "请求体必须是 JSON 对象")
+
+        # 创建 Notion webhook 订阅时发送的验证请求：其中的 token 即签名密钥
+        if "verification_token" in payload:
+            print(f"[WARNING] 收到 Notion webhook 验证请求，请将 NOTION_WEBHOOK_SECRET 设置为: {payload['verification_token']}")
+            return 200, {"status": "verification received"}
+
+        if not self._verify(headers, raw):
+            raise WebhookError(401, "签名校验失败")
+
+        page_ids = extract_page_ids(payload)
+        self.enqueue(page_ids)
+        return 202, {"queued": page_ids}
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str]]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, target, _ = request_line.split(" ", 2)
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method.upper(), target.split("?")[0], headers
+
+    def _verify(self, headers: Dict[str, str], body: bytes) -> bool:
+        """校验共享密钥
+
+        Notion webhook 使用 X-Notion-Signature: sha256=<HMAC-SHA256(body)>；
+        自动化等无法签名的来源可以在 X-Webhook-Secret 或 Authorization: Bearer 中直接携带密钥
+        """
+        secret = self.config.secret
+        if not secret:
+            return False
+
+        signature = headers.get("x-notion-signature", "")
+        if signature:
+            expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            return hmac.compare_digest(signature.encode(), expected.encode())
+
+        token = headers.get("x-webhook-secret") or headers.get("authorization", "").removeprefix("Bearer ")
+        return bool(token) and hmac.compare_digest(token.encode(), secret.encode())
@@ -0,0 +1,101 @@
+"""
+按同步清单清理已删除的文章和无用图片的测试
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from notion_sync.config import HugoConfig, NotionConfig, SyncConfig
+from notion_sync.fake_notion import FakeNotionTransport, FakeWorkspace, _rich_text
+from notion_sync.main import BlogSyncer
+
+
+@pytest.fixture
+def workspace() -> FakeWorkspace:
+    return FakeWorkspace.synthesize(pages=6, blocks_per_page=3, depth=1, images_per_page=1)
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch) -> SyncConfig:
+    monkeypatch.chdir(tmp_path)
+    hugo = HugoConfig(
+        content_dir=tmp_path / "content/posts",
+        pages_dir=tmp_path / "content",
+        static_dir=tmp_path / "static",
+        images_dir=tmp_path / "static/images",
+        manifest_path=tmp_path / ".notion_sync/manifest.json",
+        image_index_path=tmp_path / ".notion_sync/images.json",
+        shards_dir=tmp_path / ".notion_sync/shards",
+        search_state_path=tmp_path / ".notion_sync/search.json",
+        search_dir=tmp_path / "static/search",
+        related_path=None,
+    )
+    notion = NotionConfig(token="test-token", database_id="fake-database", rate_limit=100.0, cache_path=None)
+    return SyncConfig(notion=notion, hugo=hugo)
+
+
+def sync(config: SyncConfig, workspace: FakeWorkspace, clean: bool = False) -> BlogSyncer:
+    syncer = BlogSyncer(config, transport=FakeNotionTransport(workspace))
+
+    async def run():
+        try:
+            assert await syncer.sync()
+            if clean:
+                syncer.hugo_generator.clean_unused_images()
+        finally:
+            await syncer.aclose()
+
+    asyncio.run(run())
+    return syncer
+
+
+def test_deleted_post_and_its_images_are_removed(config, workspace):
+    manifest = sync(config, workspace).hugo_generator.manifest
+    deleted = workspace.pages[0]
+    entry = manifest.get(deleted["id"])
+    assert entry is not None and Path(entry.path).exists()
+    own_images = set(entry.images) - {
+        image for other in manifest.entries.values() if other.notion_id != deleted["id"] for image in other.images
+    }
+    assert own_images
+
+    workspace.pages.remove(deleted)
+    manifest = sync(config, workspace, clean=True).hugo_generator.manifest
+
+    assert manifest.get(deleted["id"]) is None
+    assert not Path(entry.path).exists()
+    images_dir = config.hugo.images_dir
+    for image in own_images:
+        assert not (images_dir / image).exists()
+    for other in manifest.entries.values():
+        assert Path(other.path).exists()
+        for image in other.images:
+            assert (images_dir / image).exists()
+
+
+def test_page_images_are_kept(config, workspace):
+    page = workspace.pages[1]
+    page["properties"]["Type"]["select"]["name"] = "Page"
+    manifest = sync(config, workspace).hugo_generator.manifest
+    entry = manifest.get(page["id"])
+    assert entry is not None and Path(entry.path).parent == config.hugo.pages_dir
+    assert entry.images
+
+    # 再次同步并清理图片，页面引用的图片不能被删除
+    sync(config, workspace, clean=True)
+    for image in entry.images:
+        assert (config.hugo.images_dir / image).exists()
+
+
+def test_slug_change_removes_old_file(config, workspace):
+    page = workspace.pages[2]
+    old_path = Path(sync(config, workspace).hugo_generator.manifest.get(page["id"]).path)
+
+    page["properties"]["Slug"]["rich_text"] = [_rich_text("renamed-post")]
+    workspace.touch(page["id"])
+    new_path = Path(sync(config, workspace).hugo_generator.manifest.get(page["id"]).path)
+
+    assert new_path.name == "renamed-post.md" and new_path.exists()
+    assert not old_path.exists()
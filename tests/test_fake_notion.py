@@ -0,0 +1,56 @@
+"""
+RecordingTransport 测试
+"""
+
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from notion_sync.fake_notion import FakeWorkspace, RecordingTransport
+
+
+PAGE = {
+    "object": "page",
+    "id": "page-1",
+    "last_edited_time": "2024-01-01T00:00:00.000Z",
+    "properties": {},
+}
+
+
+def gzip_notion_api(request: httpx.Request) -> httpx.Response:
+    """返回 gzip 压缩响应的 Notion API（与真实接口一样）"""
+    if request.url.path == "/v1/search":
+        data = {"object": "list", "results": [PAGE], "has_more": False, "next_cursor": None}
+    else:
+        data = {"object": "list", "results": [{"id": "block-1", "type": "divider"}], "has_more": False}
+    body = gzip.compress(json.dumps(data).encode("utf-8"))
+    return httpx.Response(
+        200,
+        headers={
+            "content-type": "application/json; charset=utf-8",
+            "content-encoding": "gzip",
+            "content-length": str(len(body)),
+        },
+        content=body,
+    )
+
+
+def test_recording_gzip_response(tmp_path):
+    recorder = RecordingTransport(tmp_path, inner=httpx.MockTransport(gzip_notion_api))
+
+    async def run():
+        async with httpx.AsyncClient(transport=recorder, base_url="https://api.notion.com") as client:
+            pages = (await client.post("/v1/search", json={})).json()
+            blocks = (await client.get("/v1/blocks/page-1/children")).json()
+        return pages, blocks
+
+    pages, blocks = asyncio.run(run())
+    assert pages["results"] == [PAGE]
+    assert blocks["results"][0]["id"] == "block-1"
+
+    recorder.save()
+    workspace = FakeWorkspace.load(tmp_path)
+    assert [page["id"] for page in workspace.pages] == ["page-1"]
+    assert workspace.children("page-1") == [{"id": "block-1", "type": "divider"}]
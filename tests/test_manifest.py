@@ -0,0 +1,79 @@
+"""
+SyncManifest.is_stale 测试
+"""
+
+from notion_sync.fake_notion import FakeWorkspace
+from notion_sync.manifest import SyncManifest
+from notion_sync.notion_client import NotionPost
+
+
+EDITED = "2024-05-01T08:30:00.000Z"
+
+
+def make_post(last_edited_time: str = EDITED) -> NotionPost:
+    workspace = FakeWorkspace.synthesize(pages=1, blocks_per_page=1, depth=1, images_per_page=0)
+    page = dict(workspace.pages[0], last_edited_time=last_edited_time)
+    return NotionPost(page)
+
+
+def record(tmp_path, post: NotionPost, synced_at: str = "2024-05-01T09:00:00+00:00", **kwargs) -> SyncManifest:
+    manifest = SyncManifest(tmp_path / "manifest.json")
+    path = tmp_path / f"{post.slug}.md"
+    path.write_text("text", encoding="utf-8")
+    manifest.record(post, path, "text", [], **kwargs)
+    manifest.entries[post.id].synced_at = synced_at
+    return manifest
+
+
+def test_fresh_entry_is_not_stale(tmp_path):
+    post = make_post()
+    assert not record(tmp_path, post).is_stale(post)
+
+
+def test_missing_entry_is_stale(tmp_path):
+    assert SyncManifest(tmp_path / "manifest.json").is_stale(make_post())
+
+
+def test_edited_post_is_stale(tmp_path):
+    manifest = record(tmp_path, make_post())
+    assert manifest.is_stale(make_post("2024-05-01T08:31:00.000Z"))
+
+
+def test_missing_output_file_is_stale(tmp_path):
+    post = make_post()
+    manifest = record(tmp_path, post)
+    (tmp_path / f"{post.slug}.md").unlink()
+    assert manifest.is_stale(post)
+
+
+def test_sync_within_edit_minute_is_stale(tmp_path):
+    # 同一分钟内的后续编辑不会改变 last_edited_time，必须再同步一次
+    post = make_post()
+    assert record(tmp_path, post, synced_at="2024-05-01T08:30:40+00:00").is_stale(post)
+    assert not record(tmp_path, post, synced_at="2024-05-01T08:31:00+00:00").is_stale(post)
+
+
+def test_sync_time_in_other_timezone(tmp_path):
+    # 08:30 UTC 等于 16:30 +08:00
+    post = make_post()
+    assert record(tmp_path, post, synced_at="2024-05-01T16:30:40+08:00").is_stale(post)
+    assert not record(tmp_path, post, synced_at="2024-05-01T16:31:00+08:00").is_stale(post)
+
+
+def test_invalid_sync_time_is_stale(tmp_path):
+    post = make_post()
+    assert record(tmp_path, post, synced_at="not a time").is_stale(post)
+
+
+def test_stale_record_is_retried(tmp_path):
+    # 有图片下载失败时记录为过期
+    post = make_post()
+    manifest = record(tmp_path, post, stale=True)
+    assert manifest.entries[post.id].last_edited_time == ""
+    assert manifest.is_stale(post)
+
+
+def test_stale_record_survives_reload(tmp_path):
+    post = make_post()
+    record(tmp_path, post, stale=True).save()
+    assert SyncManifest.load(tmp_path / "manifest.json").is_stale(post)
@@ -0,0 +1,97 @@
+"""
+RequestScheduler 测试（429 与 Retry-After）
+"""
+
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+from notion_client.errors import APIResponseError
+
+from notion_sync.config import NotionConfig
+from notion_sync.fake_notion import FakeNotionTransport, FakeWorkspace
+from notion_sync.notion_client import NotionClient
+from notion_sync.scheduler import TokenBucket, parse_retry_after
+
+
+class HeaderError(Exception):
+    """带响应头的错误（与 notion_client 的 HTTPResponseError 一样有 headers 属性）"""
+
+    def __init__(self, headers: dict):
+        super().__init__("error")
+        self.headers = headers
+
+
+def make_client(transport: FakeNotionTransport, max_retries: int = 3) -> NotionClient:
+    config = NotionConfig(
+        token="test-token",
+        database_id="fake-database",
+        rate_limit=100.0,
+        max_retries=max_retries,
+        cache_path=None,
+    )
+    return NotionClient(config, transport=transport)
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after(HeaderError({"retry-after": "2.5"})) == 2.5
+    assert parse_retry_after(HeaderError({"retry-after": "-1"})) == 0.0
+
+
+def test_parse_retry_after_http_date():
+    delay = parse_retry_after(HeaderError({"retry-after": formatdate(time.time() + 30, usegmt=True)}))
+    assert delay is not None and 25 <= delay <= 31
+
+
+def test_parse_retry_after_missing_or_invalid():
+    assert parse_retry_after(Exception("no headers")) is None
+    assert parse_retry_after(HeaderError({})) is None
+    assert parse_retry_after(HeaderError({"retry-after": "soon"})) is None
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=100.0, capacity=10.0)
+    assert bucket.delay() == 0
+    bucket.pause(0.5)
+    assert 0.4 < bucket.delay() <= 0.5
+
+
+def test_retry_after_429():
+    workspace = FakeWorkspace.synthesize(pages=3, blocks_per_page=2, depth=1, images_per_page=0)
+    # 每秒只允许 2 个请求，第 3 个请求收到 429，等待 Retry-After 后重试成功
+    transport = FakeNotionTransport(workspace, rate_limit=2, retry_after=1.0)
+    client = make_client(transport)
+
+    async def run():
+        started = time.monotonic()
+        try:
+            posts = await asyncio.gather(*(client.get_post(page["id"]) for page in workspace.pages))
+        finally:
+            await client.aclose()
+        return posts, time.monotonic() - started
+
+    posts, elapsed = asyncio.run(run())
+    assert [post.id for post in posts] == [page["id"] for page in workspace.pages]
+    assert transport.requests["429"] == 1
+    assert client.metrics.counters["notion_rate_limited"] == 1
+    assert client.metrics.counters["notion_retries"] == 1
+    # 重试前至少等待了 Retry-After
+    assert elapsed >= 1.0
+
+
+def test_rate_limited_gives_up_after_max_retries():
+    workspace = FakeWorkspace.synthesize(pages=1, blocks_per_page=2, depth=1, images_per_page=0)
+    transport = FakeNotionTransport(workspace, rate_limit_probability=1.0, retry_after=0.0)
+    client = make_client(transport, max_retries=2)
+
+    async def run():
+        try:
+            await client.get_post(workspace.pages[0]["id"])
+        finally:
+            await client.aclose()
+
+    with pytest.raises(APIResponseError):
+        asyncio.run(run())
+    assert transport.requests["429"] == 3
+    assert client.metrics.counters["notion_errors"] == 1
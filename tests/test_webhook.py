@@ -0,0 +1,133 @@
+"""
+webhook 接收服务测试（签名校验和页面 ID 规范化）
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+from typing import Dict, List, Optional
+
+import httpx
+
+from notion_sync.config import ServeConfig
+from notion_sync.webhook import WebhookServer, extract_page_ids
+
+
+SECRET = "test-secret"
+PAGE_ID = "1429989f-e8ac-4eff-bc8f-57f56486db54"
+UNDASHED_PAGE_ID = "1429989FE8AC4EFFBC8F57F56486DB54"
+
+
+class RecordingSyncer:
+    """记录同步请求的同步器替身"""
+
+    def __init__(self) -> None:
+        self.synced: List[List[str]] = []
+
+    async def sync(self, page_ids: Optional[List[str]] = None) -> bool:
+        self.synced.append(list(page_ids or []))
+        return True
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def post(payload: dict, headers: Dict[str, str], sign_with: Optional[str] = None) -> tuple:
+    """向临时启动的 webhook 服务发送一个事件，返回 (状态码, 响应, 排队的页面)"""
+    body = json.dumps(payload).encode("utf-8")
+    if sign_with is not None:
+        headers = dict(headers, **{"X-Notion-Signature": sign(body, sign_with)})
+
+    async def run():
+        server = WebhookServer(RecordingSyncer(), ServeConfig(port=0, secret=SECRET))
+        await server.start()
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"http://127.0.0.1:{server.port}/webhook", content=body, headers=headers
+                )
+        finally:
+            server._server.close()
+            await server._server.wait_closed()
+        return response.status_code, response.json(), list(server._pending)
+
+    return asyncio.run(run())
+
+
+def page_event(page_id: str = PAGE_ID) -> dict:
+    return {"type": "page.content_updated", "entity": {"type": "page", "id": page_id}}
+
+
+def test_valid_signature_is_accepted():
+    status, body, pending = post(page_event(), {}, sign_with=SECRET)
+    assert status == 202
+    assert body == {"queued": [PAGE_ID]}
+    assert pending == [PAGE_ID]
+
+
+def test_bad_signature_is_rejected():
+    status, _, pending = post(page_event(), {}, sign_with="wrong-secret")
+    assert status == 401
+    assert pending == []
+
+
+def test_signature_over_other_body_is_rejected():
+    headers = {"X-Notion-Signature": sign(json.dumps(page_event("other")).encode("utf-8"))}
+    status, _, pending = post(page_event(), headers)
+    assert status == 401
+    assert pending == []
+
+
+def test_missing_signature_is_rejected():
+    status, _, pending = post(page_event(), {})
+    assert status == 401
+    assert pending == []
+
+
+def test_shared_secret_headers():
+    assert post(page_event(), {"X-Webhook-Secret": SECRET})[0] == 202
+    assert post(page_event(), {"Authorization": f"Bearer {SECRET}"})[0] == 202
+    assert post(page_event(), {"Authorization": "Bearer wrong"})[0] == 401
+
+
+def test_verification_request_needs_no_signature():
+    status, body, pending = post({"verification_token": "secret_abc"}, {})
+    assert status == 200
+    assert body == {"status": "verification received"}
+    assert pending == []
+
+
+def test_undashed_id_is_normalized():
+    status, body, pending = post(page_event(UNDASHED_PAGE_ID), {}, sign_with=SECRET)
+    assert status == 202
+    assert pending == [PAGE_ID]
+
+
+def test_extract_page_ids_normalizes_all_formats():
+    url = f"https://www.notion.so/workspace/My-Post-{UNDASHED_PAGE_ID.lower()}?v=abc"
+    assert extract_page_ids(page_event(PAGE_ID.upper())) == [PAGE_ID]
+    assert extract_page_ids({"data": {"object": "page", "id": UNDASHED_PAGE_ID}}) == [PAGE_ID]
+    assert extract_page_ids({"page_id": url}) == [PAGE_ID]
+    assert extract_page_ids({"page_ids": [PAGE_ID, UNDASHED_PAGE_ID]}) == [PAGE_ID, PAGE_ID]
+
+
+def test_extract_page_ids_skips_invalid_and_non_page_entities():
+    assert extract_page_ids({"page_ids": ["not-a-page", PAGE_ID]}) == [PAGE_ID]
+    assert extract_page_ids({"entity": {"type": "database", "id": PAGE_ID}}) == []
+    assert extract_page_ids({}) == []
+
+
+def test_queued_pages_are_synced_once():
+    async def run():
+        syncer = RecordingSyncer()
+        server = WebhookServer(syncer, ServeConfig(secret=SECRET, coalesce=0.05))
+        server.enqueue(extract_page_ids(page_event(PAGE_ID)))
+        server.enqueue(extract_page_ids(page_event(UNDASHED_PAGE_ID)))
+        worker = asyncio.create_task(server._worker())
+        await asyncio.sleep(0.2)
+        worker.cancel()
+        return syncer.synced
+
+    assert asyncio.run(run()) == [[PAGE_ID]]